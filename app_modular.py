@@ -5,24 +5,15 @@ Main application file using modular architecture
 import streamlit as st
 import os
 import sys
+from functools import partial
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.config.constants import PAGE_CONFIG
-from src.utils.session import initialize_session_state
+from src.config.constants import PAGE_CONFIG, MESSAGE_LIVE_REFRESH
+from src.utils.session import initialize_session_state, get_user_id, get_message_state
 from src.ui.auth import render_login_page, render_admin_login
-from src.managers.ai_agent import AIAgentSystem
-from src.managers.messaging import MessagingSystem
-from src.managers.admin import AdminSystem
-from src.managers.client_intake import ClientIntakeManager
-from src.managers.prescription import PrescriptionManager
-from src.managers.investment import InvestmentManager
-from src.managers.expense import ExpenseManager
-from src.managers.insurance import InsuranceManager
-from src.managers.legal import LegalManager
-from src.managers.tax import TaxManager
-from src.managers.travel import TravelManager
+from src.managers.registry import get_manager, start_background_jobs
 
 # Set page configuration
 st.set_page_config(**PAGE_CONFIG)
@@ -30,36 +21,14 @@ st.set_page_config(**PAGE_CONFIG)
 # Initialize session state
 initialize_session_state()
 
-# Initialize managers
-ai_system = AIAgentSystem()
-messaging_system = MessagingSystem()
-admin_system = AdminSystem()
-intake_manager = ClientIntakeManager()
-prescription_manager = PrescriptionManager()
-investment_manager = InvestmentManager()
-expense_manager = ExpenseManager()
-insurance_manager = InsuranceManager()
-legal_manager = LegalManager()
-tax_manager = TaxManager()
-travel_manager = TravelManager()
-
-# Main App Logic
-if not st.session_state.user_logged_in and not st.session_state.admin_logged_in:
-    # Login/Signup Page
-    render_login_page()
-    
-elif st.session_state.admin_logged_in:
-    # Admin Dashboard
-    render_admin_dashboard()
-    
-else:
-    # User Dashboard
-    render_user_dashboard()
+# Refill reminders are swept in the background instead of on each render
+start_background_jobs()
 
 
 def render_admin_dashboard():
     """Render admin dashboard"""
     from src.ui.auth import logout_admin
+    admin_system = get_manager('admin')
     
     admin_name = st.session_state.get('admin_name', 'Admin')
     st.title(f"🛠️ Admin Dashboard - {admin_name}")
@@ -121,68 +90,33 @@ def render_user_dashboard():
         logout_user()
         st.rerun()
     
-    # Main dashboard content
-    st.subheader("📊 Dashboard Overview")
-    
-    # Quick stats
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("AI Tasks Completed", ai_system.agents['expense_agent']['tasks_completed'])
-    
-    with col2:
-        unread_count = messaging_system.get_unread_count()
-        st.metric("Unread Messages", unread_count)
-    
-    with col3:
-        active_prescriptions = len(prescription_manager.get_prescriptions())
-        st.metric("Active Prescriptions", active_prescriptions)
-    
-    with col4:
-        portfolio_summary = investment_manager.get_portfolio_summary()
-        st.metric("Portfolio Value", f"${portfolio_summary['total_value']:,.0f}")
-    
     # Service tabs
     st.subheader("🔧 Services")
     
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
-        "💰 Expenses", "📈 Investments", "🏥 Health", "🛡️ Insurance", "⚖️ Legal",
-        "📊 Tax", "✈️ Travel", "💬 Messages", "🤖 AI Agents", "⚙️ Settings"
-    ])
-    
-    with tab1:
-        render_expense_tab()
-    
-    with tab2:
-        render_investment_tab()
-    
-    with tab3:
-        render_health_tab()
-    
-    with tab4:
-        render_insurance_tab()
-    
-    with tab5:
-        render_legal_tab()
-    
-    with tab6:
-        render_tax_tab()
-    
-    with tab7:
-        render_travel_tab()
-    
-    with tab8:
-        render_messaging_tab()
-    
-    with tab9:
-        render_ai_agents_tab()
-    
-    with tab10:
-        render_settings_tab()
+    # st.tabs executes every tab body on each run; rendering only the selected
+    # tab means its managers (and their data files) load on first visit. Summary
+    # metrics live in the tab that owns them for the same reason.
+    service_tabs = {
+        "💰 Expenses": render_expense_tab,
+        "📈 Investments": render_investment_tab,
+        "🏥 Health": render_health_tab,
+        "🛡️ Insurance": render_insurance_tab,
+        "⚖️ Legal": render_legal_tab,
+        "📊 Tax": render_tax_tab,
+        "✈️ Travel": render_travel_tab,
+        "💬 Messages": render_messaging_tab,
+        "🤖 AI Agents": render_ai_agents_tab,
+        "⚙️ Settings": render_settings_tab
+    }
+    selected_tab = st.radio(
+        "Service", list(service_tabs), horizontal=True, label_visibility="collapsed", key="service_tab"
+    )
+    service_tabs[selected_tab]()
 
 
 def render_expense_tab():
     """Render expense management tab"""
+    expense_manager = get_manager('expense', get_user_id())
     st.subheader("💰 Expense Management")
     
     # Expense summary
@@ -214,6 +148,7 @@ def render_expense_tab():
 
 def render_investment_tab():
     """Render investment management tab"""
+    investment_manager = get_manager('investment', get_user_id())
     st.subheader("📈 Investment Management")
     
     # Portfolio summary
@@ -241,6 +176,7 @@ def render_investment_tab():
 
 def render_health_tab():
     """Render health management tab"""
+    prescription_manager = get_manager('prescription', get_user_id())
     st.subheader("🏥 Health Management")
     
     # Prescription summary
@@ -288,25 +224,87 @@ def render_health_tab():
             st.rerun()
 
 
+@st.fragment(run_every=MESSAGE_LIVE_REFRESH)
+def render_message_feed(selected_channel):
+    """Render a page of a channel's messages, adding pushed messages without rerunning the app"""
+    messaging_system = get_manager('messaging', get_user_id())
+    state = get_message_state()
+    cursor = state['cursors'].get(selected_channel)
+    pushed = [payload for _, payload in state['subscription'].drain()]
+    
+    # The page is only read from the store when the channel or cursor changes, or when
+    # the store went stale and the registry rebuilt the manager from what other processes wrote
+    cached = state['page']
+    if cached is None or cached[:3] != (messaging_system, selected_channel, cursor):
+        messages = messaging_system.get_messages(selected_channel, limit=10, before=cursor)
+        cached = (messaging_system, selected_channel, cursor, messages)
+    elif cursor is None:
+        new = [m for m in pushed if m['channel'] == selected_channel]
+        cached = (messaging_system, selected_channel, cursor, (cached[3] + new)[-10:])
+    state['page'] = cached
+    messages = cached[3]
+    
+    elsewhere = state['pushed_counts']
+    elsewhere.pop(selected_channel, None)
+    for message in pushed:
+        if message['channel'] != selected_channel:
+            elsewhere[message['channel']] = elsewhere.get(message['channel'], 0) + 1
+    if elsewhere:
+        st.caption("New messages in " + ", ".join(f"{channel} ({count})" for channel, count in elsewhere.items()))
+    
+    if messages:
+        st.subheader(f"📨 Messages - {selected_channel.title()}")
+        for message in messages:
+            timestamp = message['timestamp']
+            if hasattr(timestamp, 'strftime'):
+                timestamp = timestamp.strftime('%Y-%m-%d %H:%M')
+            
+            st.write(f"**{message['sender']}** ({timestamp}): {message['message']}")
+        
+        # Opening a channel clears its unread badge
+        messaging_system.mark_read(selected_channel)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if len(messages) == 10 and st.button("⬆️ Older messages", key=f"older_{selected_channel}"):
+                state['cursors'][selected_channel] = messages[0]['seq']
+                st.rerun()
+        with col2:
+            if cursor and st.button("⬇️ Latest messages", key=f"latest_{selected_channel}"):
+                state['cursors'][selected_channel] = None
+                st.rerun()
+
+
 def render_messaging_tab():
     """Render messaging tab"""
+    messaging_system = get_manager('messaging', get_user_id())
     st.subheader("💬 Messaging System")
     
     # Message channels
     channels = ["concierge", "ai_agent", "support"]
-    selected_channel = st.selectbox("Select Channel", channels)
-    
-    # Display messages
-    messages = messaging_system.get_messages(selected_channel)
-    
-    if messages:
-        st.subheader(f"📨 Messages - {selected_channel.title()}")
-        for message in messages[-10:]:  # Show last 10 messages
+    unread_counts = messaging_system.get_unread_counts()
+    st.metric("Unread Messages", sum(unread_counts.values()))
+    selected_channel = st.selectbox(
+        "Select Channel", channels,
+        format_func=lambda channel: f"{channel} ({unread_counts[channel]})" if unread_counts.get(channel) else channel
+    )
+    
+    # New messages are pushed to this session instead of being re-read on every rerun
+    state = get_message_state()
+    if state['subscription'] is None:
+        state['subscription'] = messaging_system.subscribe(channels)
+    render_message_feed(selected_channel)
+    
+    # Search message history
+    query = st.text_input("🔍 Search messages", key="message_search")
+    if query:
+        results = messaging_system.search(query)
+        st.caption(f"{len(results)} matching message(s)")
+        for message in results:
             timestamp = message['timestamp']
             if hasattr(timestamp, 'strftime'):
                 timestamp = timestamp.strftime('%Y-%m-%d %H:%M')
-            
-            st.write(f"**{message['sender']}** ({timestamp}): {message['message']}")
+            st.write(f"**{message['sender']}** in {message['channel']} ({timestamp}): {message['message']}")
     
     # Send message
     st.subheader("✍️ Send Message")
@@ -319,26 +317,44 @@ def render_messaging_tab():
         if st.button("Send", key=f"send_{selected_channel}"):
             if message_text:
                 messaging_system.add_message("user", selected_channel, message_text, "user", selected_channel)
+                state['cursors'][selected_channel] = None
                 st.success("Message sent!")
                 st.rerun()
 
 
 def render_ai_agents_tab():
     """Render AI agents tab"""
+    ai_system = get_manager('ai_agent')
     st.subheader("🤖 AI Agents")
     
     # Agent status
     agents = ai_system.get_agent_status()
+    task_metrics = ai_system.get_task_metrics()
+    st.metric("AI Tasks Completed", sum(agent['tasks_completed'] for agent in agents.values()))
     
     for agent_id, agent_data in agents.items():
         with st.expander(f"{agent_data['name']} - {agent_data['status'].title()}"):
             st.write(f"**Tasks Completed:** {agent_data['tasks_completed']}")
+            metrics = task_metrics[agent_id]
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Queued / Running", f"{metrics['queued']} / {metrics['running']}")
+            col2.metric("Failed", metrics['failed'])
+            col3.metric("Avg Run Time", f"{metrics['avg_run_seconds']:.2f}s")
+            col4.metric("Throughput", f"{metrics['throughput_per_minute']:.1f}/min")
             
-            # Simulate task
+            # Tasks run on the agent's worker pool; the page does not wait for them
             if st.button(f"Simulate Task - {agent_id}"):
-                result = ai_system.simulate_ai_task(agent_id, "Sample task")
-                st.success(result)
-                st.rerun()
+                task_id = ai_system.submit_task(agent_id, "Sample task")
+                st.success(f"Task #{task_id} queued for {agent_data['name']}")
+    
+    # Recommendations filled in from the user's own data
+    st.subheader("💡 AI Recommendations")
+    service_type = st.selectbox(
+        "Service", ["expense", "medical", "communication", "insurance", "tax", "travel"], key="recommendation_service"
+    )
+    user_managers = partial(get_manager, user_id=get_user_id())
+    for recommendation in ai_system.generate_ai_recommendations(st.session_state.user_plan, service_type, user_managers):
+        st.write(f"• {recommendation}")
     
     # AI insights
     st.subheader("🧠 AI Insights")
@@ -354,6 +370,7 @@ def render_ai_agents_tab():
 
 def render_insurance_tab():
     """Render insurance management tab"""
+    insurance_manager = get_manager('insurance', get_user_id())
     st.subheader("🛡️ Insurance Management")
     
     # Insurance summary
@@ -380,6 +397,7 @@ def render_insurance_tab():
 
 def render_legal_tab():
     """Render legal management tab"""
+    legal_manager = get_manager('legal', get_user_id())
     st.subheader("⚖️ Legal Management")
     
     # Legal summary
@@ -406,6 +424,7 @@ def render_legal_tab():
 
 def render_tax_tab():
     """Render tax management tab"""
+    tax_manager = get_manager('tax', get_user_id())
     st.subheader("📊 Tax Management")
     
     # Tax summary
@@ -432,6 +451,7 @@ def render_tax_tab():
 
 def render_travel_tab():
     """Render travel management tab"""
+    travel_manager = get_manager('travel', get_user_id())
     st.subheader("✈️ Travel Management")
     
     # Travel summary
@@ -488,6 +508,20 @@ def render_settings_tab():
                 st.rerun()
 
 
+# Main App Logic
+if not st.session_state.user_logged_in and not st.session_state.admin_logged_in:
+    # Login/Signup Page
+    render_login_page()
+    
+elif st.session_state.admin_logged_in:
+    # Admin Dashboard
+    render_admin_dashboard()
+    
+else:
+    # User Dashboard
+    render_user_dashboard()
+
+
 if __name__ == "__main__":
     # This allows the app to be run directly
     pass
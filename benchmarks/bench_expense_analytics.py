@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loop-based expense summary vs columnar ExpenseAnalytics
+
+Usage: python benchmarks/bench_expense_analytics.py [record counts...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.analytics.expenses import ExpenseAnalytics
+
+CATEGORIES = ['food', 'transportation', 'entertainment', 'utilities', 'other']
+
+
+def make_expenses(count):
+    """Generate synthetic imported transactions spread over three years"""
+    rng = random.Random(42)
+    return [
+        {
+            'id': i + 1,
+            'category': rng.choice(CATEGORIES),
+            'amount': round(rng.uniform(1, 500), 2),
+            'date': f"{rng.randint(2022, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'status': 'active' if rng.random() > 0.05 else 'deleted'
+        }
+        for i in range(count)
+    ]
+
+
+def loop_summary(expenses):
+    """The per-dict loops ExpenseManager used before the analytics layer"""
+    total = sum(e['amount'] for e in expenses if e['status'] == 'active')
+    categories, months = {}, {}
+    for e in expenses:
+        if e['status'] == 'active':
+            categories[e['category']] = categories.get(e['category'], 0) + e['amount']
+            months[e['date'][:7]] = months.get(e['date'][:7], 0) + e['amount']
+    return total, categories, months
+
+
+def columnar_summary(analytics):
+    return analytics.total(), analytics.by_category(), analytics.by_month()
+
+
+def best_of(func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(counts):
+    print(f"{'records':>10} {'loop ms':>10} {'build ms':>10} {'columnar ms':>12} {'speedup':>8}")
+    for count in counts:
+        expenses = make_expenses(count)
+        loop_time = best_of(loop_summary, expenses)
+        build_time = best_of(ExpenseAnalytics, expenses, repeat=3)
+        analytics = ExpenseAnalytics(expenses)
+        columnar_time = best_of(columnar_summary, analytics)
+        print(f"{count:>10} {loop_time * 1000:>10.2f} {build_time * 1000:>10.2f} "
+              f"{columnar_time * 1000:>12.3f} {loop_time / columnar_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
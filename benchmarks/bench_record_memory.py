@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by plain dict records vs slotted record types
+
+Usage: python benchmarks/bench_record_memory.py [record counts...]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.managers.records import Expense, Prescription
+from src.storage.binary_snapshot import encode_snapshot, read_snapshot
+
+CATEGORIES = ['food', 'transportation', 'entertainment', 'utilities', 'other']
+PHARMACIES = ['cvs', 'walgreens', 'rite_aid', 'walmart']
+
+
+def make_expenses(count):
+    """Generate synthetic imported transactions spread over three years"""
+    rng = random.Random(42)
+    return [
+        {
+            'id': i + 1, 'category': rng.choice(CATEGORIES), 'amount': round(rng.uniform(1, 500), 2),
+            'description': f'Transaction {i}',
+            'date': f"{rng.randint(2022, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'app_source': 'bank', 'created_date': '2024-01-01 10:00:00', 'status': 'active'
+        }
+        for i in range(count)
+    ]
+
+
+def make_prescriptions(count):
+    """Generate synthetic prescriptions with refill dates over the next year"""
+    rng = random.Random(42)
+    return [
+        {
+            'id': str(i + 1), 'name': f'Medication {i % 500}', 'dosage': '10mg', 'frequency': 'Daily',
+            'quantity': 30, 'refill_date': '2024-01-01', 'pharmacy': rng.choice(PHARMACIES),
+            'doctor': f'Dr. {rng.randint(1, 200)}', 'status': 'active', 'refills_remaining': 3,
+            'last_refill': None, 'next_refill_due': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        }
+        for i in range(count)
+    ]
+
+
+def measure(encoded, build):
+    """Memory held by the records ``build`` makes from ``encoded``, and the time to build them"""
+    gc.collect()
+    tracemalloc.start()
+    records = build(json.loads(encoded))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    gc.collect()
+    # Timed separately: tracing every allocation slows decoding several times over
+    start = time.perf_counter()
+    build(json.loads(encoded))
+    return size, time.perf_counter() - start
+
+
+def time_snapshot_load(path, build):
+    """Best of three: map a binary snapshot, build its records and touch them all, as a manager does on startup"""
+    best = None
+    for _ in range(3):
+        gc.collect()
+        start = time.perf_counter()
+        for record in build(read_snapshot(path)):
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(name, records, record_class, count, directory):
+    encoded = json.dumps({name: records})
+    dict_size, dict_time = measure(encoded, lambda data: data[name])
+    slot_size, slot_time = measure(encoded, lambda data: record_class.load(data, name))
+    path = os.path.join(directory, f'{name}.snap')
+    with open(path, 'wb') as f:
+        f.write(encode_snapshot({name: records}))
+    dict_load = time_snapshot_load(path, lambda data: data[name])
+    slot_load = time_snapshot_load(path, lambda data: record_class.load(data, name))
+    print(f"{record_class.__name__:>14} {count:>9} {dict_size / 1e6:>9.1f} {slot_size / 1e6:>9.1f} "
+          f"{dict_size / slot_size:>6.1f}x {dict_time * 1000:>9.1f} {slot_time * 1000:>9.1f} "
+          f"{dict_load * 1000:>10.1f} {slot_load * 1000:>10.1f}")
+
+
+def main(counts):
+    # JSON columns parse a JSON snapshot; snap columns start up from a binary snapshot
+    print(f"{'record':>14} {'records':>9} {'dict MB':>9} {'slots MB':>9} {'saved':>7} "
+          f"{'dict ms':>9} {'slots ms':>9} {'snap dict':>10} {'snap slots':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            run('expenses', make_expenses(count), Expense, count, directory)
+            run('prescriptions', make_prescriptions(count), Prescription, count, directory)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
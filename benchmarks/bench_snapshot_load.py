@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold manager startup from JSON vs binary snapshots
+
+Usage: python benchmarks/bench_snapshot_load.py [record counts...]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.storage import journal
+from src.storage.journal import JournalStore
+from src.managers.investment import InvestmentManager
+from src.managers.prescription import PrescriptionManager
+
+PHARMACIES = ['cvs', 'walgreens', 'rite_aid', 'walmart']
+SYMBOLS = ['VTI', 'VXUS', 'BND', 'AAPL', 'MSFT', 'GOOG']
+
+
+def make_investments(count):
+    """Generate synthetic holdings spread over 50 accounts"""
+    rng = random.Random(42)
+    accounts = [
+        {'id': i + 1, 'broker': 'vanguard', 'account_name': f'Account {i + 1}', 'account_type': 'brokerage',
+         'balance': 0, 'created_date': '2024-01-01', 'status': 'active'}
+        for i in range(50)
+    ]
+    investments = []
+    for i in range(count):
+        shares, price = rng.randint(1, 500), round(rng.uniform(10, 500), 2)
+        investments.append({
+            'id': i + 1, 'symbol': rng.choice(SYMBOLS), 'name': 'Holding', 'shares': shares,
+            'purchase_price': price, 'current_price': price, 'total_value': shares * price,
+            'account_id': rng.randint(1, 50), 'investment_type': 'stock',
+            'purchase_date': '2024-01-01', 'status': 'active'
+        })
+    return {'investments': investments, 'accounts': accounts}
+
+
+def make_prescriptions(count):
+    """Generate synthetic prescriptions with refill dates over the next year"""
+    rng = random.Random(42)
+    return {
+        'prescriptions': [
+            {
+                'id': i + 1, 'name': f'Medication {i % 500}', 'dosage': '10mg', 'frequency': 'Daily',
+                'quantity': 30, 'next_refill_due': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'pharmacy': rng.choice(PHARMACIES), 'doctor': f'Dr. {rng.randint(1, 200)}',
+                'status': 'active', 'created_date': '2024-01-01'
+            }
+            for i in range(count)
+        ],
+        'refill_reminders': []
+    }
+
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def first_record(name):
+    data = JournalStore(name).load()
+    return next(iter(data.values()))[0]
+
+
+def run(name, data, manager_class, count):
+    results = {}
+    for snapshot_format in ('json', 'binary'):
+        for path in os.listdir('.'):
+            os.remove(path)
+        journal.SNAPSHOT_FORMAT = snapshot_format
+        store = JournalStore(name)
+        store.save(data)
+        size = os.path.getsize(store.path)
+        load_time = best_of(lambda: JournalStore(name).load())
+        first_time = best_of(lambda: first_record(name))
+        manager_time = best_of(manager_class)
+        results[snapshot_format] = (size, load_time, first_time, manager_time)
+    for snapshot_format, (size, load_time, first_time, manager_time) in results.items():
+        speedup = results['json'][3] / manager_time
+        print(f"{manager_class.__name__:>20} {count:>9} {snapshot_format:>7} {size / 1e6:>8.1f} "
+              f"{load_time * 1000:>9.1f} {first_time * 1000:>9.2f} {manager_time * 1000:>11.1f} {speedup:>7.1f}x")
+
+
+def main(counts):
+    print(f"{'manager':>20} {'records':>9} {'format':>7} {'MB':>8} {'load ms':>9} {'first ms':>9} "
+          f"{'startup ms':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for count in counts:
+            run('investments.json', make_investments(count), InvestmentManager, count)
+            run('prescriptions.json', make_prescriptions(count), PrescriptionManager, count)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -65,6 +65,20 @@ AI_AGENTS = {
     'communication_agent': {'name': '💬 Communication AI', 'status': 'active', 'tasks_completed': 0}
 }
 
+# AI Agent Tasks
+AI_AGENT_CONCURRENCY = {  # worker threads per agent type
+    'expense_agent': 4,
+    'travel_agent': 2,
+    'medical_agent': 2,
+    'insurance_agent': 2,
+    'tax_agent': 2,
+    'communication_agent': 4
+}
+AI_TASK_SIMULATED_SECONDS = 0.5  # duration of a simulated agent task
+AI_TASK_METRICS_WINDOW = 300  # seconds of completions counted towards throughput
+AI_TASK_LEASE_SECONDS = 30  # an unfinished task whose owner stops renewing its lease this long may be resumed
+AI_TASK_RESUME_INTERVAL = 30  # seconds between sweeps for tasks whose lease has lapsed
+
 # AI Insights
 AI_INSIGHTS = {
     'expense_patterns': ['High spending on dining', 'Subscription optimization needed', 'Budget alerts'],
@@ -73,6 +87,41 @@ AI_INSIGHTS = {
     'communication_style': ['Prefers email', 'Quick responses', 'Detailed follow-ups']
 }
 
+# AI Recommendation Templates (string.Template syntax; $$ is a literal dollar sign).
+# A template is skipped when manager data for one of its fields is unavailable.
+AI_RECOMMENDATION_TEMPLATES = {
+    'expense': [
+        "Based on your $plan plan, I recommend optimizing your subscription services.",
+        "You've spent $$${expense_total} so far; ${top_category} is your largest category.",
+        "I've identified potential savings opportunities for $plan users."
+    ],
+    'travel': [
+        "Your $plan plan includes personalized travel recommendations.",
+        "I found better flight options for your upcoming trip.",
+        "Your $plan concierge can handle all travel bookings."
+    ],
+    'medical': [
+        "Your $plan plan includes health management assistance.",
+        "${refills_due} of your ${active_prescriptions} active prescriptions are due for a refill this week.",
+        "Your $plan plan covers prescription management."
+    ],
+    'insurance': [
+        "Your $plan plan includes insurance optimization.",
+        "I've reviewed your policies and found potential savings.",
+        "Your $plan concierge can handle claims processing."
+    ],
+    'tax': [
+        "Your $plan plan includes tax preparation assistance.",
+        "I've organized your tax documents for the upcoming season.",
+        "Your $plan plan covers year-round tax optimization."
+    ],
+    'communication': [
+        "Your $plan plan includes priority communication channels.",
+        "You have ${unread_messages} unread messages waiting for you.",
+        "Your $plan concierge is available for immediate assistance."
+    ]
+}
+
 # Service Pricing
 SERVICE_PRICING = {
     'Health Management': 20,
@@ -111,6 +160,7 @@ DEFAULT_ADMIN_USERS = {
 }
 
 # System Metrics
+METRICS_FLUSH_INTERVAL = 5  # seconds between writes of batched counter increments
 DEFAULT_SYSTEM_METRICS = {
     'total_users': 0,
     'active_sessions': 0,
@@ -126,5 +176,45 @@ DATA_FILES = {
     'prescriptions': 'prescriptions.json',
     'admin_data': 'admin_data.json',
     'expenses': 'expenses.json',
-    'investments': 'investments.json'
+    'investments': 'investments.json',
+    'insurance': 'insurance_data.json',
+    'legal': 'legal_data.json',
+    'tax': 'tax_data.json',
+    'travel': 'travel_data.json',
+    'ai_tasks': 'ai_tasks.json',
+    'metrics': 'metrics.json'
 }
+
+# Storage Engine
+STORAGE_BACKEND = 'journal'  # 'journal' (JSON snapshot + journal) or 'sqlite'
+JOURNAL_COMPACT_EVERY = 500  # journal entries before a fresh snapshot is written
+SNAPSHOT_FORMAT = 'json'  # 'json' or 'binary' (memory-mapped, records decoded on first access)
+SNAPSHOT_CHUNK_SIZE = 256  # records decoded together from a binary snapshot
+SQLITE_DATABASE = 'concierge.db'
+USER_DATA_DIR = 'user_data'  # per-user partitions of the journal backend, one directory per user
+SHARED_DATA_OWNER = None  # user given data saved before per-user partitions; None: the first to log in
+USER_MANAGER_CACHE_SIZE = 256  # per-user manager instances kept by the registry
+SQLITE_INDEXED_FIELDS = ['id', 'status', 'category', 'date', 'account_id', 'channel']
+IMPORT_BATCH_SIZE = 5000  # records validated and persisted per write during file imports
+
+# Messaging
+MESSAGE_STORAGE_VERSION = 2  # 2: messages stored once, channels hold message ids
+MESSAGE_ARCHIVE_DIR = 'chat_archive'
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_RECENT_WINDOW = 200  # newest messages per channel kept in chat_history.json
+MESSAGE_SEGMENT_SIZE = 500  # messages per sealed archive segment
+MESSAGE_FLUSH_INTERVAL = 0.5  # seconds the writer waits to coalesce a burst of messages
+MESSAGE_QUEUE_SIZE = 1000  # queued writes before add_message blocks on the writer
+MESSAGE_SEQ_BLOCK = 100  # message sequence numbers reserved per allocation
+MESSAGE_SEARCH_LIMIT = 20
+MESSAGE_LIVE_REFRESH = 2  # seconds between checks of the live message feed
+
+# Pub/Sub
+PUBSUB_BACKEND = 'local'  # 'local' (in-process) or 'redis' (any Redis-protocol server)
+PUBSUB_REDIS_URL = 'redis://localhost:6379/0'
+PUBSUB_QUEUE_SIZE = 100  # undelivered messages kept per subscription
+
+# Background Jobs
+REFILL_REMINDER_DAYS = 7  # prescriptions due within this many days get a reminder
+REFILL_URGENT_DAYS = 2
+REFILL_REMINDER_INTERVAL = 3600  # seconds between refill reminder sweeps
@@ -1,26 +1,27 @@
 """
 Admin Management System
 """
-import json
-import os
 from src.config.constants import DEFAULT_ADMIN_USERS, ADMIN_ROLES, DEFAULT_SYSTEM_METRICS, DATA_FILES
+from src.storage.backends import open_store
+from src.storage.metrics import get_metrics_store
 
 
 class AdminSystem:
     def __init__(self):
         self.admin_users = DEFAULT_ADMIN_USERS.copy()
         self.user_sessions = []
-        self.system_metrics = DEFAULT_SYSTEM_METRICS.copy()
+        # Counters live in the shared metrics store so every process adds to the same totals
+        self.metrics = get_metrics_store(DATA_FILES['metrics'])
+        self.store = open_store('admin_data', compact=self.save_admin_data)
         self.load_admin_data()
     
     def load_admin_data(self):
         """Load admin data from storage"""
         try:
-            if os.path.exists(DATA_FILES['admin_data']):
-                with open(DATA_FILES['admin_data'], 'r') as f:
-                    data = json.load(f)
-                    self.user_sessions = data.get('user_sessions', [])
-                    self.system_metrics = data.get('system_metrics', self.system_metrics)
+            data = self.store.load()
+            self.user_sessions = data.setdefault('user_sessions', [])
+            # Counters saved here before the metrics store existed carry over once
+            self.metrics.seed({**DEFAULT_SYSTEM_METRICS, **data.get('system_metrics', {})})
         except Exception as e:
             print(f"Error loading admin data: {e}")
     
@@ -28,11 +29,9 @@ class AdminSystem:
         """Save admin data to storage"""
         try:
             data = {
-                'user_sessions': self.user_sessions,
-                'system_metrics': self.system_metrics
+                'user_sessions': self.user_sessions
             }
-            with open(DATA_FILES['admin_data'], 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving admin data: {e}")
     
@@ -51,24 +50,30 @@ class AdminSystem:
         """Get permissions for admin role"""
         return ADMIN_ROLES.get(role, [])
     
+    @property
+    def system_metrics(self):
+        """Current system metrics, read from the shared metrics store"""
+        totals = self.metrics.snapshot()
+        return {name: totals.get(name, default) for name, default in DEFAULT_SYSTEM_METRICS.items()}
+    
     def get_system_metrics(self):
         """Get current system metrics"""
         return self.system_metrics
     
     def update_metrics(self, metric_type, value):
         """Update system metrics"""
-        if metric_type in self.system_metrics:
-            self.system_metrics[metric_type] += value
-            self.save_admin_data()
+        if metric_type in DEFAULT_SYSTEM_METRICS:
+            self.metrics.increment(metric_type, value)
     
     def get_user_analytics(self):
         """Get user analytics for admin dashboard"""
+        metrics = self.system_metrics
         return {
-            'total_users': self.system_metrics['total_users'],
-            'active_sessions': self.system_metrics['active_sessions'],
-            'messages_sent': self.system_metrics['messages_sent'],
-            'prescriptions_managed': self.system_metrics['prescriptions_managed'],
-            'ai_tasks_completed': self.system_metrics['ai_tasks_completed']
+            'total_users': metrics['total_users'],
+            'active_sessions': metrics['active_sessions'],
+            'messages_sent': metrics['messages_sent'],
+            'prescriptions_managed': metrics['prescriptions_managed'],
+            'ai_tasks_completed': metrics['ai_tasks_completed']
         }
     
     def get_staff_members(self):
@@ -1,60 +1,349 @@
 """
 AI Agent System for Concierge Scaling
 """
-from src.config.constants import AI_AGENTS, AI_INSIGHTS
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.config.constants import (
+    AI_AGENTS, AI_INSIGHTS, AI_AGENT_CONCURRENCY, AI_TASK_SIMULATED_SECONDS, AI_TASK_METRICS_WINDOW,
+    AI_TASK_LEASE_SECONDS, AI_TASK_RESUME_INTERVAL, DATA_FILES
+)
+from src.managers.recommendations import RecommendationEngine
+from src.storage.backends import open_store
+from src.storage.metrics import get_metrics_store
+
+TASK_STATUSES = ['queued', 'running', 'completed', 'failed']
+
+
+def run_agent_task(agent_type, task_description):
+    """Default task handler: simulate an agent working on the task"""
+    time.sleep(AI_TASK_SIMULATED_SECONDS)
+    return f"✅ AI Agent completed: {task_description}"
+
+
+def task_owner():
+    """Owner id recorded on the tasks this process queues and runs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_gone(task, now=None):
+    """Check whether the process that owns an unfinished task has stopped.
+
+    A task is abandoned once its lease has not been renewed for
+    AI_TASK_LEASE_SECONDS, or at once if its owner ran on this host and that
+    process no longer exists. Tasks recorded before owners existed count as
+    abandoned.
+    """
+    owner, heartbeat = task.get('owner'), task.get('heartbeat')
+    if owner is None or heartbeat is None:
+        return True
+    now = now or datetime.now()
+    if (now - datetime.fromisoformat(heartbeat)).total_seconds() > AI_TASK_LEASE_SECONDS:
+        return True
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, ValueError):
+        pass
+    return False
 
 
 class AIAgentSystem:
     def __init__(self):
-        self.agents = AI_AGENTS.copy()
+        self.agents = {agent_id: dict(agent) for agent_id, agent in AI_AGENTS.items()}
         self.ai_insights = AI_INSIGHTS.copy()
+        self.recommendations = RecommendationEngine()
+        self.tasks = []
+        self.tasks_by_id = {}
+        self.futures = {}  # task id -> Future, for tasks dispatched by this instance
+        # Per-agent counters and recent completion times, kept in step with every task change
+        self.task_stats = {}
+        self.recent_completions = {}
+        self.lock = threading.RLock()
+        # Completed-task counters are shared with AdminSystem and other processes
+        self.metrics = get_metrics_store(DATA_FILES['metrics'])
+        # One bounded pool per agent type, so a busy agent cannot starve the others
+        self.pools = {}
+        # Unfinished tasks carry their owner and a lease this instance keeps renewing
+        self.owner = task_owner()
+        self.lease_thread = None
+        self.store = open_store('ai_tasks', compact=self.save_tasks)
+        self.load_tasks()
+    
+    def load_tasks(self):
+        """Load task history and rebuild the per-agent stats.
+
+        Tasks this instance still has queued or running keep their in-memory
+        records, which their workers go on updating.
+        """
+        with self.lock:
+            live = {task_id: self.tasks_by_id[task_id] for task_id, future in self.futures.items() if not future.done()}
+            try:
+                data = self.store.load()
+                self.tasks = data.setdefault('tasks', [])
+                self.tasks[:] = [live.get(task['id'], task) for task in self.tasks]
+            except Exception as e:
+                print(f"Error loading AI tasks: {e}")
+            self.tasks_by_id = {task['id']: task for task in self.tasks}
+            self.task_stats = {}
+            self.recent_completions = {}
+            for task in self.tasks:
+                self._apply_task(task, 1)
+            for completions in self.recent_completions.values():
+                completions_in_order = sorted(completions)
+                completions.clear()
+                completions.extend(completions_in_order)
+            self.get_agent_status()
+    
+    def reload(self):
+        """Pick up other processes' changes without dropping the tasks in flight here"""
+        self.load_tasks()
+    
+    def resume_tasks(self):
+        """Re-queue tasks left queued or running by a process that has stopped; returns how many.
+
+        Every app process calls this at startup and then every
+        AI_TASK_RESUME_INTERVAL seconds (see ``TaskResumeJob``). Tasks whose
+        owner is still alive (see ``owner_gone``) are left to it, so no task
+        runs twice.
+        """
+        resumed = 0
+        now = datetime.now()
+        with self.lock:
+            for task in self.tasks:
+                if task['status'] in ('queued', 'running') and task['agent_type'] in self.agents:
+                    if task['id'] not in self.futures and owner_gone(task, now):
+                        self._update_task(
+                            task, status='queued', started_at=None, owner=self.owner, heartbeat=now.isoformat()
+                        )
+                        self._dispatch(task, run_agent_task)
+                        resumed += 1
+        return resumed
+    
+    def save_tasks(self):
+        """Save task history to storage"""
+        with self.lock:
+            try:
+                self.store.save({'tasks': self.tasks})
+            except Exception as e:
+                print(f"Error saving AI tasks: {e}")
+    
+    def _apply_task(self, task, sign):
+        """Add (sign=1) or remove (sign=-1) a task's contribution to its agent's stats"""
+        stats = self.task_stats.setdefault(task['agent_type'], {
+            status: 0 for status in TASK_STATUSES + ['wait_seconds', 'run_seconds']
+        })
+        stats[task['status']] += sign
+        for field in ('wait_seconds', 'run_seconds'):
+            if task['status'] in ('completed', 'failed') and task.get(field) is not None:
+                stats[field] += sign * task[field]
+        if sign > 0 and task['status'] == 'completed' and task.get('finished_at'):
+            finished = datetime.fromisoformat(task['finished_at']).timestamp()
+            self.recent_completions.setdefault(task['agent_type'], deque()).append(finished)
+    
+    def _update_task(self, task, **changes):
+        with self.lock:
+            self._apply_task(task, -1)
+            task.update(changes)
+            self._apply_task(task, 1)
+            self.store.update('tasks', task['id'], changes)
+    
+    def _dispatch(self, task, handler):
+        agent_type = task['agent_type']
+        pool = self.pools.get(agent_type)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=AI_AGENT_CONCURRENCY.get(agent_type, 1), thread_name_prefix=agent_type
+            )
+            self.pools[agent_type] = pool
+        self.futures[task['id']] = pool.submit(self._run_task, task, handler)
+        if self.lease_thread is None:
+            self.lease_thread = threading.Thread(target=self._renew_leases, name='ai-task-leases', daemon=True)
+            self.lease_thread.start()
+    
+    def _renew_leases(self):
+        """Renew the lease on this instance's unfinished tasks until none are left"""
+        while True:
+            time.sleep(AI_TASK_LEASE_SECONDS / 3)
+            with self.lock:
+                active = [self.tasks_by_id[task_id] for task_id, future in self.futures.items() if not future.done()]
+                if not active:
+                    self.lease_thread = None
+                    return
+                heartbeat = datetime.now().isoformat()
+                for task in active:
+                    task['heartbeat'] = heartbeat
+                self.store.update_many('tasks', {task['id']: {'heartbeat': heartbeat} for task in active})
+    
+    def _run_task(self, task, handler):
+        started = datetime.now()
+        waited = (started - datetime.fromisoformat(task['submitted_at'])).total_seconds()
+        self._update_task(task, status='running', started_at=started.isoformat(), wait_seconds=round(waited, 3))
+        changes = {'result': None, 'error': None}
+        try:
+            changes['result'] = handler(task['agent_type'], task['description'])
+            changes['status'] = 'completed'
+        except Exception as e:
+            print(f"Error running AI task {task['id']}: {e}")
+            changes.update(status='failed', error=str(e))
+        finished = datetime.now()
+        changes['finished_at'] = finished.isoformat()
+        changes['run_seconds'] = round((finished - started).total_seconds(), 3)
+        with self.lock:
+            self._update_task(task, **changes)
+            if changes['status'] == 'completed':
+                counter = f"ai_tasks_completed.{task['agent_type']}"
+                self.metrics.increment('ai_tasks_completed')
+                self.metrics.increment(counter)
+                self.agents[task['agent_type']]['tasks_completed'] = self.metrics.get(counter)
+        return task
+    
+    def submit_task(self, agent_type, task_description, handler=None):
+        """Queue a task for an agent's worker pool; returns the task id, or None for an unknown agent.
+
+        ``handler(agent_type, task_description)`` does the work and returns
+        its result; tasks resumed after a restart use the default handler.
+        """
+        if agent_type not in self.agents:
+            return None
+        with self.lock:
+            task = {
+                'id': self.store.next_id('tasks'),
+                'agent_type': agent_type,
+                'description': task_description,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'wait_seconds': None,
+                'run_seconds': None,
+                'result': None,
+                'error': None,
+                'owner': self.owner,
+                'heartbeat': datetime.now().isoformat()
+            }
+            self.tasks.append(task)
+            self.tasks_by_id[task['id']] = task
+            self._apply_task(task, 1)
+            self.store.append('tasks', task)
+            self._dispatch(task, handler or run_agent_task)
+        return task['id']
+    
+    def wait_for_task(self, task_id, timeout=None):
+        """Block until a task dispatched by this instance finishes; returns the task"""
+        future = self.futures.get(task_id)
+        if future is not None:
+            future.result(timeout)
+            self.futures.pop(task_id, None)
+        return self.tasks_by_id.get(task_id)
+    
+    def get_task(self, task_id):
+        """Get a task by id"""
+        return self.tasks_by_id.get(task_id)
+    
+    def get_tasks(self, agent_type=None, status=None):
+        """Get tasks, optionally filtered by agent and status"""
+        with self.lock:
+            return [
+                task for task in self.tasks
+                if (agent_type is None or task['agent_type'] == agent_type)
+                and (status is None or task['status'] == status)
+            ]
+    
+    def get_task_metrics(self, now=None):
+        """Per-agent task counts, average wait and run time, and recent throughput"""
+        now = now or time.time()
+        metrics = {}
+        with self.lock:
+            for agent_id in self.agents:
+                stats = self.task_stats.get(agent_id, {status: 0 for status in TASK_STATUSES})
+                finished = stats['completed'] + stats['failed']
+                recent = self.recent_completions.get(agent_id, deque())
+                while recent and recent[0] < now - AI_TASK_METRICS_WINDOW:
+                    recent.popleft()
+                metrics[agent_id] = {
+                    **{status: stats[status] for status in TASK_STATUSES},
+                    'avg_wait_seconds': stats.get('wait_seconds', 0) / finished if finished else 0,
+                    'avg_run_seconds': stats.get('run_seconds', 0) / finished if finished else 0,
+                    'throughput_per_minute': len(recent) * 60 / AI_TASK_METRICS_WINDOW,
+                    'concurrency': AI_AGENT_CONCURRENCY.get(agent_id, 1)
+                }
+        return metrics
+    
+    def close(self):
+        """Stop the worker pools taking new work; tasks already queued still run and keep their lease"""
+        for pool in self.pools.values():
+            pool.shutdown(wait=False)
+        self.pools = {}
     
     def get_agent_status(self):
+        """Get the agents with completed-task counts from the shared metrics store"""
+        totals = self.metrics.snapshot()
+        for agent_id, agent in self.agents.items():
+            agent['tasks_completed'] = totals.get(f'ai_tasks_completed.{agent_id}', 0)
         return self.agents
     
     def simulate_ai_task(self, agent_type, task_description):
-        """Simulate AI agent completing a task"""
-        if agent_type in self.agents:
-            self.agents[agent_type]['tasks_completed'] += 1
-            return f"✅ AI Agent completed: {task_description}"
-        return "❌ Agent not found"
+        """Run a task through the agent's worker pool and wait for its result"""
+        task_id = self.submit_task(agent_type, task_description)
+        if task_id is None:
+            return "❌ Agent not found"
+        task = self.wait_for_task(task_id)
+        return task['result'] if task['status'] == 'completed' else f"❌ AI task failed: {task['error']}"
     
     def get_ai_insights(self, category):
         """Get AI-generated insights for a category"""
         return self.ai_insights.get(category, [])
     
-    def generate_ai_recommendations(self, user_plan, service_type):
-        """Generate AI-powered recommendations based on user data"""
-        recommendations = {
-            'expense': [
-                f"Based on your {user_plan} plan, I recommend optimizing your subscription services.",
-                f"Your {user_plan} plan includes AI-powered expense analysis.",
-                f"I've identified potential savings opportunities for {user_plan} users."
-            ],
-            'travel': [
-                f"Your {user_plan} plan includes personalized travel recommendations.",
-                f"I found better flight options for your upcoming trip.",
-                f"Your {user_plan} concierge can handle all travel bookings."
-            ],
-            'medical': [
-                f"Your {user_plan} plan includes health management assistance.",
-                f"I've scheduled your annual checkup based on your preferences.",
-                f"Your {user_plan} plan covers prescription management."
-            ],
-            'insurance': [
-                f"Your {user_plan} plan includes insurance optimization.",
-                f"I've reviewed your policies and found potential savings.",
-                f"Your {user_plan} concierge can handle claims processing."
-            ],
-            'tax': [
-                f"Your {user_plan} plan includes tax preparation assistance.",
-                f"I've organized your tax documents for the upcoming season.",
-                f"Your {user_plan} plan covers year-round tax optimization."
-            ],
-            'communication': [
-                f"Your {user_plan} plan includes priority communication channels.",
-                f"I've optimized your message routing for faster responses.",
-                f"Your {user_plan} concierge is available for immediate assistance."
-            ]
-        }
-        return recommendations.get(service_type, ['AI analysis in progress...'])
+    def generate_ai_recommendations(self, user_plan, service_type, get_manager=None):
+        """Generate AI-powered recommendations, filled in from manager data when ``get_manager`` is given"""
+        context = self.recommendations.context(service_type, get_manager) if get_manager else None
+        return self.recommendations.render(user_plan, service_type, context) or ['AI analysis in progress...']
+
+
+class TaskResumeJob:
+    """Background thread that periodically resumes abandoned AI tasks.
+
+    The AI agent system is fetched through ``get_manager`` on every sweep, so
+    leases renewed by other processes are seen before anything is resumed.
+    """
+
+    def __init__(self, get_manager, interval=AI_TASK_RESUME_INTERVAL):
+        self.get_manager = get_manager
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def run_once(self):
+        """Resume every task whose owner has stopped; returns how many were resumed"""
+        return self.get_manager('ai_agent').resume_tasks()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error resuming AI tasks: {e}")
+            if self.stop_event.wait(self.interval):
+                return
+
+    def start(self):
+        """Start the resume thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='ai-task-resume', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the resume thread and wait for the current sweep to finish"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -1,34 +1,33 @@
 """
 Client Intake Management System
 """
-import json
 import uuid
-import os
 from datetime import datetime
-from src.config.constants import SERVICE_PRICING, NET_WORTH_MULTIPLIERS, SERVICE_PLANS, DATA_FILES
+from src.config.constants import SERVICE_PRICING, NET_WORTH_MULTIPLIERS, SERVICE_PLANS
+from src.storage.backends import open_store
 
 
 class ClientIntakeManager:
     def __init__(self):
         self.clients = []
+        self.clients_by_id = {}
+        self.store = open_store('client_intakes', compact=self.save_client_data)
         self.load_client_data()
     
     def load_client_data(self):
         """Load client intake data from storage"""
         try:
-            if os.path.exists(DATA_FILES['client_intakes']):
-                with open(DATA_FILES['client_intakes'], 'r') as f:
-                    data = json.load(f)
-                    self.clients = data.get('clients', [])
+            data = self.store.load()
+            self.clients = data.setdefault('clients', [])
         except Exception as e:
             print(f"Error loading client data: {e}")
+        self.clients_by_id = {r['id']: r for r in self.clients}
     
     def save_client_data(self):
         """Save client intake data to storage"""
         try:
             data = {'clients': self.clients}
-            with open(DATA_FILES['client_intakes'], 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving client data: {e}")
     
@@ -40,9 +39,14 @@ class ClientIntakeManager:
             **intake_data
         }
         self.clients.append(client)
-        self.save_client_data()
+        self.clients_by_id[client['id']] = client
+        self.store.append('clients', client)
         return client
     
+    def get_client(self, client_id):
+        """Get a client intake by id"""
+        return self.clients_by_id.get(client_id)
+    
     def calculate_pricing(self, net_worth, selected_services, recommended_plan):
         """Calculate dynamic pricing based on net worth and services"""
         # Base pricing by plan
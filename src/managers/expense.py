@@ -1,16 +1,30 @@
 """
 Expense Management System
 """
-import json
-import os
-from datetime import datetime
-from src.config.constants import DATA_FILES
+import calendar
+import math
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from src.config.constants import IMPORT_BATCH_SIZE
+from src.managers.records import Expense
+from src.storage.backends import open_store
+from src.utils.importers import parse_date, parse_amount, batched, iter_expense_records
 
 
 class ExpenseManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.expenses = []
         self.budgets = []
+        self.expenses_by_id = {}
+        # Running aggregates over active records, kept in step with every mutation
+        self.total_expenses = 0
+        self.total_budgets = 0
+        self.category_totals = {}
+        self.category_counts = {}
+        self.month_totals = {}
+        self.expense_keys = None  # de-duplication key -> stored count, built on first bulk import
         self.expense_apps = {
             'ynab': {
                 'name': 'YNAB (You Need A Budget)',
@@ -58,18 +72,46 @@ class ExpenseManager:
                 'description': 'Comprehensive free budgeting and expense tracking'
             }
         }
+        self.store = open_store('expenses', compact=self.save_expenses, user_id=user_id)
         self.load_expenses()
     
     def load_expenses(self):
         """Load expenses from storage"""
         try:
-            if os.path.exists(DATA_FILES['expenses']):
-                with open(DATA_FILES['expenses'], 'r') as f:
-                    data = json.load(f)
-                    self.expenses = data.get('expenses', [])
-                    self.budgets = data.get('budgets', [])
+            data = self.store.load()
+            self.expenses = Expense.load(data, 'expenses')
+            self.budgets = data.setdefault('budgets', [])
         except Exception as e:
             print(f"Error loading expenses: {e}")
+        self.expenses_by_id = {e['id']: e for e in self.expenses}
+        self.rebuild_aggregates()
+    
+    def rebuild_aggregates(self):
+        """Recompute running totals from scratch (load time only)"""
+        self.total_expenses = 0
+        self.total_budgets = sum(b['amount'] for b in self.budgets if b['status'] == 'active')
+        self.category_totals = {}
+        self.category_counts = {}
+        self.month_totals = {}
+        for expense in self.expenses:
+            self._apply_expense(expense, 1)
+    
+    def _apply_expense(self, expense, sign):
+        """Add (sign=1) or remove (sign=-1) an active expense from the aggregates"""
+        if expense['status'] != 'active':
+            return
+        amount = sign * expense['amount']
+        category = expense['category']
+        month = str(expense.get('date', ''))[:7]
+        self.total_expenses += amount
+        self.month_totals[month] = self.month_totals.get(month, 0) + amount
+        self.category_counts[category] = self.category_counts.get(category, 0) + sign
+        if self.category_counts[category]:
+            self.category_totals[category] = self.category_totals.get(category, 0) + amount
+        else:
+            # Drop emptied categories rather than leave float residue behind
+            del self.category_counts[category]
+            self.category_totals.pop(category, None)
     
     def save_expenses(self):
         """Save expenses to storage"""
@@ -78,15 +120,14 @@ class ExpenseManager:
                 'expenses': self.expenses,
                 'budgets': self.budgets
             }
-            with open(DATA_FILES['expenses'], 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving expenses: {e}")
     
     def add_expense(self, category, amount, description, date, app_source=None):
         """Add a new expense"""
-        expense = {
-            'id': len(self.expenses) + 1,
+        expense = Expense({
+            'id': self.store.next_id('expenses'),
             'category': category,
             'amount': amount,
             'description': description,
@@ -94,41 +135,171 @@ class ExpenseManager:
             'app_source': app_source,
             'created_date': datetime.now().strftime('%Y-%m-%d'),
             'status': 'active'
-        }
+        })
         self.expenses.append(expense)
-        self.save_expenses()
+        self.expenses_by_id[expense['id']] = expense
+        self.store.append('expenses', expense)
+        self._apply_expense(expense, 1)
+        if self.expense_keys is not None:
+            self.expense_keys[self._expense_key(expense)] += 1
         return expense
     
-    def get_expense_summary(self):
-        """Get expense summary"""
-        total_expenses = sum(exp['amount'] for exp in self.expenses if exp['status'] == 'active')
-        total_budgets = sum(budget['amount'] for budget in self.budgets if budget['status'] == 'active')
+    def _expense_key(self, expense):
+        """Identity used to detect re-imported transactions"""
+        if expense.get('external_id'):
+            return ('external_id', expense['external_id'])
+        return (expense['date'], round(expense['amount'], 2), str(expense['description']).strip().lower())
+    
+    def bulk_add_expenses(self, records, app_source=None, seen=None):
+        """Validate, de-duplicate and persist a batch of expenses in a single write.
         
-        # Category breakdown
-        categories = {}
-        for exp in self.expenses:
-            if exp['status'] == 'active':
-                cat = exp['category']
-                categories[cat] = categories.get(cat, 0) + exp['amount']
+        Identical transactions are matched by occurrence: the n-th copy of a
+        transaction in an import is a duplicate only if at least n copies are
+        already stored, so repeat purchases on one day survive while a
+        re-imported file adds nothing. ``seen`` counts copies across the
+        batches of one import.
+        """
+        start = time.perf_counter()
+        if self.expense_keys is None:
+            self.expense_keys = Counter(self._expense_key(e) for e in self.expenses)
+        seen = Counter() if seen is None else seen
+        created_date = datetime.now().strftime('%Y-%m-%d')
+        added = []
+        duplicates = invalid = 0
+        for record in records:
+            date = parse_date(record.get('date'))
+            amount = parse_amount(record.get('amount'))
+            if date is None or amount is None or amount < 0 or not math.isfinite(amount):
+                invalid += 1
+                continue
+            expense = Expense({
+                'category': record.get('category') or 'other',
+                'amount': amount,
+                'description': record.get('description') or '',
+                'date': date,
+                'app_source': record.get('app_source') or app_source,
+                'created_date': created_date,
+                'status': 'active'
+            })
+            if record.get('external_id'):
+                expense['external_id'] = record['external_id']
+            key = self._expense_key(expense)
+            seen[key] += 1
+            if seen[key] <= self.expense_keys[key]:
+                duplicates += 1
+                continue
+            self.expense_keys[key] += 1
+            added.append(expense)
         
+        if added:
+            first_id = self.store.next_id('expenses', len(added))
+            for offset, expense in enumerate(added):
+                expense['id'] = first_id + offset
+                self.expenses_by_id[expense['id']] = expense
+            self.expenses.extend(added)
+            self.store.extend('expenses', added)
+            for expense in added:
+                self._apply_expense(expense, 1)
+        
+        elapsed = time.perf_counter() - start
+        processed = len(added) + duplicates + invalid
         return {
-            'total_expenses': total_expenses,
-            'total_budgets': total_budgets,
-            'remaining_budget': total_budgets - total_expenses,
-            'categories': categories,
+            'added': len(added),
+            'duplicates': duplicates,
+            'invalid': invalid,
+            'seconds': elapsed,
+            'records_per_second': processed / elapsed if elapsed else float(processed)
+        }
+    
+    def import_file(self, path, app_source=None, batch_size=IMPORT_BATCH_SIZE, columns=None, debit_sign='negative'):
+        """Stream a CSV, JSONL or OFX/QFX export into storage one batch at a time"""
+        start = time.perf_counter()
+        totals = {'added': 0, 'duplicates': 0, 'invalid': 0}
+        seen = Counter()
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            for batch in batched(iter_expense_records(path, f, columns, debit_sign), batch_size):
+                result = self.bulk_add_expenses(batch, app_source, seen)
+                for key in totals:
+                    totals[key] += result[key]
+        elapsed = time.perf_counter() - start
+        processed = sum(totals.values())
+        totals['seconds'] = elapsed
+        totals['records_per_second'] = processed / elapsed if elapsed else float(processed)
+        return totals
+    
+    def update_expense_status(self, expense_id, status):
+        """Change an expense's status (e.g. 'active' or 'deleted')"""
+        expense = self.expenses_by_id.get(expense_id)
+        if not expense:
+            return None
+        self._apply_expense(expense, -1)
+        expense['status'] = status
+        self._apply_expense(expense, 1)
+        self.store.update('expenses', expense_id, {'status': status})
+        return expense
+    
+    def add_budget(self, category, amount, period='monthly'):
+        """Add a new budget"""
+        budget = {
+            'id': self.store.next_id('budgets'),
+            'category': category,
+            'amount': amount,
+            'period': period,
+            'created_date': datetime.now().strftime('%Y-%m-%d'),
+            'status': 'active'
+        }
+        self.budgets.append(budget)
+        self.store.append('budgets', budget)
+        self.total_budgets += amount
+        return budget
+    
+    def get_expense(self, expense_id):
+        """Get an expense by id"""
+        return self.expenses_by_id.get(expense_id)
+    
+    def get_expenses(self, category=None, date=None):
+        """Get active expenses, optionally filtered by category and date"""
+        filters = {'status': 'active'}
+        if category is not None:
+            filters['category'] = category
+        if date is not None:
+            filters['date'] = date
+        return self.store.query('expenses', **filters)
+    
+    def get_expense_summary(self):
+        """Get expense summary"""
+        return {
+            'total_expenses': self.total_expenses,
+            'total_budgets': self.total_budgets,
+            'remaining_budget': self.total_budgets - self.total_expenses,
+            'categories': dict(self.category_totals),
             'monthly_trend': self.get_monthly_trend()
         }
     
-    def get_monthly_trend(self):
-        """Get monthly expense trend"""
-        # Mock data for demonstration
+    def get_monthly_trend(self, today=None):
+        """Get monthly expense trend from the per-month buckets"""
+        today = today or datetime.now().date()
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        current_month = self.month_totals.get(today.strftime('%Y-%m'), 0)
+        last_month = self.month_totals.get(last_month_end.strftime('%Y-%m'), 0)
+        change_percent = (current_month - last_month) / last_month * 100 if last_month else 0.0
+        
+        # Project the month-to-date spend across the whole month
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        projected_monthly = current_month / today.day * days_in_month
+        
         return {
-            'current_month': 3200,
-            'last_month': 2800,
-            'change_percent': 14.3,
-            'projected_monthly': 3500
+            'current_month': round(current_month, 2),
+            'last_month': round(last_month, 2),
+            'change_percent': round(change_percent, 1),
+            'projected_monthly': round(projected_monthly, 2)
         }
     
+    def get_analytics(self):
+        """Get a columnar analytics view over the current expenses"""
+        from src.analytics.expenses import ExpenseAnalytics
+        return ExpenseAnalytics.from_manager(self)
+    
     def get_app_info(self, app_key):
         """Get expense app information"""
         return self.expense_apps.get(app_key, {})
@@ -137,10 +308,14 @@ class ExpenseManager:
         """Get list of available expense apps"""
         return list(self.expense_apps.keys())
     
-    def sync_with_app(self, app_key, sync_type='import'):
-        """Sync with external expense app"""
+    def sync_with_app(self, app_key, sync_type='import', path=None):
+        """Sync with external expense app, importing from an export file when given"""
         app_info = self.get_app_info(app_key)
-        if sync_type == 'import':
+        if sync_type == 'import' and path:
+            result = self.import_file(path, app_source=app_key)
+            return (f"Imported {result['added']} expenses from {app_info['name']} "
+                    f"({result['records_per_second']:,.0f} records/sec)")
+        elif sync_type == 'import':
             # Mock import from app
             return f"Imported expenses from {app_info['name']}"
         elif sync_type == 'export':
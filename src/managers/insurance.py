@@ -1,15 +1,15 @@
 """
 Insurance Management System
 """
-import json
-import os
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.storage.backends import open_store
 
 
 class InsuranceManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.policies = []
+        self.policies_by_id = {}
         self.claims = []
         self.insurance_companies = {
             'allstate': {
@@ -57,18 +57,18 @@ class InsuranceManager:
                 'online_portal': True
             }
         }
+        self.store = open_store('insurance', compact=self.save_data, user_id=user_id)
         self.load_data()
     
     def load_data(self):
         """Load insurance data from storage"""
         try:
-            if os.path.exists('insurance_data.json'):
-                with open('insurance_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.policies = data.get('policies', [])
-                    self.claims = data.get('claims', [])
+            data = self.store.load()
+            self.policies = data.setdefault('policies', [])
+            self.claims = data.setdefault('claims', [])
         except Exception as e:
             print(f"Error loading insurance data: {e}")
+        self.policies_by_id = {r['id']: r for r in self.policies}
     
     def save_data(self):
         """Save insurance data to storage"""
@@ -77,15 +77,14 @@ class InsuranceManager:
                 'policies': self.policies,
                 'claims': self.claims
             }
-            with open('insurance_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving insurance data: {e}")
     
     def add_policy(self, policy_type, company, policy_number, premium, coverage_amount):
         """Add a new insurance policy"""
         policy = {
-            'id': len(self.policies) + 1,
+            'id': self.store.next_id('policies'),
             'type': policy_type,
             'company': company,
             'policy_number': policy_number,
@@ -95,12 +94,17 @@ class InsuranceManager:
             'status': 'active'
         }
         self.policies.append(policy)
-        self.save_data()
+        self.policies_by_id[policy['id']] = policy
+        self.store.append('policies', policy)
         return policy
     
+    def get_policy(self, policy_id):
+        """Get a policy by id"""
+        return self.policies_by_id.get(policy_id)
+    
     def get_policies(self):
         """Get all active policies"""
-        return [p for p in self.policies if p['status'] == 'active']
+        return self.store.query('policies', status='active')
     
     def get_company_info(self, company_key):
         """Get insurance company information"""
@@ -1,16 +1,22 @@
 """
 Investment Management System
 """
-import json
-import os
+import math
+import time
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.config.constants import IMPORT_BATCH_SIZE
+from src.managers.records import Investment
+from src.storage.backends import open_store
+from src.utils.importers import parse_date, parse_amount, batched, iter_investment_records
 
 
 class InvestmentManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.investments = []
         self.accounts = []
+        self.investments_by_id = {}
+        self.accounts_by_id = {}
         self.brokers = {
             'charles_schwab': {
                 'name': 'Charles Schwab',
@@ -53,18 +59,19 @@ class InvestmentManager:
                 'commission': 'Low-cost investing'
             }
         }
+        self.store = open_store('investments', compact=self.save_investments, user_id=user_id)
         self.load_investments()
     
     def load_investments(self):
         """Load investments from storage"""
         try:
-            if os.path.exists(DATA_FILES['investments']):
-                with open(DATA_FILES['investments'], 'r') as f:
-                    data = json.load(f)
-                    self.investments = data.get('investments', [])
-                    self.accounts = data.get('accounts', [])
+            data = self.store.load()
+            self.investments = Investment.load(data, 'investments')
+            self.accounts = data.setdefault('accounts', [])
         except Exception as e:
             print(f"Error loading investments: {e}")
+        self.investments_by_id = {i['id']: i for i in self.investments}
+        self.accounts_by_id = {a['id']: a for a in self.accounts}
     
     def save_investments(self):
         """Save investments to storage"""
@@ -73,15 +80,14 @@ class InvestmentManager:
                 'investments': self.investments,
                 'accounts': self.accounts
             }
-            with open(DATA_FILES['investments'], 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving investments: {e}")
     
     def add_investment_account(self, broker, account_name, account_type, balance=0):
         """Add a new investment account"""
         account = {
-            'id': len(self.accounts) + 1,
+            'id': self.store.next_id('accounts'),
             'broker': broker,
             'account_name': account_name,
             'account_type': account_type,
@@ -90,13 +96,14 @@ class InvestmentManager:
             'status': 'active'
         }
         self.accounts.append(account)
-        self.save_investments()
+        self.accounts_by_id[account['id']] = account
+        self.store.append('accounts', account)
         return account
     
     def add_investment(self, symbol, name, shares, price, account_id, investment_type='stock'):
         """Add a new investment"""
-        investment = {
-            'id': len(self.investments) + 1,
+        investment = Investment({
+            'id': self.store.next_id('investments'),
             'symbol': symbol,
             'name': name,
             'shares': shares,
@@ -106,16 +113,89 @@ class InvestmentManager:
             'investment_type': investment_type,
             'purchase_date': datetime.now().strftime('%Y-%m-%d'),
             'status': 'active'
-        }
+        })
         self.investments.append(investment)
-        self.save_investments()
+        self.investments_by_id[investment['id']] = investment
+        self.store.append('investments', investment)
         return investment
     
+    def bulk_add_investments(self, records, account_id=None):
+        """Validate and persist a batch of investment positions in a single write"""
+        start = time.perf_counter()
+        today = datetime.now().strftime('%Y-%m-%d')
+        added = []
+        invalid = 0
+        for record in records:
+            symbol = str(record.get('symbol') or '').strip().upper()
+            shares = parse_amount(record.get('shares'))
+            price = parse_amount(record.get('price'))
+            if not symbol or shares is None or price is None or not math.isfinite(shares * price) or price < 0:
+                invalid += 1
+                continue
+            holding_account = record.get('account_id') or account_id
+            if isinstance(holding_account, str) and holding_account.isdigit():
+                holding_account = int(holding_account)
+            added.append(Investment({
+                'symbol': symbol,
+                'name': record.get('name') or symbol,
+                'shares': shares,
+                'price': price,
+                'current_value': shares * price,
+                'account_id': holding_account,
+                'investment_type': str(record.get('investment_type') or 'stock').lower(),
+                'purchase_date': parse_date(record.get('purchase_date')) or today,
+                'status': 'active'
+            }))
+        
+        if added:
+            first_id = self.store.next_id('investments', len(added))
+            for offset, investment in enumerate(added):
+                investment['id'] = first_id + offset
+                self.investments_by_id[investment['id']] = investment
+            self.investments.extend(added)
+            self.store.extend('investments', added)
+        
+        elapsed = time.perf_counter() - start
+        processed = len(added) + invalid
+        return {
+            'added': len(added),
+            'invalid': invalid,
+            'seconds': elapsed,
+            'records_per_second': processed / elapsed if elapsed else float(processed)
+        }
+    
+    def import_file(self, path, account_id=None, batch_size=IMPORT_BATCH_SIZE, columns=None):
+        """Stream a CSV or JSONL positions export into storage one batch at a time"""
+        start = time.perf_counter()
+        totals = {'added': 0, 'invalid': 0}
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            for batch in batched(iter_investment_records(path, f, columns), batch_size):
+                result = self.bulk_add_investments(batch, account_id)
+                for key in totals:
+                    totals[key] += result[key]
+        elapsed = time.perf_counter() - start
+        processed = sum(totals.values())
+        totals['seconds'] = elapsed
+        totals['records_per_second'] = processed / elapsed if elapsed else float(processed)
+        return totals
+    
+    def get_investment(self, investment_id):
+        """Get an investment by id"""
+        return self.investments_by_id.get(investment_id)
+    
+    def get_account(self, account_id):
+        """Get an investment account by id"""
+        return self.accounts_by_id.get(account_id)
+    
+    def get_account_investments(self, account_id):
+        """Get active investments held in an account"""
+        return self.store.query('investments', account_id=account_id, status='active')
+    
     def get_portfolio_summary(self):
         """Get portfolio summary"""
         total_value = sum(inv['current_value'] for inv in self.investments if inv['status'] == 'active')
-        total_investments = len([inv for inv in self.investments if inv['status'] == 'active'])
-        total_accounts = len([acc for acc in self.accounts if acc['status'] == 'active'])
+        total_investments = self.store.count('investments', status='active')
+        total_accounts = self.store.count('accounts', status='active')
         
         return {
             'total_value': total_value,
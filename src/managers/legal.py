@@ -1,15 +1,15 @@
 """
 Legal Management System
 """
-import json
-import os
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.storage.backends import open_store
 
 
 class LegalManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.legal_cases = []
+        self.legal_cases_by_id = {}
         self.documents = []
         self.appointments = []
         self.law_firms = {
@@ -50,19 +50,19 @@ class LegalManager:
                 'size': 'Large Firm (1500+ lawyers)'
             }
         }
+        self.store = open_store('legal', compact=self.save_data, user_id=user_id)
         self.load_data()
     
     def load_data(self):
         """Load legal data from storage"""
         try:
-            if os.path.exists('legal_data.json'):
-                with open('legal_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.legal_cases = data.get('cases', [])
-                    self.documents = data.get('documents', [])
-                    self.appointments = data.get('appointments', [])
+            data = self.store.load()
+            self.legal_cases = data.setdefault('cases', [])
+            self.documents = data.setdefault('documents', [])
+            self.appointments = data.setdefault('appointments', [])
         except Exception as e:
             print(f"Error loading legal data: {e}")
+        self.legal_cases_by_id = {r['id']: r for r in self.legal_cases}
     
     def save_data(self):
         """Save legal data to storage"""
@@ -72,15 +72,14 @@ class LegalManager:
                 'documents': self.documents,
                 'appointments': self.appointments
             }
-            with open('legal_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving legal data: {e}")
     
     def add_case(self, case_title, case_type, law_firm, description):
         """Add a new legal case"""
         case = {
-            'id': len(self.legal_cases) + 1,
+            'id': self.store.next_id('cases'),
             'title': case_title,
             'type': case_type,
             'law_firm': law_firm,
@@ -90,12 +89,17 @@ class LegalManager:
             'last_updated': datetime.now().strftime('%Y-%m-%d')
         }
         self.legal_cases.append(case)
-        self.save_data()
+        self.legal_cases_by_id[case['id']] = case
+        self.store.append('cases', case)
         return case
     
+    def get_case(self, case_id):
+        """Get a legal case by id"""
+        return self.legal_cases_by_id.get(case_id)
+    
     def get_cases(self):
         """Get all active legal cases"""
-        return [c for c in self.legal_cases if c['status'] == 'active']
+        return self.store.query('cases', status='active')
     
     def get_firm_info(self, firm_key):
         """Get law firm information"""
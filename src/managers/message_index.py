@@ -0,0 +1,87 @@
+"""
+Full-text Message Index
+"""
+import heapq
+import re
+from collections import Counter
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'at', 'be', 'for', 'i', 'in', 'is', 'it', 'me', 'my',
+    'of', 'on', 'or', 'the', 'to', 'you', 'your'
+])
+
+
+def tokenize(text):
+    """Lower-case word tokens of ``text`` without stop words"""
+    return [token for token in TOKEN.findall(str(text or '').lower()) if token not in STOP_WORDS]
+
+
+class MessageIndex:
+    """Inverted index from token to the messages containing it.
+
+    Postings are ``token -> channel -> {seq: term frequency}``. Messages are
+    keyed by channel and seq rather than id so a hit in sealed history can be
+    read straight from the segment whose seq range covers it. Each sealed
+    segment's postings are written once to an ``index`` sidecar; they are
+    loaded the first time a search needs them, so startup only indexes the
+    recent window.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.postings = {}
+        self.loaded_segments = set()
+
+    def add(self, channel, seq, text):
+        """Index one message; re-adding the same message is harmless"""
+        for token, count in Counter(tokenize(text)).items():
+            self.postings.setdefault(token, {}).setdefault(channel, {})[seq] = count
+
+    def add_segment(self, channel, segment, records=None):
+        """Index a sealed segment from its sidecar, building the sidecar if it is missing"""
+        if segment['file'] in self.loaded_segments:
+            return
+        postings = self.archive.read_sidecar(segment, 'index')
+        if postings is None:
+            postings = {}
+            for record in records if records is not None else self.archive.read(segment):
+                for token, count in Counter(tokenize(record.get('message'))).items():
+                    postings.setdefault(token, {})[str(record['seq'])] = count
+            self.archive.write_sidecar(segment, 'index', postings)
+        for token, hits in postings.items():
+            channel_hits = self.postings.setdefault(token, {}).setdefault(channel, {})
+            for seq, count in hits.items():
+                channel_hits[int(seq)] = count
+        self.loaded_segments.add(segment['file'])
+
+    def load_archive(self):
+        """Index every sealed segment not loaded yet"""
+        for channel in self.archive.manifest:
+            for segment in self.archive.segments(channel):
+                self.add_segment(channel, segment)
+
+    def search(self, query, channel=None, limit=20):
+        """(channel, seq, score) for messages containing every query token, best first.
+
+        Score is the summed term frequency; ties go to the newest message.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        self.load_archive()
+        channels = [channel] if channel is not None else list(self.postings.get(next(iter(tokens)), {}))
+        scored = []
+        for name in channels:
+            lists = [self.postings.get(token, {}).get(name, {}) for token in tokens]
+            lists.sort(key=len)
+            for seq, count in lists[0].items():
+                score = count
+                for hits in lists[1:]:
+                    if seq not in hits:
+                        break
+                    score += hits[seq]
+                else:
+                    scored.append((score, seq, name))
+        return [(name, seq, score) for score, seq, name in heapq.nlargest(limit, scored)]
@@ -1,18 +1,67 @@
 """
 Messaging System for Concierge Communication
 """
-import json
-import uuid
 import os
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.config.constants import (
+    DATA_FILES, MESSAGE_STORAGE_VERSION, MESSAGE_ARCHIVE_DIR, MESSAGE_PAGE_SIZE, MESSAGE_RECENT_WINDOW,
+    MESSAGE_SEGMENT_SIZE, MESSAGE_FLUSH_INTERVAL, MESSAGE_QUEUE_SIZE, MESSAGE_SEQ_BLOCK, MESSAGE_SEARCH_LIMIT
+)
+from src.managers.message_index import MessageIndex
+from src.managers.records import Message
+from src.storage.backends import open_store, user_directory, user_partition
+from src.storage.segments import SegmentArchive
+from src.storage.write_behind import WriteBehindStore
+from src.utils.pubsub import get_broker
+
+
+def message_topic(channel, user_id=None):
+    """Pub/sub topic new messages on ``user_id``'s ``channel`` are published to"""
+    if user_id is None:
+        return f'messages:{channel}'
+    return f'messages:{user_partition(user_id)}:{channel}'
+
+
+def _thread_key(message):
+    return message['seq'], message['id']
+
+
+def _cursor_key(field):
+    if field == 'timestamp':
+        return lambda message: message['timestamp'].isoformat()
+    return lambda message: message['seq']
 
 
 class MessagingSystem:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.messages = []
         self.conversations = {}
+        self.messages_by_id = {}
+        # Unread counters (channel -> recipient -> count) kept in step with every change
+        self.unread_counts = {}
+        self.unread_totals = {}
+        self.unread_messages = {}  # channel -> {id: message} for unread messages in the recent window
+        self.read_through = {}  # channel -> seq up to which mark_read cleared the whole channel
         self.storage_file = DATA_FILES['chat_history']
+        # A client's history, archive and live feed are kept apart from every other client's
+        self.archive_dir = MESSAGE_ARCHIVE_DIR
+        if user_id is not None:
+            self.archive_dir = os.path.join(user_directory(user_id), MESSAGE_ARCHIVE_DIR)
+        self.archive = SegmentArchive(self.archive_dir)
+        self.search_index = MessageIndex(self.archive)
+        self.broker = get_broker()
+        self.lock = threading.RLock()
+        self.next_seq = self.last_seq = 0  # locally reserved block of message sequence numbers
+        self.seq_synced = 0  # store.foreign_writes when the block was reserved
+        # Sending a message only queues its journal entry; a background thread writes bursts at once
+        self.store = WriteBehindStore(
+            open_store('chat_history', compact=self.save_messages, user_id=user_id),
+            interval=MESSAGE_FLUSH_INTERVAL, maxsize=MESSAGE_QUEUE_SIZE
+        )
         self.load_messages()
         self.ai_responses = {
             'expense': [
@@ -59,79 +108,332 @@ class MessagingSystem:
         }
     
     def load_messages(self):
-        """Load messages from persistent storage"""
+        """Load the recent message window from persistent storage.
+
+        Older history lives in sealed archive segments and is only read when
+        ``get_messages`` pages back past the window.
+        """
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    # Convert timestamp strings back to datetime objects
-                    for message in data.get('messages', []):
-                        if isinstance(message.get('timestamp'), str):
-                            message['timestamp'] = datetime.fromisoformat(message['timestamp'])
-                    self.messages = data.get('messages', [])
-                    self.conversations = data.get('conversations', {})
-            else:
-                self.messages = []
-                self.conversations = {}
+            data = self.store.load()
+            self.messages = Message.load(data, 'messages')
+            self.archive = SegmentArchive(self.archive_dir)
+            self.search_index = MessageIndex(self.archive)
+            # Version 1 files also serialised every message a second time under 'conversations'
+            migrate = bool(self.messages) and data.get('version', 1) < MESSAGE_STORAGE_VERSION
+            data.pop('conversations', None)
+            if any('seq' not in message for message in self.messages):
+                # History from before pagination: number it in its stored order
+                first = self.store.next_id('messages', len(self.messages), field='seq')
+                for offset, message in enumerate(self.messages):
+                    message['seq'] = first + offset
+            # Skip anything an interrupted compaction already sealed into a segment. Only
+            # messages found in a segment are dropped: one another process journaled late
+            # can sit below a channel's last sealed seq without having been sealed
+            candidates = {}
+            for message in self.messages:
+                channel = message.get('channel', 'concierge')
+                if message['seq'] <= self.archive.last_seq(channel):
+                    candidates.setdefault(channel, []).append(message)
+            sealed = set()
+            for channel, messages in candidates.items():
+                archived = self.archive.by_seq(channel, [m['seq'] for m in messages])
+                sealed.update(m['id'] for m in messages if archived.get(m['seq'], {}).get('id') == m['id'])
+            if sealed:
+                self.messages[:] = [m for m in self.messages if m['id'] not in sealed]
+            # Journal order follows write order, which differs from seq order once
+            # several processes share the history
+            self.messages.sort(key=_thread_key)
+            for message in self.messages:
+                # Convert timestamp strings back to datetime objects
+                if isinstance(message.get('timestamp'), str):
+                    message['timestamp'] = datetime.fromisoformat(message['timestamp'])
+            self.messages_by_id = {m['id']: m for m in self.messages}
+            for message in self.messages:
+                self.search_index.add(message.get('channel', 'concierge'), message['seq'], message.get('message'))
+            # Threads reference messages by id; journaled messages are not listed yet
+            self.conversations = {}
+            threaded = set()
+            for channel, message_ids in data.get('channels', {}).items():
+                thread = [self.messages_by_id[i] for i in message_ids if i in self.messages_by_id]
+                self.conversations[channel] = thread
+                threaded.update(message_ids)
+            for message in self.messages:
+                if message['id'] not in threaded:
+                    self.conversations.setdefault(message.get('channel', 'concierge'), []).append(message)
+            for thread in self.conversations.values():
+                thread.sort(key=_thread_key)
+            self.load_unread(data.get('unread'))
+            if migrate:
+                self.save_messages()
         except Exception as e:
             print(f"Error loading messages: {e}")
             self.messages = []
             self.conversations = {}
+            self.messages_by_id = {}
+    
+    def load_unread(self, state):
+        """Restore persisted unread counters and count messages journaled after they were saved"""
+        self.unread_counts = {}
+        self.unread_totals = {}
+        self.unread_messages = {}
+        self.read_through = dict((state or {}).get('read_through', {}))
+        if state is None:
+            # Counters were never saved: count the archived history once
+            counted_seq = 0
+            for channel in self.archive.manifest:
+                for segment in self.archive.segments(channel):
+                    for record in self.archive.read(segment):
+                        if not record.get('read', False):
+                            self._count_unread(channel, record.get('recipient'), 1)
+        else:
+            counted_seq = state['seq']
+            for channel, recipients in state['counts'].items():
+                for recipient, count in recipients.items():
+                    self._count_unread(channel, recipient, count)
+        for message in self.messages:
+            if not message.get('read', False):
+                channel = message.get('channel', 'concierge')
+                self.unread_messages.setdefault(channel, {})[message['id']] = message
+                if message['seq'] > counted_seq:
+                    self._count_unread(channel, message.get('recipient'), 1)
+    
+    def _count_unread(self, channel, recipient, delta):
+        recipients = self.unread_counts.setdefault(channel, {})
+        recipients[recipient] = recipients.get(recipient, 0) + delta
+        if not recipients[recipient]:
+            del recipients[recipient]
+        self.unread_totals[channel] = self.unread_totals.get(channel, 0) + delta
+    
+    def _unread_state(self):
+        return {
+            'seq': self.messages[-1]['seq'] if self.messages else 0,
+            'counts': {channel: dict(recipients) for channel, recipients in self.unread_counts.items()},
+            'read_through': dict(self.read_through)
+        }
+    
+    def _next_seq(self):
+        # Reserve sequence numbers in blocks so sending a message does not touch the id
+        # sidecar. The writer reads what other processes journaled under the journal's
+        # file lock; once they have written since the block was reserved, the rest of it
+        # is dropped so seq keeps growing along a thread rather than interleaving blocks
+        if not self.next_seq or self.next_seq > self.last_seq or self.store.foreign_writes != self.seq_synced:
+            self.seq_synced = self.store.foreign_writes
+            self.next_seq = self.store.next_id('messages', count=MESSAGE_SEQ_BLOCK, field='seq')
+            self.last_seq = self.next_seq + MESSAGE_SEQ_BLOCK - 1
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
     
     def save_messages(self):
-        """Save messages to persistent storage"""
-        try:
-            # Convert datetime objects to strings for JSON serialization
-            messages_to_save = []
-            for message in self.messages:
-                message_copy = message.copy()
-                if isinstance(message_copy.get('timestamp'), datetime):
-                    message_copy['timestamp'] = message_copy['timestamp'].isoformat()
-                messages_to_save.append(message_copy)
-            
-            data = {
-                'messages': messages_to_save,
-                'conversations': self.conversations
-            }
+        """Save messages to persistent storage, sealing old history into segments"""
+        with self.lock:
+            try:
+                self.store.flush()
+                if self.store.is_stale():
+                    # Seal from the whole history, including what other processes sent
+                    self.load_messages()
+                self.seal_segments()
+                # Each message is written once; threads only list ids (the store encodes datetimes)
+                data = {
+                    'version': MESSAGE_STORAGE_VERSION,
+                    'messages': self.messages,
+                    'channels': {
+                        channel: [message['id'] for message in thread]
+                        for channel, thread in self.conversations.items()
+                    },
+                    'unread': self._unread_state()
+                }
             
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving messages: {e}")
+                self.store.save(data)
+            except Exception as e:
+                print(f"Error saving messages: {e}")
+    
+    def flush(self):
+        """Block until every queued message write is on disk"""
+        self.store.flush()
+    
+    def seal_segments(self):
+        """Move all but the newest MESSAGE_RECENT_WINDOW messages per channel into segments"""
+        sealed = set()
+        for channel, thread in self.conversations.items():
+            while len(thread) - MESSAGE_RECENT_WINDOW >= MESSAGE_SEGMENT_SIZE:
+                segment = thread[:MESSAGE_SEGMENT_SIZE]
+                self.archive.seal(channel, segment)
+                self.search_index.add_segment(channel, self.archive.segments(channel)[-1], segment)
+                del thread[:MESSAGE_SEGMENT_SIZE]
+                sealed.update(message['id'] for message in segment)
+                for message in segment:
+                    self.unread_messages.get(channel, {}).pop(message['id'], None)
+        if sealed:
+            self.messages[:] = [m for m in self.messages if m['id'] not in sealed]
+            for message_id in sealed:
+                self.messages_by_id.pop(message_id, None)
     
     def add_message(self, sender, recipient, message, message_type="user", channel="concierge"):
         """Add a new message to the system"""
-        message_id = str(uuid.uuid4())
-        new_message = {
-            'id': message_id,
-            'sender': sender,
-            'recipient': recipient,
-            'message': message,
-            'timestamp': datetime.now(),
-            'message_type': message_type,  # 'user', 'concierge', 'ai_agent'
-            'channel': channel,  # 'concierge', 'ai_agent', 'support'
-            'read': False
-        }
-        self.messages.append(new_message)
+        with self.lock:
+            message_id = str(uuid.uuid4())
+            new_message = Message({
+                'id': message_id,
+                'seq': self._next_seq(),
+                'sender': sender,
+                'recipient': recipient,
+                'message': message,
+                'timestamp': datetime.now(),
+                'message_type': message_type,  # 'user', 'concierge', 'ai_agent'
+                'channel': channel,  # 'concierge', 'ai_agent', 'support'
+                'read': False
+            })
+            self.messages.append(new_message)
+            self.messages_by_id[message_id] = new_message
         
-        # Add to conversation thread
-        if channel not in self.conversations:
-            self.conversations[channel] = []
-        self.conversations[channel].append(new_message)
+            # Add to conversation thread
+            if channel not in self.conversations:
+                self.conversations[channel] = []
+            self.conversations[channel].append(new_message)
+            self.unread_messages.setdefault(channel, {})[message_id] = new_message
+            self._count_unread(channel, recipient, 1)
+            self.search_index.add(channel, new_message['seq'], message)
         
-        # Save messages to persistent storage
-        self.save_messages()
+            # Journal the message to persistent storage
+            self.store.append('messages', new_message)
         
+        # Push the message to live subscribers outside the lock
+        self.broker.publish(message_topic(channel, self.user_id), dict(new_message))
         return message_id
     
-    def get_messages(self, channel="concierge", limit=50):
-        """Get messages for a specific channel"""
-        if channel not in self.conversations:
-            return []
-        return self.conversations[channel][-limit:]
-    
-    def get_unread_count(self, channel="concierge"):
-        """Get count of unread messages"""
-        if channel not in self.conversations:
-            return 0
-        return sum(1 for msg in self.conversations[channel] if not msg.get('read', False))
+    def get_message(self, message_id, channel=None):
+        """Get a message by id, looking in the archive if it is not in the recent window"""
+        message = self.messages_by_id.get(message_id)
+        if message is None:
+            for archived_channel in ([channel] if channel else list(self.archive.manifest)):
+                archived = self.archive.find(archived_channel, message_id)
+                if archived is not None:
+                    return self._from_archive([archived])[0]
+        return message
+    
+    def subscribe(self, channels):
+        """Subscribe to new messages on ``channels``; read them with ``drain`` or ``get``"""
+        return self.broker.subscribe(*[message_topic(channel, self.user_id) for channel in channels])
+    
+    def search(self, query, channel=None, limit=MESSAGE_SEARCH_LIMIT):
+        """Find messages containing every word of ``query``, best match first.
+        
+        Matches are ranked by how often the query words occur, newest first
+        on ties. Sealed history is searched through its segment indexes and
+        only the segments holding a match are read.
+        """
+        with self.lock:
+            hits = self.search_index.search(query, channel, limit)
+            found = {(hit_channel, seq): self._recent(hit_channel, seq) for hit_channel, seq, _ in hits}
+            archived = {}
+            for (hit_channel, seq), message in found.items():
+                if message is None:
+                    archived.setdefault(hit_channel, []).append(seq)
+            for hit_channel, seqs in archived.items():
+                records = self.archive.by_seq(hit_channel, seqs)
+                for seq, record in records.items():
+                    found[(hit_channel, seq)] = self._from_archive([record])[0]
+            return [found[(hit_channel, seq)] for hit_channel, seq, _ in hits if found[(hit_channel, seq)]]
+    
+    def _recent(self, channel, seq):
+        thread = self.conversations.get(channel, [])
+        position = bisect_left(thread, seq, key=_cursor_key('seq'))
+        if position < len(thread) and thread[position]['seq'] == seq:
+            return thread[position]
+        return None
+    
+    def _from_archive(self, records):
+        for record in records:
+            if isinstance(record.get('timestamp'), str):
+                record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            # Segments are immutable; bulk mark_read is applied as a seq watermark
+            if record['seq'] <= self.read_through.get(record.get('channel', 'concierge'), 0):
+                record['read'] = True
+        return records
+    
+    def _cursor(self, channel, cursor):
+        """Resolve a seq, message id or datetime cursor to a (field, bound) pair"""
+        if isinstance(cursor, datetime):
+            return 'timestamp', cursor.isoformat()
+        if isinstance(cursor, int):
+            return 'seq', cursor
+        message = self.get_message(cursor, channel)
+        if message is None:
+            return None
+        return 'seq', message['seq']
+    
+    def get_messages(self, channel="concierge", limit=MESSAGE_PAGE_SIZE, before=None, after=None):
+        """Get a page of a channel's messages, oldest first.
+        
+        Without a cursor the newest ``limit`` messages are returned. ``before``
+        and ``after`` take a seq, a message id or a datetime and page backwards
+        or forwards from it, reading sealed segments once the page reaches past
+        the in-memory window. Page by seq where it is known: an id that has
+        left the recent window is looked up by scanning its channel's segments.
+        """
+        with self.lock:
+            thread = self.conversations.get(channel, [])
+            if after is not None:
+                cursor = self._cursor(channel, after)
+                if cursor is None:
+                    return []
+                field, bound = cursor
+                key = _cursor_key(field)
+                page = []
+                if not thread or bound < key(thread[0]):
+                    page = self._from_archive(self.archive.after(channel, field, bound, limit))
+                page += thread[bisect_right(thread, bound, key=key):]
+                return page[:limit]
+        
+            field, bound = 'seq', float('inf')
+            if before is not None:
+                cursor = self._cursor(channel, before)
+                if cursor is None:
+                    return []
+                field, bound = cursor
+            page = thread[:bisect_left(thread, bound, key=_cursor_key(field))][-limit:]
+            if len(page) < limit:
+                if page:
+                    field, bound = 'seq', page[0]['seq']
+                page = self._from_archive(self.archive.before(channel, field, bound, limit - len(page))) + page
+            return page
+    
+    def get_unread_count(self, channel="concierge", recipient=None):
+        """Get count of unread messages, optionally only those sent to ``recipient``"""
+        if recipient is not None:
+            return self.unread_counts.get(channel, {}).get(recipient, 0)
+        return self.unread_totals.get(channel, 0)
+    
+    def get_unread_counts(self):
+        """Get unread message counts for every channel"""
+        return {channel: count for channel, count in self.unread_totals.items() if count}
+    
+    def mark_read(self, channel="concierge", message_ids=None):
+        """Mark messages in a channel as read and return how many were marked.
+        
+        Without ``message_ids`` the whole channel is cleared, including
+        archived history; ids outside the recent window are only covered by
+        that form.
+        """
+        with self.lock:
+            unread = self.unread_messages.get(channel, {})
+            if message_ids is None:
+                targets = list(unread.values())
+            else:
+                targets = [unread[message_id] for message_id in dict.fromkeys(message_ids) if message_id in unread]
+            marked = len(targets)
+            for message in targets:
+                message['read'] = True
+                del unread[message['id']]
+                self._count_unread(channel, message.get('recipient'), -1)
+            if message_ids is None and self.unread_totals.get(channel):
+                # Whatever is left unread lives in sealed segments
+                marked += self.unread_totals.pop(channel)
+                self.unread_counts.pop(channel, None)
+                thread = self.conversations.get(channel)
+                self.read_through[channel] = thread[-1]['seq'] if thread else self.archive.last_seq(channel)
+            if marked:
+                self.store.update_many('messages', {message['id']: {'read': True} for message in targets})
+                self.store.set('unread', self._unread_state())
+            return marked
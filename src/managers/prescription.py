@@ -1,17 +1,25 @@
 """
 Prescription Management System
 """
-import json
 import uuid
-import os
 from datetime import datetime, timedelta
-from src.config.constants import DATA_FILES
+from src.config.constants import REFILL_REMINDER_DAYS, REFILL_URGENT_DAYS
+from src.managers.records import Prescription
+from src.managers.refill_scheduler import RefillScheduler
+from src.storage.backends import open_store
 
 
 class PrescriptionManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.prescriptions = []
+        self.prescriptions_by_id = {}
+        # Secondary indexes: pharmacy/doctor -> {prescription id: prescription}
+        self.prescriptions_by_pharmacy = {}
+        self.prescriptions_by_doctor = {}
         self.refill_reminders = []
+        self.refills_by_pharmacy = {}
+        self.refill_scheduler = RefillScheduler()
         self.pharmacies = {
             'cvs': {'name': 'CVS Pharmacy', 'phone': '(555) 123-4567', 'address': '123 Main St', 'type': 'traditional'},
             'walgreens': {'name': 'Walgreens', 'phone': '(555) 234-5678', 'address': '456 Oak Ave', 'type': 'traditional'},
@@ -19,18 +27,45 @@ class PrescriptionManager:
             'local': {'name': 'Local Pharmacy', 'phone': '(555) 456-7890', 'address': '321 Elm St', 'type': 'traditional'},
             'fullscript': {'name': 'Fullscript', 'phone': '(555) 567-8901', 'address': 'Online Platform', 'type': 'supplement', 'website': 'https://fullscript.com', 'app_available': True}
         }
+        self.store = open_store('prescriptions', compact=self.save_prescriptions, user_id=user_id)
         self.load_prescriptions()
     
     def load_prescriptions(self):
         """Load prescriptions from storage"""
         try:
-            if os.path.exists(DATA_FILES['prescriptions']):
-                with open(DATA_FILES['prescriptions'], 'r') as f:
-                    data = json.load(f)
-                    self.prescriptions = data.get('prescriptions', [])
-                    self.refill_reminders = data.get('refill_reminders', [])
+            data = self.store.load()
+            self.prescriptions = Prescription.load(data, 'prescriptions')
+            self.refill_reminders = data.setdefault('refill_reminders', [])
         except Exception as e:
             print(f"Error loading prescriptions: {e}")
+        self.rebuild_indexes()
+    
+    def rebuild_indexes(self):
+        """Rebuild the id, pharmacy and doctor indexes and the refill schedule"""
+        self.refill_scheduler = RefillScheduler()
+        self.prescriptions_by_id = {}
+        self.prescriptions_by_pharmacy = {}
+        self.prescriptions_by_doctor = {}
+        self.refills_by_pharmacy = {}
+        for prescription in self.prescriptions:
+            self._index_prescription(prescription)
+        for refill_request in self.refill_reminders:
+            self.refills_by_pharmacy.setdefault(refill_request.get('pharmacy'), {})[refill_request['id']] = refill_request
+    
+    def _index_prescription(self, prescription):
+        prescription_id = prescription['id']
+        self.prescriptions_by_id[prescription_id] = prescription
+        self.prescriptions_by_pharmacy.setdefault(prescription['pharmacy'], {})[prescription_id] = prescription
+        self.prescriptions_by_doctor.setdefault(prescription['doctor'], {})[prescription_id] = prescription
+        self.refill_scheduler.schedule(prescription)
+    
+    def _unindex_prescription(self, prescription):
+        for index, key in ((self.prescriptions_by_pharmacy, prescription['pharmacy']),
+                           (self.prescriptions_by_doctor, prescription['doctor'])):
+            bucket = index.get(key, {})
+            bucket.pop(prescription['id'], None)
+            if not bucket:
+                index.pop(key, None)
     
     def save_prescriptions(self):
         """Save prescriptions to storage"""
@@ -39,14 +74,13 @@ class PrescriptionManager:
                 'prescriptions': self.prescriptions,
                 'refill_reminders': self.refill_reminders
             }
-            with open(DATA_FILES['prescriptions'], 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving prescriptions: {e}")
     
     def add_prescription(self, name, dosage, frequency, quantity, refill_date, pharmacy, doctor):
         """Add a new prescription"""
-        prescription = {
+        prescription = Prescription({
             'id': str(uuid.uuid4()),
             'name': name,
             'dosage': dosage,
@@ -59,34 +93,89 @@ class PrescriptionManager:
             'refills_remaining': 3,
             'last_refill': None,
             'next_refill_due': refill_date
-        }
+        })
         self.prescriptions.append(prescription)
-        self.save_prescriptions()
+        self._index_prescription(prescription)
+        self.store.append('prescriptions', prescription)
         return prescription['id']
     
+    def get_prescription(self, prescription_id):
+        """Get a prescription by id"""
+        return self.prescriptions_by_id.get(prescription_id)
+    
     def get_prescriptions(self):
         """Get all active prescriptions"""
-        return [p for p in self.prescriptions if p['status'] == 'active']
+        return self.store.query('prescriptions', status='active')
+    
+    def get_pharmacy_prescriptions(self, pharmacy):
+        """Get active prescriptions filled at a pharmacy"""
+        return [p for p in self.prescriptions_by_pharmacy.get(pharmacy, {}).values() if p['status'] == 'active']
+    
+    def get_doctor_prescriptions(self, doctor):
+        """Get active prescriptions written by a doctor"""
+        return [p for p in self.prescriptions_by_doctor.get(doctor, {}).values() if p['status'] == 'active']
     
-    def get_refill_reminders(self):
-        """Get prescriptions due for refill"""
-        today = datetime.now().date()
+    def get_pharmacy_refill_requests(self, pharmacy, status='pending'):
+        """Get refill requests routed to a pharmacy"""
+        return [r for r in self.refills_by_pharmacy.get(pharmacy, {}).values() if r['status'] == status]
+    
+    def transfer_prescription(self, prescription_id, pharmacy):
+        """Move a prescription to a different pharmacy"""
+        prescription = self.prescriptions_by_id.get(prescription_id)
+        if not prescription:
+            return None
+        self._unindex_prescription(prescription)
+        prescription['pharmacy'] = pharmacy
+        self._index_prescription(prescription)
+        self.store.update('prescriptions', prescription_id, {'pharmacy': pharmacy})
+        return prescription
+    
+    def get_refill_reminders(self, days=REFILL_REMINDER_DAYS, today=None):
+        """Get prescriptions due for refill within ``days``, soonest first"""
+        today = today or datetime.now().date()
         reminders = []
-        for prescription in self.prescriptions:
-            if prescription['status'] == 'active':
-                refill_date = datetime.strptime(prescription['next_refill_due'], '%Y-%m-%d').date()
-                days_until = (refill_date - today).days
-                if days_until <= 7:  # Due within 7 days
-                    reminders.append({
-                        'prescription': prescription,
-                        'days_until': days_until,
-                        'urgent': days_until <= 2
-                    })
+        for prescription_id, refill_date in self.refill_scheduler.due_within(days, today):
+            days_until = (refill_date - today).days
+            reminders.append({
+                'prescription': self.prescriptions_by_id[prescription_id],
+                'days_until': days_until,
+                'urgent': days_until <= REFILL_URGENT_DAYS
+            })
         return reminders
     
+    def get_unsent_refill_reminders(self, days=REFILL_REMINDER_DAYS, today=None):
+        """Get the due refills the client has not been messaged about yet"""
+        return [
+            reminder for reminder in self.get_refill_reminders(days, today)
+            if reminder['prescription'].get('reminded_for') != reminder['prescription']['next_refill_due']
+        ]
+    
+    def send_refill_reminders(self, messaging_system, days=REFILL_REMINDER_DAYS, today=None):
+        """Message the client about due refills, once per prescription and due date"""
+        sent = 0
+        for reminder in self.get_unsent_refill_reminders(days, today):
+            prescription = reminder['prescription']
+            due = prescription['next_refill_due']
+            pharmacy = self.pharmacies.get(prescription['pharmacy'], {}).get('name', prescription['pharmacy'])
+            if reminder['days_until'] < 0:
+                when = f"was due on {due}"
+            elif reminder['days_until'] == 0:
+                when = "is due today"
+            else:
+                when = f"is due in {reminder['days_until']} days"
+            messaging_system.add_message(
+                'concierge', self.user_id or 'user',
+                f"Refill reminder: {prescription['name']} ({prescription['dosage']}) {when} at {pharmacy}.",
+                message_type='concierge', channel='concierge'
+            )
+            prescription['reminded_for'] = due
+            self.store.update('prescriptions', prescription['id'], {'reminded_for': due})
+            sent += 1
+        return sent
+    
     def request_refill(self, prescription_id, pharmacy_preference=None):
         """Request a prescription refill"""
-        prescription = next((p for p in self.prescriptions if p['id'] == prescription_id), None)
+        prescription = self.prescriptions_by_id.get(prescription_id)
         if not prescription:
             return None
         
@@ -104,6 +193,7 @@ class PrescriptionManager:
         }
         
         self.refill_reminders.append(refill_request)
-        self.save_prescriptions()
+        self.refills_by_pharmacy.setdefault(target_pharmacy, {})[refill_request['id']] = refill_request
+        self.store.append('refill_reminders', refill_request)
         
         return refill_request
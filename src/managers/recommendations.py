@@ -0,0 +1,69 @@
+"""
+AI Recommendation Templates
+"""
+from string import Template
+from src.config.constants import AI_RECOMMENDATION_TEMPLATES
+
+
+def _top_category(expense_manager):
+    totals = expense_manager.category_totals
+    return max(totals, key=totals.get) if totals else None
+
+
+# Template field -> (manager name, function reading the value from that manager)
+CONTEXT_FIELDS = {
+    'expense_total': ('expense', lambda manager: f"{manager.total_expenses:,.2f}"),
+    'top_category': ('expense', _top_category),
+    'active_prescriptions': ('prescription', lambda manager: len(manager.get_prescriptions())),
+    'refills_due': ('prescription', lambda manager: len(manager.get_refill_reminders())),
+    'unread_messages': ('messaging', lambda manager: sum(manager.get_unread_counts().values()))
+}
+
+
+class RecommendationEngine:
+    """Renders recommendation templates compiled once per engine.
+
+    Each service type's templates are parsed into ``string.Template``
+    objects up front, together with the fields they reference. Rendered
+    lists are cached per (plan, service type) and reused until the manager
+    data behind those fields changes.
+    """
+
+    def __init__(self, templates=AI_RECOMMENDATION_TEMPLATES):
+        self.templates = {}
+        self.fields = {}
+        for service_type, texts in templates.items():
+            compiled = [Template(text) for text in texts]
+            self.templates[service_type] = [(t, frozenset(t.get_identifiers())) for t in compiled]
+            self.fields[service_type] = frozenset().union(*(ids for _, ids in self.templates[service_type])) - {'plan'}
+        self.cache = {}  # (plan, service type) -> (context key, rendered recommendations)
+
+    def context(self, service_type, get_manager):
+        """Read the fields a service type's templates use from the managers"""
+        values = {}
+        for field in sorted(self.fields.get(service_type, ())):
+            manager_name, read = CONTEXT_FIELDS[field]
+            try:
+                value = read(get_manager(manager_name))
+            except Exception as e:
+                print(f"Error reading {field} for recommendations: {e}")
+                continue
+            if value is not None:
+                values[field] = value
+        return values
+
+    def render(self, plan, service_type, context=None):
+        """Recommendations for a plan and service type, filled in from ``context``"""
+        fields = self.fields.get(service_type, frozenset())
+        values = {field: value for field, value in (context or {}).items() if field in fields}
+        key = tuple(sorted(values.items()))
+        cached = self.cache.get((plan, service_type))
+        if cached is None or cached[0] != key:
+            values['plan'] = plan
+            rendered = [
+                template.substitute(values)
+                for template, identifiers in self.templates.get(service_type, [])
+                if identifiers <= values.keys()
+            ]
+            cached = self.cache[(plan, service_type)] = (key, rendered)
+        return list(cached[1])
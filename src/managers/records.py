@@ -0,0 +1,252 @@
+"""
+Compact record types for the high-volume manager collections
+"""
+import gc
+import sys
+from collections.abc import Mapping, MutableMapping
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Optional
+from src.storage.binary_snapshot import LazyRecords
+
+MAX_BUILDERS = 32
+
+
+class Record(MutableMapping):
+    """Dict-like record whose known fields are stored in slots.
+
+    Managers, stores and the UI keep using records as dicts
+    (``record['amount']``, ``get``, ``update``, ``dict(record)``), but a
+    slotted instance takes a fraction of the memory of a dict with the same
+    keys. Keys outside ``FIELDS`` go to a per-record ``extra`` dict and
+    fields that were never set read as missing, so ``to_dict`` returns
+    exactly the mapping the record was built from and JSON round trips are
+    lossless. String values of the ``INTERNED`` fields repeat across
+    records and are shared rather than stored once per record.
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    FIELD_SET = frozenset()
+    INTERNED = frozenset()
+    _builders = {}  # key layout -> from_decoded builder, one dict per record type
+
+    def __init__(self, data=(), **values):
+        self._extra = None
+        if values:
+            data = {**dict(data), **values}
+        field_set, interned = self.FIELD_SET, self.INTERNED
+        # Inlined __setitem__: this runs once per record on every load
+        for key, value in (data.items() if isinstance(data, Mapping) else data):
+            if key in field_set:
+                if key in interned and type(value) is str:
+                    value = sys.intern(value)
+                setattr(self, key, value)
+            else:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[key] = value
+
+    @classmethod
+    def load(cls, data, key):
+        """Replace the ``key`` list of a loaded store dict with records of this type and return it.
+
+        Records mapped from a binary snapshot are converted as their chunk is
+        decoded, so startup still only decodes what the manager touches.
+        """
+        records = data.get(key)
+        if isinstance(records, LazyRecords):
+            records.convert_records(cls.from_decoded)
+            return records
+        # Records hold no reference cycles; pausing the collector keeps it from
+        # rescanning the growing list on every allocation burst
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            records = data[key] = [cls(record) for record in data.get(key, ())]
+        finally:
+            if enabled:
+                gc.enable()
+        return records
+
+    @classmethod
+    def from_decoded(cls, data):
+        """Build a record from a dict decoded from a binary snapshot.
+
+        Snapshot records share a handful of key layouts, so each layout gets
+        a compiled builder that assigns its fields directly instead of
+        looping over the keys; layouts past ``MAX_BUILDERS`` go through
+        ``__init__``. Strings are not interned again: snapshots store them
+        interned, so decoding already shares them.
+        """
+        keys = tuple(data)
+        build = cls._builders.get(keys)
+        if build is None:
+            if len(cls._builders) >= MAX_BUILDERS:
+                return cls(data)
+            build = cls._builders[keys] = _compile_builder(cls, keys)
+        return build(data)
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELD_SET:
+            if key in self.INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for key in self.FIELDS if hasattr(self, key)) + len(self._extra or ())
+
+    def __contains__(self, key):
+        if key in self.FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        if key in self.FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def to_dict(self):
+        """The record as a plain dict, e.g. for JSON encoding"""
+        data = {}
+        for key in self.FIELDS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def copy(self):
+        return type(self)(self.to_dict())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _compile_builder(cls, keys):
+    """Compile a function building a ``cls`` record from dicts whose keys are ``keys``, in order"""
+    lines = ['def build(data):', '    record = new(cls)']
+    for key in keys:
+        if key in cls.FIELD_SET:
+            lines.append(f'    record.{key} = data[{key!r}]')
+    extra = [f'{key!r}: data[{key!r}]' for key in keys if key not in cls.FIELD_SET]
+    lines.append(f"    record._extra = {{{', '.join(extra)}}}" if extra else '    record._extra = None')
+    lines.append('    return record')
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec('\n'.join(lines), namespace)
+    return namespace['build']
+
+
+def record_type(cls):
+    """Make a Record subclass with annotated fields into a slotted dataclass"""
+    cls = dataclass(init=False, repr=False, eq=False, slots=True)(cls)
+    cls.FIELDS = tuple(field.name for field in fields(cls))
+    clashes = set(cls.FIELDS) & set(dir(Record))
+    if clashes:
+        raise TypeError(f"{cls.__name__} fields shadow Record attributes: {sorted(clashes)}")
+    cls.FIELD_SET = frozenset(cls.FIELDS)
+    cls.INTERNED = frozenset(cls.INTERNED)
+    cls._builders = {}
+    return cls
+
+
+@record_type
+class Expense(Record):
+    id: int
+    category: str
+    amount: float
+    description: str
+    date: str
+    app_source: Optional[str]
+    created_date: str
+    status: str
+    external_id: Optional[str]
+
+    INTERNED = ('category', 'date', 'app_source', 'created_date', 'status')
+
+
+@record_type
+class Investment(Record):
+    id: int
+    symbol: str
+    name: str
+    shares: float
+    price: float
+    current_value: float
+    account_id: Any
+    investment_type: str
+    purchase_date: str
+    status: str
+
+    INTERNED = ('symbol', 'name', 'investment_type', 'purchase_date', 'status')
+
+
+@record_type
+class Prescription(Record):
+    id: str
+    name: str
+    dosage: str
+    frequency: str
+    quantity: int
+    refill_date: str
+    pharmacy: str
+    doctor: str
+    status: str
+    refills_remaining: int
+    last_refill: Optional[str]
+    next_refill_due: str
+    reminded_for: Optional[str]
+
+    INTERNED = ('name', 'dosage', 'frequency', 'refill_date', 'pharmacy', 'doctor', 'status',
+                'last_refill', 'next_refill_due', 'reminded_for')
+
+
+@record_type
+class Message(Record):
+    id: str
+    seq: int
+    sender: str
+    recipient: str
+    message: str
+    timestamp: datetime
+    message_type: str
+    channel: str
+    read: bool
+
+    INTERNED = ('sender', 'recipient', 'message_type', 'channel')
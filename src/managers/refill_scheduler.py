@@ -0,0 +1,131 @@
+"""
+Prescription Refill Scheduler
+"""
+import heapq
+import itertools
+import threading
+from datetime import date, datetime, timedelta
+from src.config.constants import REFILL_REMINDER_DAYS, REFILL_REMINDER_INTERVAL
+from src.storage.backends import list_users
+
+
+def parse_due_date(value):
+    """Parse a YYYY-MM-DD due date, or None if it is missing or malformed"""
+    try:
+        return date.fromisoformat(value)  # C fast path for the canonical layout
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()  # also accepts unpadded months and days
+    except (TypeError, ValueError):
+        return None
+
+
+class RefillScheduler:
+    """Min-heap of active prescriptions ordered by their next refill date.
+
+    Due dates are parsed once, when a prescription is scheduled. Rescheduling
+    or cancelling leaves the old heap entry behind and only updates
+    ``self.entries``; stale entries are discarded as they surface. Asking what
+    is due therefore pops just the k due entries, in O(k log n), instead of
+    re-parsing every prescription. The job thread and the UI share one
+    scheduler, so every heap operation holds ``self.lock``.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}  # prescription id -> its live heap entry
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def schedule(self, prescription):
+        """Add or reschedule a prescription; inactive or undated ones are cancelled"""
+        due = parse_due_date(prescription.get('next_refill_due'))
+        prescription_id = prescription['id']
+        with self.lock:
+            if prescription.get('status') != 'active' or due is None:
+                self.entries.pop(prescription_id, None)
+                return
+            current = self.entries.get(prescription_id)
+            if current is not None and current[0] == due:
+                return
+            entry = (due, next(self.counter), prescription_id)
+            self.entries[prescription_id] = entry
+            heapq.heappush(self.heap, entry)
+            if len(self.heap) > 2 * len(self.entries) + 32:
+                self.heap = list(self.entries.values())
+                heapq.heapify(self.heap)
+
+    def cancel(self, prescription_id):
+        """Stop tracking a prescription"""
+        with self.lock:
+            self.entries.pop(prescription_id, None)
+
+    def due_within(self, days, today=None):
+        """Get (prescription id, due date) pairs due within ``days`` of ``today``, soonest first"""
+        today = today or datetime.now().date()
+        horizon = today + timedelta(days=days)
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= horizon:
+                entry = heapq.heappop(self.heap)
+                if self.entries.get(entry[2]) is entry:
+                    due.append(entry)
+            # Due prescriptions stay scheduled until they are refilled or cancelled
+            for entry in due:
+                heapq.heappush(self.heap, entry)
+        return [(entry[2], entry[0]) for entry in due]
+
+
+class RefillReminderJob:
+    """Background thread that periodically sends due refill reminders.
+
+    Managers are fetched through ``get_manager(name, user_id)`` on every
+    sweep so the job always works on current instances. Every user's
+    prescriptions partition is visited, and each user's reminders go to that
+    user's own messages; a user's messaging manager is only opened when one
+    of their refills is due.
+    """
+
+    def __init__(self, get_manager, interval=REFILL_REMINDER_INTERVAL, days=REFILL_REMINDER_DAYS):
+        self.get_manager = get_manager
+        self.interval = interval
+        self.days = days
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def run_once(self, today=None):
+        """Send reminders for everything currently due; returns how many were sent"""
+        sent = 0
+        # The shared prescriptions file first, then each user's own partition
+        for user_id in [None] + list_users('prescriptions'):
+            prescription_manager = self.get_manager('prescription', user_id)
+            if prescription_manager.get_unsent_refill_reminders(self.days, today):
+                messaging_system = self.get_manager('messaging', user_id)
+                sent += prescription_manager.send_refill_reminders(messaging_system, self.days, today)
+        return sent
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error sending refill reminders: {e}")
+            if self.stop_event.wait(self.interval):
+                return
+
+    def start(self):
+        """Start the reminder thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='refill-reminders', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the reminder thread and wait for the current sweep to finish"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
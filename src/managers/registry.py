@@ -0,0 +1,171 @@
+"""
+Process-wide Manager Registry
+"""
+import os
+import threading
+from collections import OrderedDict
+from src.config.constants import USER_MANAGER_CACHE_SIZE, SHARED_DATA_OWNER, MESSAGE_ARCHIVE_DIR
+from src.managers.ai_agent import AIAgentSystem, TaskResumeJob
+from src.managers.messaging import MessagingSystem
+from src.managers.admin import AdminSystem
+from src.managers.client_intake import ClientIntakeManager
+from src.managers.prescription import PrescriptionManager
+from src.managers.investment import InvestmentManager
+from src.managers.expense import ExpenseManager
+from src.managers.insurance import InsuranceManager
+from src.managers.legal import LegalManager
+from src.managers.tax import TaxManager
+from src.managers.travel import TravelManager
+from src.managers.refill_scheduler import RefillReminderJob
+from src.storage.backends import claim_shared_store, user_directory
+from src.storage.write_behind import flush_all
+
+
+MANAGER_CLASSES = {
+    'ai_agent': AIAgentSystem,
+    'messaging': MessagingSystem,
+    'admin': AdminSystem,
+    'client_intake': ClientIntakeManager,
+    'prescription': PrescriptionManager,
+    'investment': InvestmentManager,
+    'expense': ExpenseManager,
+    'insurance': InsuranceManager,
+    'legal': LegalManager,
+    'tax': TaxManager,
+    'travel': TravelManager
+}
+
+# Managers whose data belongs to a single client; the rest are shared by everyone
+USER_SCOPED_MANAGERS = {
+    'prescription', 'investment', 'expense', 'insurance', 'legal', 'tax', 'travel', 'messaging'
+}
+# The store each of them keeps its data in
+USER_SCOPED_STORES = {
+    'prescription': 'prescriptions', 'investment': 'investments', 'expense': 'expenses', 'insurance': 'insurance',
+    'legal': 'legal', 'tax': 'tax', 'travel': 'travel', 'messaging': 'chat_history'
+}
+
+_instances = {}
+_user_instances = OrderedDict()  # (name, user id) -> manager, least recently used first
+_jobs = {}
+_lock = threading.Lock()
+
+
+def get_manager(name, user_id=None):
+    """Get the shared manager instance, rebuilding it if its data changed on disk.
+
+    Streamlit re-executes the app script on every interaction, but imported
+    modules survive, so managers kept here are constructed once per process.
+    A manager is only rebuilt when its store reports that another writer
+    touched the underlying data since it was loaded. Managers with a
+    ``reload`` method are reloaded in place instead, so work they have in
+    flight (queued AI tasks) is not dropped with the old instance.
+
+    Managers in USER_SCOPED_MANAGERS get one instance per ``user_id`` that
+    loads only that user's partition; the others ignore ``user_id``. Only
+    the USER_MANAGER_CACHE_SIZE most recently used per-user instances are
+    kept, so memory follows the active users rather than every client.
+    """
+    manager_class = MANAGER_CLASSES[name]
+    if name not in USER_SCOPED_MANAGERS:
+        user_id = None
+    key = (name, user_id)
+    instances = _instances if user_id is None else _user_instances
+    evicted = []
+    with _lock:
+        manager = instances.get(key)
+        store = getattr(manager, 'store', None)
+        stale = store is not None and store.is_stale()
+        if stale and hasattr(manager, 'reload'):
+            manager.reload()
+        elif manager is None or stale:
+            if hasattr(manager, 'close'):
+                manager.close()  # release worker pools held by the stale instance
+            manager = manager_class(user_id) if user_id is not None else manager_class()
+            instances[key] = manager
+        if user_id is not None:
+            _user_instances.move_to_end(key)
+            while len(_user_instances) > USER_MANAGER_CACHE_SIZE:
+                evicted.append(_user_instances.popitem(last=False)[1])
+    for old in evicted:
+        if hasattr(old, 'close'):
+            old.close()
+    return manager
+
+
+def open_manager(name, user_id=None):
+    """Get a manager for a background sweep over every user.
+
+    Shared managers come from ``get_manager``. A per-user manager the cache
+    already holds is reused without marking it recently used; any other user
+    gets a fresh instance that is not cached, so a sweep never evicts the
+    managers of the users who are active right now.
+    """
+    if name not in USER_SCOPED_MANAGERS or user_id is None:
+        return get_manager(name)
+    with _lock:
+        manager = _user_instances.get((name, user_id))
+    store = getattr(manager, 'store', None)
+    if manager is None or (store is not None and store.is_stale()):
+        manager = MANAGER_CLASSES[name](user_id)
+    return manager
+
+
+def claim_shared_data(user_id):
+    """Give ``user_id`` the data saved before USER_SCOPED_MANAGERS were partitioned per user.
+
+    Every page opens the logged-in user's own partitions, so records left in
+    the old shared stores would never be shown again. Each shared store goes
+    to SHARED_DATA_OWNER if that is set, otherwise to the first user to log
+    in who has no data of that kind yet (see ``claim_shared_store``). Returns
+    the names of the stores moved.
+    """
+    if SHARED_DATA_OWNER is not None and user_id != SHARED_DATA_OWNER:
+        return []
+    flush_all()  # queued messages must reach the shared files before they move
+    moved = []
+    for name, store_name in USER_SCOPED_STORES.items():
+        if not claim_shared_store(store_name, user_id):
+            continue
+        moved.append(store_name)
+        if name == 'messaging' and os.path.isdir(MESSAGE_ARCHIVE_DIR):
+            archive_dir = os.path.join(user_directory(user_id), MESSAGE_ARCHIVE_DIR)
+            if not os.path.exists(archive_dir):
+                os.replace(MESSAGE_ARCHIVE_DIR, archive_dir)
+        with _lock:
+            _instances.pop((name, None), None)
+            _user_instances.pop((name, user_id), None)
+    return moved
+
+
+def clear_managers():
+    """Drop every cached manager so the next access reloads from storage"""
+    with _lock:
+        _instances.clear()
+        _user_instances.clear()
+
+
+def start_background_jobs():
+    """Start the process-wide background jobs once; safe to call on every rerun"""
+    with _lock:
+        if 'refill_reminders' in _jobs:
+            return
+        job = RefillReminderJob(open_manager)
+        job.start()
+        _jobs['refill_reminders'] = job
+        # AI tasks abandoned by a stopped process go back on this process's agent pools
+        job = TaskResumeJob(get_manager)
+        job.start()
+        _jobs['ai_task_resume'] = job
+
+
+def stop_background_jobs():
+    """Stop every running background job"""
+    with _lock:
+        jobs = list(_jobs.values())
+        _jobs.clear()
+        ai_system = _instances.get(('ai_agent', None))
+    for job in jobs:
+        job.stop()
+    if ai_system is not None:
+        ai_system.close()
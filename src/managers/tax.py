@@ -1,15 +1,15 @@
 """
 Tax Management System
 """
-import json
-import os
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.storage.backends import open_store
 
 
 class TaxManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.tax_documents = []
+        self.tax_documents_by_id = {}
         self.tax_filings = []
         self.deductions = []
         self.tax_providers = {
@@ -65,19 +65,19 @@ class TaxManager:
                 'customer_support': 'Phone & Email'
             }
         }
+        self.store = open_store('tax', compact=self.save_data, user_id=user_id)
         self.load_data()
     
     def load_data(self):
         """Load tax data from storage"""
         try:
-            if os.path.exists('tax_data.json'):
-                with open('tax_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.tax_documents = data.get('documents', [])
-                    self.tax_filings = data.get('filings', [])
-                    self.deductions = data.get('deductions', [])
+            data = self.store.load()
+            self.tax_documents = data.setdefault('documents', [])
+            self.tax_filings = data.setdefault('filings', [])
+            self.deductions = data.setdefault('deductions', [])
         except Exception as e:
             print(f"Error loading tax data: {e}")
+        self.tax_documents_by_id = {r['id']: r for r in self.tax_documents}
     
     def save_data(self):
         """Save tax data to storage"""
@@ -87,15 +87,14 @@ class TaxManager:
                 'filings': self.tax_filings,
                 'deductions': self.deductions
             }
-            with open('tax_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving tax data: {e}")
     
     def add_tax_document(self, document_type, provider, amount, description):
         """Add a new tax document"""
         document = {
-            'id': len(self.tax_documents) + 1,
+            'id': self.store.next_id('documents'),
             'type': document_type,
             'provider': provider,
             'amount': amount,
@@ -104,12 +103,17 @@ class TaxManager:
             'status': 'active'
         }
         self.tax_documents.append(document)
-        self.save_data()
+        self.tax_documents_by_id[document['id']] = document
+        self.store.append('documents', document)
         return document
     
+    def get_document(self, document_id):
+        """Get a tax document by id"""
+        return self.tax_documents_by_id.get(document_id)
+    
     def get_documents(self):
         """Get all active tax documents"""
-        return [d for d in self.tax_documents if d['status'] == 'active']
+        return self.store.query('documents', status='active')
     
     def get_provider_info(self, provider_key):
         """Get tax provider information"""
@@ -1,15 +1,15 @@
 """
 Travel Management System
 """
-import json
-import os
 from datetime import datetime
-from src.config.constants import DATA_FILES
+from src.storage.backends import open_store
 
 
 class TravelManager:
-    def __init__(self):
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.trips = []
+        self.trips_by_id = {}
         self.bookings = []
         self.preferences = []
         self.travel_services = {
@@ -58,19 +58,19 @@ class TravelManager:
                 'customer_support': 'Email Support'
             }
         }
+        self.store = open_store('travel', compact=self.save_data, user_id=user_id)
         self.load_data()
     
     def load_data(self):
         """Load travel data from storage"""
         try:
-            if os.path.exists('travel_data.json'):
-                with open('travel_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.trips = data.get('trips', [])
-                    self.bookings = data.get('bookings', [])
-                    self.preferences = data.get('preferences', [])
+            data = self.store.load()
+            self.trips = data.setdefault('trips', [])
+            self.bookings = data.setdefault('bookings', [])
+            self.preferences = data.setdefault('preferences', [])
         except Exception as e:
             print(f"Error loading travel data: {e}")
+        self.trips_by_id = {r['id']: r for r in self.trips}
     
     def save_data(self):
         """Save travel data to storage"""
@@ -80,15 +80,14 @@ class TravelManager:
                 'bookings': self.bookings,
                 'preferences': self.preferences
             }
-            with open('travel_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.save(data)
         except Exception as e:
             print(f"Error saving travel data: {e}")
     
     def add_trip(self, destination, start_date, end_date, trip_type, budget):
         """Add a new travel trip"""
         trip = {
-            'id': len(self.trips) + 1,
+            'id': self.store.next_id('trips'),
             'destination': destination,
             'start_date': start_date,
             'end_date': end_date,
@@ -98,12 +97,19 @@ class TravelManager:
             'created_date': datetime.now().strftime('%Y-%m-%d')
         }
         self.trips.append(trip)
-        self.save_data()
+        self.trips_by_id[trip['id']] = trip
+        self.store.append('trips', trip)
         return trip
     
-    def get_trips(self):
-        """Get all travel trips"""
-        return self.trips
+    def get_trip(self, trip_id):
+        """Get a trip by id"""
+        return self.trips_by_id.get(trip_id)
+    
+    def get_trips(self, status=None):
+        """Get all travel trips, optionally only those with a given status"""
+        if status is None:
+            return self.trips
+        return self.store.query('trips', status=status)
     
     def get_service_info(self, service_key):
         """Get travel service information"""
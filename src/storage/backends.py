@@ -0,0 +1,97 @@
+"""
+Storage backend selection
+"""
+import os
+import re
+from src.config.constants import DATA_FILES, STORAGE_BACKEND, SQLITE_DATABASE, USER_DATA_DIR
+from src.storage.files import file_lock
+from src.storage.journal import JournalStore
+from src.storage.sqlite_store import SQLiteStore, list_partitions, move_store
+
+
+def user_partition(user_id):
+    """Partition key for ``user_id`` that is safe as a directory or table name.
+
+    ASCII letters and digits are kept; every other byte becomes ``-XX``, so
+    distinct user ids never share a partition and ``partition_user``
+    recovers the id.
+    """
+    encoded = str(user_id).encode('utf-8')
+    if not encoded:
+        raise ValueError("A user id is required for a user partition")
+    return ''.join(chr(b) if chr(b).isalnum() and b < 128 else f'-{b:02X}' for b in encoded)
+
+
+def partition_user(partition):
+    """User id a ``user_partition`` key was made from"""
+    return re.sub(rb'-([0-9A-F]{2})', lambda m: bytes([int(m.group(1), 16)]), partition.encode('ascii')).decode('utf-8')
+
+
+def user_directory(user_id):
+    """Directory under USER_DATA_DIR that holds ``user_id``'s files"""
+    return os.path.join(USER_DATA_DIR, user_partition(user_id))
+
+
+def open_store(name, compact=None, backend=None, user_id=None):
+    """Open the store for a DATA_FILES entry using the configured backend.
+
+    With ``user_id`` the store holds only that user's data: the journal
+    backend keeps it in the user's own directory under USER_DATA_DIR and
+    SQLite in tables prefixed ``user_<partition>__``, so loading it never
+    reads another user's records.
+    """
+    backend = backend or STORAGE_BACKEND
+    partition = user_partition(user_id) if user_id is not None else None
+    if backend == 'journal':
+        path = DATA_FILES[name]
+        if partition:
+            directory = user_directory(user_id)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, path)
+        return JournalStore(path, compact=compact)
+    if backend == 'sqlite':
+        table = f'user_{partition}__{name}' if partition else name
+        return SQLiteStore(SQLITE_DATABASE, table, compact=compact)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def list_users(name, backend=None):
+    """User ids that have their own partition of the ``name`` store"""
+    backend = backend or STORAGE_BACKEND
+    if backend == 'journal':
+        if not os.path.isdir(USER_DATA_DIR):
+            return []
+        files = JournalStore.data_files(DATA_FILES[name])
+        return sorted(
+            partition_user(partition) for partition in os.listdir(USER_DATA_DIR)
+            if any(os.path.exists(os.path.join(USER_DATA_DIR, partition, f)) for f in files)
+        )
+    if backend == 'sqlite':
+        return sorted(partition_user(partition) for partition in list_partitions(SQLITE_DATABASE, name))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def claim_shared_store(name, user_id, backend=None):
+    """Move the shared ``name`` store into ``user_id``'s partition; returns whether anything moved.
+
+    Only a shared store that holds data moves, and only into a user with no
+    data of their own in that store, so nothing is merged or overwritten.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == 'journal':
+        path = DATA_FILES[name]
+        directory = user_directory(user_id)
+        files = list(JournalStore.data_files(path))
+        with file_lock(path + '.lock'):
+            if not any(os.path.exists(f) for f in files):
+                return False
+            if any(os.path.exists(os.path.join(directory, f)) for f in files):
+                return False
+            os.makedirs(directory, exist_ok=True)
+            for f in files + [os.path.splitext(path)[0] + '.ids.json']:
+                if os.path.exists(f):
+                    os.replace(f, os.path.join(directory, f))
+        return True
+    if backend == 'sqlite':
+        return move_store(SQLITE_DATABASE, name, f'user_{user_partition(user_id)}__{name}')
+    raise ValueError(f"Unknown storage backend: {backend}")
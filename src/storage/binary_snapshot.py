@@ -0,0 +1,229 @@
+"""
+Memory-mapped binary snapshots
+"""
+import json
+import marshal
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import MutableSequence
+from src.config.constants import SNAPSHOT_CHUNK_SIZE
+from src.storage.files import encode_value
+
+# File layout: prefix, record chunks, one offset table per collection, JSON header
+MAGIC = b'CSNAP\x00\x01\x00'
+PREFIX = struct.Struct('<8sQQ')  # magic, header offset, header length
+_UNREAD = object()
+
+
+def _offsets(buffer, position, count):
+    offsets = array('Q')
+    offsets.frombytes(buffer[position:position + count * offsets.itemsize])
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets
+
+
+class LazyRecords(MutableSequence):
+    """List of records mapped from a binary snapshot and decoded on first access.
+
+    Records are stored in marshal-encoded chunks of ``chunk_size``; touching
+    a record decodes its chunk once and keeps the result, so managers can
+    mutate records in place exactly as with a list loaded from JSON.
+    Appending never decodes anything. Inserting or deleting decodes every
+    chunk first, because positions no longer match the file afterwards.
+    With ``convert_records`` each decoded record is also passed through a
+    converter, such as a Record type, when its chunk is decoded.
+    """
+
+    def __init__(self, buffer, offsets, count, chunk_size, marshal_version):
+        self.buffer = buffer
+        self.offsets = offsets  # file position of each chunk, plus the end of the last
+        self.count = count
+        self.chunk_size = chunk_size
+        self.marshal_version = marshal_version
+        self.items = [_UNREAD] * count
+        self.loaded = bytearray(len(offsets) - 1)
+        self.unread = len(offsets) - 1
+        self.convert = None
+
+    def _load(self, chunk):
+        if self.loaded[chunk]:
+            return
+        start = chunk * self.chunk_size
+        records = marshal.loads(self.buffer[self.offsets[chunk]:self.offsets[chunk + 1]])
+        if self.convert is not None:
+            records = [self.convert(record) for record in records]
+        self.items[start:start + len(records)] = records
+        self.loaded[chunk] = 1
+        self.unread -= 1
+
+    def _load_index(self, index):
+        position = index + len(self.items) if index < 0 else index
+        if 0 <= position < self.count:
+            self._load(position // self.chunk_size)
+
+    def _load_range(self, start, stop):
+        if self.unread:
+            for chunk in range(start // self.chunk_size, -(-min(stop, self.count) // self.chunk_size)):
+                self._load(chunk)
+
+    def _load_all(self):
+        if self.unread:
+            for chunk in range(len(self.loaded)):
+                self._load(chunk)
+
+    def convert_records(self, convert):
+        """Pass every record through ``convert``: those decoded so far now, the rest as their chunk is decoded"""
+        self.convert = convert
+        if not self.unread:
+            self.items[:] = [convert(record) for record in self.items]
+            return
+        # Positions still match the file: only decoded chunks and appended records are present
+        for chunk in range(len(self.loaded)):
+            if self.loaded[chunk]:
+                start = chunk * self.chunk_size
+                self.items[start:start + self.chunk_size] = [
+                    convert(record) for record in self.items[start:start + self.chunk_size]
+                ]
+        self.items[self.count:] = [convert(record) for record in self.items[self.count:]]
+
+    def raw_chunk(self, start, size):
+        """Encoded bytes of records ``start:start + size`` if they are one untouched chunk, else None"""
+        if not self.unread or size != self.chunk_size or start % size or self.marshal_version != marshal.version:
+            return None
+        chunk = start // size
+        if chunk >= len(self.loaded) or self.loaded[chunk]:
+            return None
+        if min(start + size, len(self.items)) != min(start + size, self.count):
+            return None  # records appended since loading share this chunk
+        return self.buffer[self.offsets[chunk]:self.offsets[chunk + 1]]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self.items))
+            self._load_range(start, stop)
+            return self.items[index]
+        if self.unread:
+            self._load_index(index)
+        return self.items[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._load_all()
+        elif self.unread:
+            self._load_index(index)  # so a later load of its chunk cannot overwrite the new value
+        self.items[index] = value
+
+    def __delitem__(self, index):
+        self._load_all()
+        del self.items[index]
+
+    def insert(self, index, value):
+        self._load_all()
+        self.items.insert(index, value)
+
+    def append(self, value):
+        self.items.append(value)
+
+    def extend(self, values):
+        self.items.extend(values)
+
+    def __iter__(self):
+        self._load_all()
+        return iter(self.items)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyRecords)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LazyRecords({len(self.items)} records, {self.unread} chunks unread)"
+
+
+def _intern_strings(records):
+    """Intern string values; marshal flags interned strings and decoding re-interns them, sharing one copy"""
+    for record in records:
+        if type(record) is dict:
+            for key, value in record.items():
+                if type(value) is str:
+                    record[key] = sys.intern(value)
+    return records
+
+
+def encode_snapshot(data, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """Encode a store's data dict as a binary snapshot.
+
+    Every list becomes a collection of marshal-encoded chunks with an
+    offset table; other values go into the JSON header. Records pass
+    through JSON first, so a binary snapshot loads exactly what a JSON
+    snapshot of the same data would (string keys, lists, ISO datetimes).
+    String values are written interned, so equal strings decode to one
+    shared object across chunks. Chunks of a LazyRecords that were never
+    decoded are copied as they are.
+    """
+    parts = [b'']
+    position = PREFIX.size
+    header = {'marshal': marshal.version, 'chunk_size': chunk_size, 'values': {}, 'collections': {}}
+    tables = {}
+    for key, value in data.items():
+        if not isinstance(value, (list, LazyRecords)):
+            header['values'][key] = value
+            continue
+        offsets = array('Q', [position])
+        for start in range(0, len(value), chunk_size):
+            raw = value.raw_chunk(start, chunk_size) if isinstance(value, LazyRecords) else None
+            if raw is None:
+                records = json.loads(json.dumps(value[start:start + chunk_size], default=encode_value))
+                raw = marshal.dumps(_intern_strings(records))
+            parts.append(raw)
+            position += len(raw)
+            offsets.append(position)
+        tables[key] = (offsets, len(value))
+    for key, (offsets, count) in tables.items():
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        header['collections'][key] = {'count': count, 'chunks': len(offsets) - 1, 'table': position}
+        parts.append(offsets.tobytes())
+        position += len(offsets) * offsets.itemsize
+    encoded_header = json.dumps(header, default=encode_value).encode()
+    parts[0] = PREFIX.pack(MAGIC, position, len(encoded_header))
+    parts.append(encoded_header)
+    return b''.join(parts)
+
+
+def _read_header(buffer):
+    magic, header_offset, header_length = PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary snapshot")
+    header = json.loads(buffer[header_offset:header_offset + header_length])
+    if header['marshal'] > marshal.version:
+        raise ValueError(f"Snapshot uses marshal format {header['marshal']}, newer than this Python supports")
+    return header
+
+
+def read_snapshot_values(path):
+    """The non-collection values of a binary snapshot, read without mapping the records"""
+    with open(path, 'rb') as f:
+        magic, header_offset, header_length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError("Not a binary snapshot")
+        f.seek(header_offset)
+        return json.loads(f.read(header_length))['values']
+
+
+def read_snapshot(path):
+    """Map a binary snapshot; collections come back as LazyRecords"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header = _read_header(buffer)
+    data = dict(header['values'])
+    for key, collection in header['collections'].items():
+        offsets = _offsets(buffer, collection['table'], collection['chunks'] + 1)
+        data[key] = LazyRecords(buffer, offsets, collection['count'], header['chunk_size'], header['marshal'])
+    return data
@@ -0,0 +1,91 @@
+"""
+Process-safe file helpers shared by the storage engines
+"""
+import json
+import os
+import tempfile
+from collections.abc import MutableSequence
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+def encode_value(value):
+    """JSON fallback for values the standard encoder cannot serialise"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, MutableSequence):
+        return list(value)  # e.g. records still backed by a binary snapshot
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()  # slotted manager records
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on ``path`` for the duration of the block.
+
+    Locks are taken with ``flock`` on a fresh descriptor, so they exclude
+    other threads of this process as well as other processes.
+    """
+    with open(path, 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_atomic(path, text, fsync=True):
+    """Replace ``path`` with ``text`` (str or bytes) so readers see the old or the new file, never a partial one.
+
+    The text goes to a uniquely named temp file in the same directory, which
+    is renamed over ``path``; concurrent writers therefore never share a
+    temp file. With ``fsync`` the data is on disk before the rename, so a
+    crash cannot leave an empty file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(text, bytes) else 'w') as f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_json(path, default=None):
+    """Load JSON from ``path``, or ``default`` if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def update_json(path, update, fsync=True, **dump_options):
+    """Read-modify-write a JSON file under its lock; returns the written value.
+
+    ``update`` receives the current contents ({} if the file does not exist
+    yet) and returns the new value, or None to leave the file untouched.
+    Holding ``<path>.lock`` for the whole cycle means concurrent updates
+    from other processes are merged rather than overwritten.
+    """
+    with file_lock(path + '.lock'):
+        current = read_json(path, {})
+        value = update(current)
+        if value is None:
+            return current
+        write_atomic(path, json.dumps(value, **dump_options), fsync=fsync)
+        return value
@@ -0,0 +1,334 @@
+"""
+Append-only journal storage engine
+"""
+import json
+import os
+import struct
+import threading
+from collections.abc import Mapping, MutableSequence
+from src.config.constants import JOURNAL_COMPACT_EVERY, SNAPSHOT_FORMAT
+from src.storage.binary_snapshot import encode_snapshot, read_snapshot, read_snapshot_values
+from src.storage.files import encode_value, file_lock, read_json, update_json, write_atomic
+
+
+def max_record_id(records, field='id'):
+    """Highest integer ``field`` value among ``records``, or 0"""
+    return max((r[field] for r in records if type(r.get(field)) is int), default=0)
+
+
+class JournalStore:
+    """Snapshot file plus an append-only JSONL journal of mutations.
+
+    The snapshot keeps the owning manager's existing JSON layout, so data
+    files written before the journal existed load unchanged. Each mutation
+    appends a single line to the journal instead of rewriting the snapshot;
+    once ``compact_every`` entries have accumulated and the journal has grown
+    at least as large as the snapshot, the ``compact`` callback (normally the
+    manager's ``save_*`` method) writes a fresh snapshot and the journal is
+    discarded. Tying compaction to the snapshot size keeps the amortised
+    cost of a write constant however large the data file becomes.
+
+    The loaded data dict is kept as ``self.data``; managers take their
+    collections from it with ``setdefault`` so ``query`` sees the same lists
+    they mutate.
+
+    Record ids come from ``next_id``, whose counters live in a small
+    ``.ids.json`` sidecar updated under a file lock, so two processes
+    appending to the same store never hand out the same id.
+
+    Several processes may share one store. Loads, appends and snapshots all
+    hold an exclusive lock on ``<path>.lock``; before appending, a store
+    reads whatever other processes appended since it last looked, so
+    ``seq`` stays globally ordered. Those foreign entries are not applied to
+    ``self.data`` (``is_stale`` reports them so the owner reloads) but are
+    merged into the next snapshot, and a snapshot written by another
+    process is compacted from disk rather than overwritten, so no writer's
+    changes are lost. ``foreign_writes`` counts what has been seen from other
+    processes, so callers can tell cheaply whether anyone else has written.
+
+    With ``snapshot_format='binary'`` the snapshot is a memory-mapped
+    ``.snap`` file (see ``binary_snapshot``) whose records are decoded on
+    first access instead of parsed up front. A snapshot found in the other
+    format, such as a JSON file written before binary snapshots were
+    enabled, is read and converted on load.
+    """
+
+    def __init__(self, path, compact=None, compact_every=JOURNAL_COMPACT_EVERY, snapshot_format=None):
+        base = os.path.splitext(path)[0]
+        json_path, binary_path, self.journal_path = self.data_files(path)
+        self.snapshot_format = snapshot_format or SNAPSHOT_FORMAT
+        if self.snapshot_format == 'json':
+            self.path, self.other_path = json_path, binary_path
+        elif self.snapshot_format == 'binary':
+            self.path, self.other_path = binary_path, json_path
+        else:
+            raise ValueError(f"Unknown snapshot format: {self.snapshot_format}")
+        self.ids_path = base + '.ids.json'
+        self.lock_path = path + '.lock'
+        self.compact = compact
+        self.compact_every = compact_every
+        self.seq = 0
+        self.pending = 0
+        self.data = {}
+        self.signature = None
+        self.journal_offset = 0  # bytes of the journal this store has read or written
+        self.snapshot_signature = None
+        self.foreign = []  # entries other processes journaled since we loaded
+        self.foreign_writes = 0  # entries and snapshots from other processes seen so far, never reset
+        self.snapshot_replaced = False  # another process compacted since we loaded
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def data_files(path):
+        """JSON snapshot, binary snapshot and journal paths that may hold the data of a store at ``path``"""
+        base = os.path.splitext(path)[0]
+        return path, base + '.snap', base + '.journal.jsonl'
+
+    def load(self):
+        """Load the snapshot and replay any journal entries written after it"""
+        with self.lock, file_lock(self.lock_path):
+            data = self._read_disk()
+            self.foreign = []
+            self.snapshot_replaced = False
+            self.data = data
+            self.signature = self._stat()
+        return data
+
+    def _read_snapshot(self, path):
+        if path.endswith('.snap'):
+            return read_snapshot(path)
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_snapshot(self, data):
+        if self.snapshot_format == 'binary':
+            write_atomic(self.path, encode_snapshot(data))
+        else:
+            write_atomic(self.path, json.dumps(data, indent=2, default=encode_value))
+
+    def _snapshot_seq(self):
+        if self.snapshot_format == 'binary':
+            try:
+                return read_snapshot_values(self.path).get('_seq', 0)
+            except OSError:
+                return 0
+        return read_json(self.path, {}).get('_seq', 0)
+
+    def _read_good_snapshot(self, path):
+        """Read a snapshot, moving it aside to ``<path>.corrupt`` if it cannot be decoded"""
+        try:
+            return self._read_snapshot(path)
+        except (ValueError, EOFError, TypeError, struct.error) as e:
+            print(f"Error reading snapshot {path}, moved aside to {path}.corrupt: {e}")
+            os.replace(path, path + '.corrupt')
+            return None
+
+    def _read_disk(self):
+        data = {}
+        if os.path.exists(self.path):
+            data = self._read_good_snapshot(self.path) or {}
+        elif os.path.exists(self.other_path):
+            data = self._read_good_snapshot(self.other_path)
+            if data is not None:
+                self._write_snapshot(data)
+                os.remove(self.other_path)
+            data = data or {}
+        self.snapshot_signature = self._stat()[0]
+        self.seq = data.pop('_seq', 0)
+        self.pending = 0
+        self.journal_offset = 0
+        if os.path.exists(self.journal_path):
+            self._replay(data)
+        return data
+
+    def _replay(self, data):
+        indexes = {}
+        offset = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final write; drop it so later appends stay parseable
+                    break
+                offset += len(line)
+                if entry['seq'] <= self.seq:
+                    continue  # already folded into the snapshot
+                self._apply(data, entry, indexes)
+                self.seq = entry['seq']
+                self.pending += 1
+        if offset < os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, offset)
+        self.journal_offset = offset
+
+    def _apply(self, data, entry, indexes):
+        op, key = entry['op'], entry['key']
+        if op == 'append':
+            records = data.setdefault(key, [])
+            records.append(entry['record'])
+            if key in indexes:
+                indexes[key][entry['record'].get('id')] = entry['record']
+        elif op == 'update':
+            if key not in indexes:
+                indexes[key] = {record.get('id'): record for record in data.get(key, [])}
+            record = indexes[key].get(entry['id'])
+            if record is not None:
+                record.update(entry['changes'])
+        elif op == 'set':
+            data[key] = entry['value']
+            indexes.pop(key, None)
+
+    def _catch_up(self):
+        """Pick up entries other processes journaled since we last looked (file lock held)"""
+        if self._stat()[0] != self.snapshot_signature:
+            # Another process wrote a snapshot: its _seq covers everything it folded in
+            self.seq = max(self.seq, self._snapshot_seq())
+            self.snapshot_signature = self._stat()[0]
+            self.snapshot_replaced = True
+            self.journal_offset = 0
+            self.foreign = []
+            self.foreign_writes += 1
+        try:
+            size = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            self.journal_offset = 0
+            return
+        if size < self.journal_offset:
+            self.journal_offset = 0
+        elif size == self.journal_offset:
+            return  # nobody else has written
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self.journal_offset)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.journal_offset += len(line)
+                if entry['seq'] > self.seq:
+                    self.foreign.append(entry)
+                    self.foreign_writes += 1
+                    self.seq = entry['seq']
+                    self.pending += 1
+
+    def _stat(self):
+        stats = []
+        for path in (self.path, self.journal_path):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _journal_outgrew_snapshot(self):
+        snapshot, journal = self.signature
+        return (journal[1] if journal else 0) >= (snapshot[1] if snapshot else 0)
+
+    def is_stale(self):
+        """Check whether another writer changed the files since we last touched them"""
+        return bool(self.foreign) or self.snapshot_replaced or self._stat() != self.signature
+
+    def query(self, key, **filters):
+        """Get records in ``key`` whose fields equal every filter value"""
+        return [r for r in self.data.get(key, []) if all(r.get(f) == v for f, v in filters.items())]
+
+    def count(self, key, **filters):
+        """Count records in ``key`` whose fields equal every filter value"""
+        return sum(1 for r in self.data.get(key, []) if all(r.get(f) == v for f, v in filters.items()))
+
+    def append(self, key, record):
+        """Journal a record appended to the ``key`` collection"""
+        self._write({'op': 'append', 'key': key, 'record': record})
+
+    def extend(self, key, records):
+        """Journal a batch of records appended to ``key`` in a single write"""
+        self._write(*({'op': 'append', 'key': key, 'record': record} for record in records))
+
+    def update(self, key, record_id, changes):
+        """Journal field changes to the record with ``record_id`` in ``key``"""
+        self._write({'op': 'update', 'key': key, 'id': record_id, 'changes': changes})
+
+    def update_many(self, key, updates):
+        """Journal field changes to several records ({record id: changes}) in a single write"""
+        self._write(*({'op': 'update', 'key': key, 'id': record_id, 'changes': changes}
+                      for record_id, changes in updates.items()))
+
+    def set(self, key, value):
+        """Journal a replacement of the top-level ``key`` value"""
+        self._write({'op': 'set', 'key': key, 'value': value})
+
+    def next_id(self, key, count=1, field='id'):
+        """Reserve ``count`` consecutive integer ids for ``key`` and return the first.
+
+        Counters are seeded from the highest ``field`` value already in the
+        collection, so data written before the allocator existed keeps its ids.
+        """
+        counter = key if field == 'id' else f'{key}.{field}'
+        reserved = []
+
+        def reserve(counters):
+            last = counters.get(counter)
+            if last is None:
+                last = max_record_id(self.data.get(key, []), field)
+            reserved.append(last + 1)
+            return {**counters, counter: last + count}
+
+        with self.lock:
+            update_json(self.ids_path, reserve, fsync=False)
+        return reserved[0]
+
+    def _write(self, *entries):
+        if not entries:
+            return
+        # Background jobs write from their own threads and other processes may share
+        # the files; keep seq and the file in order across both
+        with self.lock, file_lock(self.lock_path):
+            self._catch_up()
+            lines = []
+            for entry in entries:
+                self.seq += 1
+                entry['seq'] = self.seq
+                lines.append(json.dumps(entry, default=encode_value) + '\n')
+            text = ''.join(lines)
+            with open(self.journal_path, 'a') as f:
+                f.write(text)
+            self.journal_offset += len(text.encode())
+            self.pending += len(lines)
+            self.signature = self._stat()
+        if self.compact and self.pending >= self.compact_every and self._journal_outgrew_snapshot():
+            self.compact()
+
+    def save(self, data):
+        """Write a full snapshot and discard the journal it supersedes.
+
+        Entries other processes journaled since our last look are merged into
+        ``data`` first; if another process replaced the snapshot, our copy is
+        out of date and the snapshot is compacted from disk instead.
+        """
+        with self.lock, file_lock(self.lock_path):
+            self._catch_up()
+            if self.snapshot_replaced:
+                data = self._read_disk()
+            elif self.foreign:
+                data = self._merge(data, self.foreign)
+            self._write_snapshot({**data, '_seq': self.seq})
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.journal_offset = 0
+            self.snapshot_signature = self._stat()[0]
+            self.pending = 0
+            self.signature = self._stat()
+
+    def _merge(self, data, entries):
+        """Apply ``entries`` to a copy of ``data``, leaving the caller's records untouched"""
+        merged = dict(data)
+        copied = set()
+        indexes = {}
+        for entry in entries:
+            key = entry['key']
+            if key not in copied and isinstance(merged.get(key), MutableSequence):
+                merged[key] = [dict(r) if isinstance(r, Mapping) else r for r in merged[key]]
+                copied.add(key)
+            self._apply(merged, entry, indexes)
+        return merged
@@ -0,0 +1,139 @@
+"""
+Batched counters shared across processes
+"""
+import atexit
+import os
+import threading
+from collections import deque
+from src.config.constants import METRICS_FLUSH_INTERVAL
+from src.storage.files import read_json, update_json
+
+
+class MetricsStore:
+    """Named integer counters kept in one JSON file shared by every process.
+
+    ``increment`` only appends to a deque, which any thread may do without
+    taking a lock. A background thread folds the pending increments into
+    the file every ``interval`` seconds with a single locked
+    read-add-write, so several processes add to the same totals instead of
+    overwriting each other, and a burst of increments costs one write.
+    Reads return the file's totals plus this process's pending increments.
+    """
+
+    def __init__(self, path, interval=METRICS_FLUSH_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.pending = deque()
+        self.totals = {}
+        self.signature = None
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        """Add ``value`` to the ``name`` counter"""
+        self.pending.append((name, value))
+        if self.thread is None:
+            self._start()
+
+    def _start(self):
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing metrics: {e}")
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _refresh(self):
+        signature = self._stat()
+        if signature != self.signature:
+            self.totals = read_json(self.path, {})
+            self.signature = signature
+
+    def _write(self, update):
+        self.totals = update_json(self.path, update, indent=2)
+        self.signature = self._stat()
+
+    def flush(self):
+        """Write pending increments to the shared file now"""
+        with self.flush_lock:
+            deltas = {}
+            while True:
+                try:
+                    name, value = self.pending.popleft()
+                except IndexError:
+                    break
+                deltas[name] = deltas.get(name, 0) + value
+            if not deltas:
+                return
+
+            def add(totals):
+                for name, value in deltas.items():
+                    totals[name] = totals.get(name, 0) + value
+                return totals
+
+            self._write(add)
+
+    def seed(self, values):
+        """Initialise counters the shared file does not have yet from ``values``"""
+        def fill(totals):
+            missing = {
+                name: value for name, value in values.items()
+                if name not in totals and isinstance(value, (int, float))
+            }
+            return {**totals, **missing} if missing else None
+
+        with self.flush_lock:
+            self._write(fill)
+
+    def snapshot(self):
+        """Every counter, including increments not written yet"""
+        with self.flush_lock:
+            self._refresh()
+            totals = dict(self.totals)
+            for name, value in tuple(self.pending):
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def get(self, name):
+        """Current value of the ``name`` counter"""
+        return self.snapshot().get(name, 0)
+
+
+_stores = {}
+_lock = threading.Lock()
+
+
+def get_metrics_store(path):
+    """Get the process-wide MetricsStore for ``path``"""
+    path = os.path.abspath(path)
+    with _lock:
+        if path not in _stores:
+            _stores[path] = MetricsStore(path)
+        return _stores[path]
+
+
+def flush_metrics():
+    """Write every store's pending increments; runs at interpreter exit"""
+    with _lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+atexit.register(flush_metrics)
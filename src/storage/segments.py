@@ -0,0 +1,146 @@
+"""
+Sealed segment files for archived records
+"""
+import json
+import os
+import re
+from bisect import bisect_right
+from datetime import datetime
+from src.storage.files import update_json, write_atomic
+from src.storage.journal import encode_value
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class SegmentArchive:
+    """Per-channel archive of immutable JSONL segment files.
+
+    Records leave the live store in fixed-size, ``seq``-ordered batches.
+    Each batch is written once to ``<directory>/<channel>/<first seq>.jsonl``
+    and never touched again; ``manifest.json`` lists every channel's segments
+    with their seq and timestamp ranges, so a page lookup only opens the
+    segments that overlap the requested range.
+
+    Derived data about a segment, such as its search postings, can be kept
+    in a JSON sidecar next to it with ``write_sidecar``.
+
+    Timestamps are compared as ISO-8601 strings, which order correctly as
+    long as every record uses the same naive ``datetime.isoformat`` form.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+
+    def segments(self, channel):
+        """Segment entries for ``channel``, oldest first"""
+        return self.manifest.get(channel, [])
+
+    def last_seq(self, channel):
+        """Highest seq archived for ``channel``, or 0"""
+        segments = self.segments(channel)
+        return segments[-1]['last_seq'] if segments else 0
+
+    def count(self, channel):
+        """Number of archived records for ``channel``"""
+        return sum(segment['count'] for segment in self.segments(channel))
+
+    def seal(self, channel, records):
+        """Write seq-ordered ``records`` as a new segment and add it to the manifest"""
+        folder = re.sub(r'[^0-9A-Za-z_-]', '_', channel)
+        os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+        name = os.path.join(folder, f"{records[0]['seq']:012d}.jsonl")
+        write_atomic(
+            os.path.join(self.directory, name),
+            ''.join(json.dumps(record, default=encode_value) + '\n' for record in records)
+        )
+        segment = {
+            'file': name,
+            'first_seq': records[0]['seq'],
+            'last_seq': records[-1]['seq'],
+            'first_timestamp': _iso(records[0].get('timestamp')),
+            'last_timestamp': _iso(records[-1].get('timestamp')),
+            'count': len(records),
+            'unread': sum(1 for record in records if not record.get('read', False))
+        }
+
+        def add_segment(manifest):
+            # Merge with segments other processes sealed since we loaded the manifest
+            segments = [s for s in manifest.get(channel, []) if s['file'] != name] + [segment]
+            return {**manifest, channel: sorted(segments, key=lambda s: s['first_seq'])}
+
+        self.manifest = update_json(self.manifest_path, add_segment, indent=2)
+
+    def read(self, segment):
+        """Load every record in a segment"""
+        with open(os.path.join(self.directory, segment['file']), 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def _sidecar_path(self, segment, kind):
+        return os.path.join(self.directory, segment['file'][:-len('.jsonl')] + f'.{kind}.json')
+
+    def read_sidecar(self, segment, kind):
+        """Load a segment's ``kind`` sidecar, or None if it has not been written"""
+        try:
+            with open(self._sidecar_path(segment, kind), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_sidecar(self, segment, kind, data):
+        """Write derived data for a segment next to it"""
+        write_atomic(self._sidecar_path(segment, kind), json.dumps(data), fsync=False)
+
+    def by_seq(self, channel, seqs):
+        """Archived records for ``seqs`` as {seq: record}, reading each covering segment once"""
+        segments = self.segments(channel)
+        starts = [segment['first_seq'] for segment in segments]
+        wanted = {}
+        for seq in seqs:
+            position = bisect_right(starts, seq) - 1
+            if position >= 0 and seq <= segments[position]['last_seq']:
+                wanted.setdefault(position, set()).add(seq)
+        found = {}
+        for position, group in wanted.items():
+            for record in self.read(segments[position]):
+                if record['seq'] in group:
+                    found[record['seq']] = record
+        return found
+
+    def before(self, channel, field, bound, limit):
+        """Up to ``limit`` of the newest records whose ``field`` is below ``bound``, oldest first"""
+        page = []
+        for segment in reversed(self.segments(channel)):
+            if len(page) >= limit:
+                break
+            if segment[f'first_{field}'] >= bound:
+                continue
+            records = [r for r in self.read(segment) if _iso(r[field]) < bound]
+            page = records[-(limit - len(page)):] + page
+        return page
+
+    def after(self, channel, field, bound, limit):
+        """Up to ``limit`` of the oldest records whose ``field`` is above ``bound``, oldest first"""
+        page = []
+        for segment in self.segments(channel):
+            if len(page) >= limit:
+                break
+            if segment[f'last_{field}'] <= bound:
+                continue
+            records = [r for r in self.read(segment) if _iso(r[field]) > bound]
+            page.extend(records[:limit - len(page)])
+        return page
+
+    def find(self, channel, record_id):
+        """Find an archived record by id, searching the newest segments first"""
+        for segment in reversed(self.segments(channel)):
+            for record in self.read(segment):
+                if record['id'] == record_id:
+                    return record
+        return None
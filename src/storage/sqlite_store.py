@@ -0,0 +1,247 @@
+"""
+SQLite storage backend with indexed queries
+"""
+import json
+import re
+import sqlite3
+import threading
+from src.config.constants import SQLITE_INDEXED_FIELDS
+from src.storage.journal import encode_value
+
+
+class SQLiteStore:
+    """Drop-in replacement for JournalStore backed by a SQLite database.
+
+    Each list collection of a store lives in its own table named
+    ``<store>__<collection>``; the record itself is kept as JSON and the
+    fields in ``SQLITE_INDEXED_FIELDS`` are copied into indexed columns so
+    ``query`` and ``count`` never scan the whole table. Non-list values
+    (e.g. ``system_metrics``) go into a ``<store>__values`` key/value table
+    and ``next_id`` counters into ``<store>__sequences``.
+    """
+
+    def __init__(self, database, name, compact=None):
+        self.database = database
+        self.name = name
+        self.compact = compact  # unused; SQLite writes are already incremental
+        self.fields = list(SQLITE_INDEXED_FIELDS)
+        self.lock = threading.Lock()
+        self.tables = set()
+        self.data_version = None
+        self.conn = sqlite3.connect(database, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}__values" (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}__sequences" (key TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+
+    def _table(self, key):
+        table = f"{self.name}__{re.sub(r'[^0-9A-Za-z_]', '_', key)}"
+        if table not in self.tables:
+            columns = ', '.join(f'"{field}"' for field in self.fields)
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" '
+                f'(seq INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, data TEXT NOT NULL)'
+            )
+            for field in self.fields:
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}__{field}" ON "{table}" ("{field}")')
+            self.tables.add(table)
+        return table
+
+    def _row(self, record):
+        return [record.get(field) for field in self.fields] + [json.dumps(record, default=encode_value)]
+
+    def _insert_sql(self, table):
+        placeholders = ', '.join('?' * (len(self.fields) + 1))
+        columns = ', '.join(f'"{field}"' for field in self.fields)
+        return f'INSERT INTO "{table}" ({columns}, data) VALUES ({placeholders})'
+
+    def load(self):
+        """Load every collection and value belonging to this store"""
+        data = {}
+        with self.lock:
+            prefix = f'{self.name}__'
+            tables = self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+                (prefix.replace('_', '\\_') + '%',)
+            ).fetchall()
+            for (table,) in tables:
+                if table in (f'{self.name}__values', f'{self.name}__sequences'):
+                    continue
+                self.tables.add(table)
+                rows = self.conn.execute(f'SELECT data FROM "{table}" ORDER BY seq')
+                data[table[len(prefix):]] = [json.loads(row[0]) for row in rows]
+            for key, value in self.conn.execute(f'SELECT key, value FROM "{self.name}__values"'):
+                data[key] = json.loads(value)
+            self.data_version = self._data_version()
+        return data
+
+    def _data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def is_stale(self):
+        """Check whether another connection committed changes since ``load``"""
+        with self.lock:
+            return self._data_version() != self.data_version
+
+    @property
+    def foreign_writes(self):
+        """Changes to compare against an earlier value; only other connections' commits move it"""
+        with self.lock:
+            return self._data_version()
+
+    def _where(self, filters):
+        clauses, params, remaining = [], [], {}
+        for field, value in filters.items():
+            if field in self.fields:
+                clauses.append(f'"{field}" IS ?')
+                params.append(value)
+            else:
+                remaining[field] = value
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params, remaining
+
+    def query(self, key, **filters):
+        """Get records in ``key`` whose fields equal every filter value"""
+        where, params, remaining = self._where(filters)
+        with self.lock:
+            table = self._table(key)
+            rows = self.conn.execute(f'SELECT data FROM "{table}"{where} ORDER BY seq', params).fetchall()
+        records = [json.loads(row[0]) for row in rows]
+        return [r for r in records if all(r.get(f) == v for f, v in remaining.items())]
+
+    def count(self, key, **filters):
+        """Count records in ``key`` whose fields equal every filter value"""
+        where, params, remaining = self._where(filters)
+        if remaining:
+            return len(self.query(key, **filters))
+        with self.lock:
+            table = self._table(key)
+            return self.conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', params).fetchone()[0]
+
+    def append(self, key, record):
+        """Insert a record into the ``key`` collection"""
+        with self.lock, self.conn:
+            self.conn.execute(self._insert_sql(self._table(key)), self._row(record))
+
+    def extend(self, key, records):
+        """Insert a batch of records into ``key`` in one transaction"""
+        with self.lock, self.conn:
+            self.conn.executemany(self._insert_sql(self._table(key)), [self._row(r) for r in records])
+
+    def update(self, key, record_id, changes):
+        """Apply field changes to the record with ``record_id`` in ``key``"""
+        self.update_many(key, {record_id: changes})
+
+    def update_many(self, key, updates):
+        """Apply field changes to several records ({record id: changes}) in one transaction"""
+        with self.lock, self.conn:
+            table = self._table(key)
+            assignments = ', '.join(f'"{field}" = ?' for field in self.fields)
+            for record_id, changes in updates.items():
+                row = self.conn.execute(f'SELECT seq, data FROM "{table}" WHERE id IS ?', (record_id,)).fetchone()
+                if row is None:
+                    continue
+                record = {**json.loads(row[1]), **changes}
+                self.conn.execute(
+                    f'UPDATE "{table}" SET {assignments}, data = ? WHERE seq = ?', self._row(record) + [row[0]]
+                )
+
+    def next_id(self, key, count=1, field='id'):
+        """Reserve ``count`` consecutive integer ids for ``key`` and return the first"""
+        counter = key if field == 'id' else f'{key}.{field}'
+        column = f'"{field}"' if field in self.fields else f"json_extract(data, '$.{field}')"
+        with self.lock, self.conn:
+            table = self._table(key)
+            # The seeding insert takes the write lock before anything is read
+            self.conn.execute(
+                f'INSERT OR IGNORE INTO "{self.name}__sequences" (key, value) '
+                f'SELECT ?, COALESCE(MAX({column}), 0) FROM "{table}" WHERE typeof({column}) = \'integer\'',
+                (counter,)
+            )
+            self.conn.execute(
+                f'UPDATE "{self.name}__sequences" SET value = value + ? WHERE key = ?', (count, counter)
+            )
+            last = self.conn.execute(
+                f'SELECT value FROM "{self.name}__sequences" WHERE key = ?', (counter,)
+            ).fetchone()[0]
+        return last - count + 1
+
+    def set(self, key, value):
+        """Replace the top-level ``key`` value"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'INSERT OR REPLACE INTO "{self.name}__values" (key, value) VALUES (?, ?)',
+                (key, json.dumps(value, default=encode_value))
+            )
+
+    def save(self, data):
+        """Replace the stored contents with ``data`` in one transaction"""
+        with self.lock, self.conn:
+            for key, value in data.items():
+                if isinstance(value, list):
+                    table = self._table(key)
+                    self.conn.execute(f'DELETE FROM "{table}"')
+                    self.conn.executemany(self._insert_sql(table), [self._row(r) for r in value])
+                else:
+                    self.conn.execute(
+                        f'INSERT OR REPLACE INTO "{self.name}__values" (key, value) VALUES (?, ?)',
+                        (key, json.dumps(value, default=encode_value))
+                    )
+
+
+def list_partitions(database, name):
+    """Partition keys of the per-user ``user_<partition>__<name>`` stores in ``database``"""
+    conn = sqlite3.connect(database)
+    try:
+        suffix = f'__{name}__values'
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+            ('user\\_%' + suffix.replace('_', '\\_'),)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [table[len('user_'):-len(suffix)] for (table,) in rows]
+
+
+def _store_tables(conn, name):
+    return [table for (table,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+        (f'{name}__'.replace('_', '\\_') + '%',)
+    )]
+
+
+def _has_rows(conn, tables):
+    return any(conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone() for table in tables)
+
+
+def move_store(database, name, new_name):
+    """Rename the tables of store ``name`` to ``new_name``; returns whether anything moved.
+
+    Nothing moves unless ``name`` holds data and ``new_name`` holds none; the
+    empty tables a store creates when it is opened are dropped to make room.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        with conn:
+            source, target = _store_tables(conn, name), _store_tables(conn, new_name)
+            if not _has_rows(conn, source) or _has_rows(conn, target):
+                return False
+            for table in target:
+                conn.execute(f'DROP TABLE "{table}"')
+            for table in source:
+                moved = new_name + table[len(name):]
+                conn.execute(f'ALTER TABLE "{table}" RENAME TO "{moved}"')
+                # Indexes keep their old names; the store recreates them under the new table's
+                indexes = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (moved,)
+                ).fetchall()
+                for (index,) in indexes:
+                    conn.execute(f'DROP INDEX "{index}"')
+    finally:
+        conn.close()
+    return True
@@ -0,0 +1,141 @@
+"""
+Write-behind queue for store writes
+"""
+import atexit
+import queue
+import threading
+import weakref
+
+_live_stores = weakref.WeakSet()
+
+
+def flush_all():
+    """Flush every live write-behind store; runs at interpreter exit"""
+    for store in list(_live_stores):
+        store.flush()
+
+
+atexit.register(flush_all)
+
+
+class WriteBehindStore:
+    """Wraps a store so writes are queued and applied by a background thread.
+
+    ``append``, ``extend``, ``update``, ``update_many`` and ``set`` return as
+    soon as the operation is queued. The writer thread waits up to
+    ``interval`` seconds after the first queued operation, then drains the
+    queue and applies it with one store call per run of consecutive
+    operations of the same kind, so a burst of messages becomes a single
+    journal write. The queue is bounded: once it is half full the thread
+    stops waiting, and when it is full writers block until it catches up.
+
+    ``flush`` blocks until everything queued so far is on disk; ``save``
+    flushes first so a snapshot never races queued entries. Compaction
+    requested by the wrapped store is deferred to the next queued write on
+    the caller's thread, because the callback reads the owning manager's
+    state. Every other attribute is read straight from the wrapped store.
+    The thread exits once the queue stays empty and is restarted on demand;
+    ``flush_all`` drains every instance before the interpreter exits.
+    """
+
+    def __init__(self, store, interval, maxsize):
+        self.store = store
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.compact = store.compact
+        self.compaction_due = False
+        store.compact = self._request_compaction
+        _live_stores.add(self)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _request_compaction(self):
+        self.compaction_due = True
+
+    def _enqueue(self, op, key, value):
+        self.queue.put((op, key, value))
+        if self.queue.qsize() * 2 >= self.queue.maxsize:
+            self.wakeup.set()  # don't let a long burst stall on the full queue
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self.thread.start()
+        if self.compaction_due and self.compact:
+            self.compaction_due = False
+            self.compact()
+
+    def append(self, key, record):
+        """Queue a record appended to the ``key`` collection"""
+        self._enqueue('extend', key, [record])
+
+    def extend(self, key, records):
+        """Queue a batch of records appended to ``key``"""
+        self._enqueue('extend', key, list(records))
+
+    def update(self, key, record_id, changes):
+        """Queue field changes to the record with ``record_id`` in ``key``"""
+        self._enqueue('update_many', key, {record_id: changes})
+
+    def update_many(self, key, updates):
+        """Queue field changes to several records in ``key``"""
+        self._enqueue('update_many', key, dict(updates))
+
+    def set(self, key, value):
+        """Queue a replacement of the top-level ``key`` value"""
+        self._enqueue('set', key, value)
+
+    def flush(self):
+        """Block until every queued write has been applied"""
+        self.wakeup.set()
+        self.queue.join()
+
+    def save(self, data):
+        """Flush queued writes, then write a full snapshot"""
+        self.flush()
+        self.store.save(data)
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.interval + 1)
+            except queue.Empty:
+                with self.lock:
+                    if self.queue.empty():
+                        self.thread = None
+                        return
+                continue
+            # Give a burst time to accumulate unless someone is waiting on flush()
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as e:
+                print(f"Error writing queued changes: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _apply(self, batch):
+        runs = []
+        for op, key, value in batch:
+            if runs and runs[-1][0] == op and runs[-1][1] == key and op != 'set':
+                merged = runs[-1][2]
+                if op == 'extend':
+                    merged.extend(value)
+                else:
+                    for record_id, changes in value.items():
+                        merged[record_id] = {**merged.get(record_id, {}), **changes}
+            else:
+                runs.append((op, key, value))
+        for op, key, value in runs:
+            getattr(self.store, op)(key, value)
@@ -3,12 +3,15 @@ Authentication UI Components
 """
 import streamlit as st
 from datetime import datetime
-from src.managers.admin import AdminSystem
+from src.managers.registry import get_manager, claim_shared_data
 from src.config.constants import DEFAULT_ADMIN_USERS
+from src.utils.session import clear_message_state
 
 
 def login_user(username, plan='basic'):
     """Login user and set session state"""
+    # Data saved before every user had their own partitions goes to one of them
+    claim_shared_data(username)
     st.session_state.user_logged_in = True
     st.session_state.user_plan = plan
     st.session_state.user_data = {
@@ -25,11 +28,12 @@ def logout_user():
     st.session_state.user_data = {}
     st.session_state.show_messaging = False
     st.session_state.show_message_history = False
+    clear_message_state()
 
 
 def login_admin(username, password):
     """Login admin user"""
-    admin_system = AdminSystem()
+    admin_system = get_manager('admin')
     auth_result = admin_system.authenticate_admin(username, password)
     
     if auth_result['authenticated']:
@@ -2,7 +2,7 @@
 Signup UI Components
 """
 import streamlit as st
-from src.managers.client_intake import ClientIntakeManager
+from src.managers.registry import get_manager
 from src.config.constants import SERVICE_PLANS
 
 
@@ -22,8 +22,8 @@ def render_signup_form():
     st.write(f"**Step {st.session_state.signup_step} of 5**")
     st.markdown("---")
     
-    # Initialize intake manager
-    intake_manager = ClientIntakeManager()
+    # Shared intake manager
+    intake_manager = get_manager('client_intake')
     
     # Step 1: Account Information
     if st.session_state.signup_step == 1:
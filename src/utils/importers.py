@@ -0,0 +1,209 @@
+"""
+Streaming importers for bank and budgeting-app exports (CSV, JSONL, OFX)
+
+Every reader and mapper here is a generator, so a multi-year export is
+parsed one row at a time: readers turn a file into plain row dicts, mappers
+turn rows into the ExpenseManager or InvestmentManager record schema, and
+``batched`` groups the result for the managers' bulk-add methods. Memory use
+is bounded by the batch size, not the file size.
+"""
+import csv
+import json
+import re
+from datetime import datetime
+from itertools import islice
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y', '%Y%m%d']
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+# Candidate column names (lower-case) for each field, first match wins
+EXPENSE_COLUMNS = {
+    'date': ['date', 'transaction date', 'posted date', 'posting date'],
+    'description': ['description', 'payee', 'merchant', 'name', 'memo'],
+    'amount': ['outflow', 'amount', 'debit'],
+    'category': ['category', 'category group/category'],
+    'external_id': ['transaction id', 'fitid', 'id']
+}
+
+# Amount columns that only ever hold spending; any other amount column is signed
+DEBIT_COLUMNS = {'outflow', 'debit'}
+
+INVESTMENT_COLUMNS = {
+    'symbol': ['symbol', 'ticker'],
+    'name': ['name', 'security name', 'security', 'description'],
+    'shares': ['shares', 'quantity', 'qty'],
+    'price': ['price', 'last price', 'share price'],
+    'account_id': ['account_id', 'account number', 'account'],
+    'investment_type': ['investment_type', 'security type', 'asset type', 'type'],
+    'purchase_date': ['purchase_date', 'purchase date', 'acquired', 'date']
+}
+
+
+def parse_date(value):
+    """Normalise a date string to YYYY-MM-DD, or None if it cannot be parsed"""
+    value = str(value or '').strip()[:10]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    # OFX timestamps look like 20240105120000[-5:EST]
+    if len(value) >= 8 and value[:8].isdigit():
+        try:
+            return datetime.strptime(value[:8], '%Y%m%d').strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    return None
+
+
+def parse_amount(value):
+    """Parse '$1,234.50', '(12.00)' or '-5' into a float, or None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').strip().replace('$', '').replace(',', '')
+    if text.startswith('(') and text.endswith(')'):
+        text = '-' + text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` items without materialising the input"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_csv_rows(lines):
+    """Yield CSV rows as dicts with lower-cased, stripped header names"""
+    for row in csv.DictReader(lines):
+        yield {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+
+
+def read_jsonl_rows(lines):
+    """Yield one dict per non-blank JSONL line, with lower-cased keys.
+
+    A malformed line yields an empty row so the manager counts it as
+    invalid instead of aborting the rest of the import.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield {}
+            continue
+        yield {str(key).strip().lower(): value for key, value in row.items()}
+
+
+def read_rows(path, lines):
+    """Pick the row reader for a file from its extension"""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        return read_jsonl_rows(lines)
+    return read_csv_rows(lines)
+
+
+def _pick_column(row, candidates):
+    for column in candidates:
+        value = row.get(column)
+        if value not in (None, ''):
+            return column, value
+    return None, None
+
+
+def _pick(row, candidates):
+    return _pick_column(row, candidates)[1]
+
+
+def _columns(defaults, columns):
+    """Merge caller overrides ({field: column or [columns]}) into the defaults"""
+    merged = dict(defaults)
+    for field, names in (columns or {}).items():
+        merged[field] = [names.lower()] if isinstance(names, str) else [n.lower() for n in names]
+    return merged
+
+
+def map_expense_rows(rows, columns=None, debit_sign='negative'):
+    """Map export rows onto the ExpenseManager expense schema.
+
+    Credits are skipped and spending is returned as positive amounts. A row
+    is a credit if its ``transaction type`` says so, if it has an inflow and
+    no outflow, or if its signed amount column (any amount column outside
+    DEBIT_COLUMNS, without a transaction type) has the opposite sign to
+    ``debit_sign``: bank exports usually show spending as negative, some
+    card exports as positive. Values are left unvalidated;
+    ``ExpenseManager.bulk_add_expenses`` rejects bad rows.
+    """
+    if debit_sign not in ('negative', 'positive'):
+        raise ValueError(f"Unknown debit sign: {debit_sign}")
+    columns = _columns(EXPENSE_COLUMNS, columns)
+    for row in rows:
+        transaction_type = str(row.get('transaction type', '')).lower()
+        if transaction_type == 'credit':
+            continue
+        column, raw_amount = _pick_column(row, columns['amount'])
+        amount = parse_amount(raw_amount)
+        if amount == 0 and row.get('inflow'):
+            continue
+        if amount is not None and column not in DEBIT_COLUMNS and transaction_type != 'debit':
+            if (amount > 0) if debit_sign == 'negative' else (amount < 0):
+                continue
+        yield {
+            'date': _pick(row, columns['date']) or '',
+            'description': _pick(row, columns['description']) or '',
+            'amount': abs(amount) if amount is not None else raw_amount,
+            'category': str(_pick(row, columns['category']) or 'other').lower(),
+            'external_id': _pick(row, columns['external_id'])
+        }
+
+
+def map_investment_rows(rows, columns=None):
+    """Map brokerage position rows onto the InvestmentManager investment schema"""
+    columns = _columns(INVESTMENT_COLUMNS, columns)
+    for row in rows:
+        yield {field: _pick(row, names) for field, names in columns.items()}
+
+
+def read_ofx_transactions(lines):
+    """Yield debit transactions from an OFX/QFX statement, line by line"""
+    current = None
+    for line in lines:
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    amount = parse_amount(current.get('TRNAMT'))
+                    if amount is not None and amount < 0:
+                        yield {
+                            'date': current.get('DTPOSTED', ''),
+                            'description': current.get('NAME') or current.get('MEMO', ''),
+                            'amount': -amount,
+                            'category': 'other',
+                            'external_id': current.get('FITID')
+                        }
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+def iter_expense_records(path, lines, columns=None, debit_sign='negative'):
+    """Stream expense records from an open CSV, JSONL or OFX/QFX export"""
+    if path.lower().endswith(('.ofx', '.qfx')):
+        return read_ofx_transactions(lines)
+    return map_expense_rows(read_rows(path, lines), columns, debit_sign)
+
+
+def iter_investment_records(path, lines, columns=None):
+    """Stream investment records from an open CSV or JSONL positions export"""
+    return map_investment_rows(read_rows(path, lines), columns)
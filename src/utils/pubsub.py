@@ -0,0 +1,167 @@
+"""
+Publish/subscribe for live updates
+
+``LocalBroker`` fans messages out to subscriptions inside this process.
+``RedisBroker`` relays them through any Redis-protocol server (Redis,
+Valkey, KeyDB) so that several app processes see each other's messages; the
+``redis`` package is only needed when it is selected.
+"""
+import json
+import queue
+import threading
+import weakref
+from src.config.constants import PUBSUB_BACKEND, PUBSUB_REDIS_URL, PUBSUB_QUEUE_SIZE
+from src.storage.journal import encode_value
+
+
+class Subscription:
+    """Bounded inbox of (topic, payload) pairs for a set of topics.
+
+    When a subscriber falls behind, the oldest pending item is dropped so a
+    slow reader never blocks publishers.
+    """
+
+    def __init__(self, broker, topics, maxsize=PUBSUB_QUEUE_SIZE):
+        self.broker = broker
+        self.topics = set(topics)
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, topic, payload):
+        while True:
+            try:
+                self.queue.put_nowait((topic, payload))
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Wait up to ``timeout`` seconds for the next (topic, payload), or None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Everything received since the last call, oldest first"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def close(self):
+        """Stop receiving messages"""
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process broker; subscriptions are held weakly and vanish with their owner"""
+
+    def __init__(self):
+        self.subscribers = {}  # topic -> WeakSet of subscriptions
+        self.lock = threading.Lock()
+
+    def subscribe(self, *topics):
+        """Subscribe to ``topics``; returns a Subscription to read from"""
+        subscription = Subscription(self, topics)
+        with self.lock:
+            for topic in topics:
+                self.subscribers.setdefault(topic, weakref.WeakSet()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription from every topic"""
+        with self.lock:
+            for topic in subscription.topics:
+                self.subscribers.get(topic, weakref.WeakSet()).discard(subscription)
+
+    def deliver(self, topic, payload):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.deliver(topic, payload)
+        return len(subscriptions)
+
+    def publish(self, topic, payload):
+        """Send ``payload`` to every subscriber of ``topic``; returns how many received it"""
+        return self.deliver(topic, payload)
+
+    def close(self):
+        """Release broker resources"""
+
+
+class RedisBroker(LocalBroker):
+    """Broker that publishes through Redis pub/sub.
+
+    Payloads are JSON encoded, so datetimes arrive as ISO strings. One
+    listener thread per process receives every subscribed topic and hands
+    the payloads to the local subscriptions.
+    """
+
+    def __init__(self, url=PUBSUB_REDIS_URL):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis pub/sub backend requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+        self.thread.start()
+
+    def subscribe(self, *topics):
+        """Subscribe to ``topics`` locally and on the server"""
+        subscription = super().subscribe(*topics)
+        self.pubsub.subscribe(*topics)
+        return subscription
+
+    def publish(self, topic, payload):
+        """Publish ``payload`` to every process subscribed to ``topic``"""
+        return self.client.publish(topic, json.dumps(payload, default=encode_value))
+
+    def _listen(self):
+        while not self.stop_event.is_set():
+            if not self.pubsub.subscribed:
+                self.stop_event.wait(0.1)
+                continue
+            try:
+                message = self.pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                print(f"Error receiving published messages: {e}")
+                self.stop_event.wait(1.0)
+                continue
+            if message and message['type'] == 'message':
+                topic = message['channel']
+                if isinstance(topic, bytes):
+                    topic = topic.decode()
+                self.deliver(topic, json.loads(message['data']))
+
+    def close(self):
+        """Stop the listener thread and close the connection"""
+        self.stop_event.set()
+        self.thread.join()
+        self.pubsub.close()
+
+
+_broker = None
+_lock = threading.Lock()
+
+
+def get_broker(backend=None):
+    """Get the process-wide broker for the configured backend"""
+    global _broker
+    with _lock:
+        if _broker is None:
+            backend = backend or PUBSUB_BACKEND
+            if backend == 'local':
+                _broker = LocalBroker()
+            elif backend == 'redis':
+                _broker = RedisBroker()
+            else:
+                raise ValueError(f"Unknown pub/sub backend: {backend}")
+        return _broker
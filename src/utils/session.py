@@ -37,6 +37,24 @@ def get_user_data():
     return st.session_state.get('user_data', {})
 
 
+def get_user_id():
+    """Get the id whose data partition the current user works in"""
+    return get_user_data().get('username')
+
+
+def get_message_state():
+    """Get the live message feed state this session keeps for the current user"""
+    states = st.session_state.setdefault('message_state', {})
+    return states.setdefault(get_user_id(), {'subscription': None, 'page': None, 'pushed_counts': {}, 'cursors': {}})
+
+
+def clear_message_state():
+    """Drop the message feed state of every user of this session, closing subscriptions"""
+    for state in st.session_state.pop('message_state', {}).values():
+        if state['subscription'] is not None:
+            state['subscription'].close()
+
+
 def is_admin_logged_in():
     """Check if admin is logged in"""
     return st.session_state.get('admin_logged_in', False)
@@ -6,6 +6,16 @@ import tempfile
 import os
 import json
 from unittest.mock import patch, mock_open
+from src.storage.write_behind import flush_all
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    """Run each test in an empty directory so DATA_FILES never touch the repo"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    # Queued writes use relative paths, so drain them before leaving the directory
+    flush_all()
 
 
 @pytest.fixture
@@ -7,7 +7,17 @@ import os
 sys.path.append('.')
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from src.managers.ai_agent import AIAgentSystem
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from string import Template
+from unittest.mock import patch
+from src.managers import ai_agent as ai_agent_module
+from src.managers.ai_agent import AIAgentSystem, TaskResumeJob
+from src.managers.expense import ExpenseManager
+from src.managers.recommendations import RecommendationEngine
 
 
 class TestAIAgentSystem:
@@ -68,6 +78,217 @@ class TestAIAgentSystem:
         
         assert isinstance(recommendations, list)
         assert len(recommendations) >= 0
+    
+    def test_recommendations_for_unknown_service(self):
+        """Test the fallback for a service type without templates"""
+        assert self.ai_system.generate_ai_recommendations('premium', 'gardening') == ['AI analysis in progress...']
+    
+    def test_recommendations_use_manager_data(self):
+        """Test that templates are filled in from the managers and skipped without data"""
+        expense_manager = ExpenseManager()
+        managers = {'expense': expense_manager}
+        
+        assert len(self.ai_system.generate_ai_recommendations('basic', 'expense', managers.get)) == 2
+        expense_manager.add_expense('travel', 1200.0, 'Flights', '2024-01-01')
+        expense_manager.add_expense('food', 30.5, 'Lunch', '2024-01-02')
+        recommendations = self.ai_system.generate_ai_recommendations('basic', 'expense', managers.get)
+        
+        assert recommendations[1] == "You've spent $1,230.50 so far; travel is your largest category."
+        assert recommendations[0].startswith('Based on your basic plan')
+
+
+class TestRecommendationEngine:
+    """Test cases for compiled, cached recommendation templates"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.engine = RecommendationEngine({'tax': ['$plan: ${refills_due} due', 'Hello $plan']})
+    
+    def test_templates_compiled_once_and_cached(self):
+        """Test that rendering reuses cached output until the context changes"""
+        assert self.engine.fields['tax'] == {'refills_due'}
+        
+        with patch.object(Template, 'substitute', autospec=True, side_effect=Template.substitute) as substitute:
+            self.engine.render('elite', 'tax', {'refills_due': 2, 'unused': 1})
+            self.engine.render('elite', 'tax', {'refills_due': 2})
+            assert substitute.call_count == 2
+            self.engine.render('elite', 'tax', {'refills_due': 3})
+            assert substitute.call_count == 4
+        
+        assert self.engine.render('elite', 'tax', {'refills_due': 3}) == ['elite: 3 due', 'Hello elite']
+        assert self.engine.render('basic', 'tax') == ['Hello basic']
+
+
+
+class TestAgentTasks:
+    """Test cases for the per-agent task worker pools"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.ai_system = AIAgentSystem()
+    
+    def teardown_method(self):
+        """Stop worker pools after each test"""
+        self.ai_system.close()
+    
+    def test_concurrency_limit_per_agent(self, monkeypatch):
+        """Test that an agent never runs more tasks at once than its pool allows"""
+        monkeypatch.setitem(ai_agent_module.AI_AGENT_CONCURRENCY, 'tax_agent', 2)
+        lock = threading.Lock()
+        running = []
+        peak = []
+        
+        def handler(agent_type, description):
+            with lock:
+                running.append(description)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(description)
+            return description.upper()
+        
+        task_ids = [self.ai_system.submit_task('tax_agent', f'task {i}', handler) for i in range(6)]
+        tasks = [self.ai_system.wait_for_task(task_id, timeout=5) for task_id in task_ids]
+        
+        assert max(peak) == 2
+        assert [task['result'] for task in tasks] == [f'TASK {i}' for i in range(6)]
+        assert self.ai_system.agents['tax_agent']['tasks_completed'] == 6
+        assert self.ai_system.submit_task('unknown_agent', 'task') is None
+    
+    def test_task_state_and_metrics_persist(self):
+        """Test that finished tasks, failures and counters survive a reload"""
+        def fail(agent_type, description):
+            raise RuntimeError('provider unavailable')
+        
+        done = self.ai_system.submit_task('travel_agent', 'Book hotel', lambda agent, description: 'booked')
+        failed = self.ai_system.submit_task('travel_agent', 'Book flight', fail)
+        self.ai_system.wait_for_task(done, timeout=5)
+        self.ai_system.wait_for_task(failed, timeout=5)
+        
+        reloaded = AIAgentSystem()
+        metrics = reloaded.get_task_metrics()['travel_agent']
+        
+        assert reloaded.get_task(done)['result'] == 'booked'
+        assert reloaded.get_task(failed)['error'] == 'provider unavailable'
+        assert [t['id'] for t in reloaded.get_tasks(status='failed')] == [failed]
+        assert reloaded.agents['travel_agent']['tasks_completed'] == 1
+        assert (metrics['completed'], metrics['failed'], metrics['queued']) == (1, 1, 0)
+        assert metrics['throughput_per_minute'] > 0
+        assert metrics['avg_run_seconds'] >= 0
+    
+    def test_interrupted_tasks_resume(self, monkeypatch):
+        """Test that tasks left queued or running by a previous process run again"""
+        monkeypatch.setattr(ai_agent_module, 'AI_TASK_SIMULATED_SECONDS', 0)
+        task_id = self.ai_system.store.next_id('tasks')
+        self.ai_system.store.append('tasks', {
+            'id': task_id, 'agent_type': 'medical_agent', 'description': 'Refill', 'status': 'running',
+            'submitted_at': '2024-01-01T09:00:00', 'started_at': '2024-01-01T09:00:01'
+        })
+        
+        reloaded = AIAgentSystem()
+        assert reloaded.resume_tasks() == 1
+        task = reloaded.wait_for_task(task_id, timeout=5)
+        reloaded.close()
+        
+        assert task['status'] == 'completed'
+        assert task['result'] == "✅ AI Agent completed: Refill"
+        assert reloaded.resume_tasks() == 0
+    
+    def test_tasks_of_live_owners_are_not_resumed(self, monkeypatch):
+        """Test that only tasks whose owner stopped or let its lease lapse are resumed"""
+        monkeypatch.setattr(ai_agent_module, 'AI_TASK_SIMULATED_SECONDS', 0)
+        finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+        finished.wait()
+        host = socket.gethostname()
+        now = datetime.now()
+        owners = {
+            'live': (f'{host}:{os.getpid()}', now),
+            'stopped': (f'{host}:{finished.pid}', now),
+            'lapsed': ('elsewhere:1', now - timedelta(seconds=ai_agent_module.AI_TASK_LEASE_SECONDS + 1)),
+            'remote': ('elsewhere:1', now)
+        }
+        ids = {}
+        for description, (owner, heartbeat) in owners.items():
+            ids[description] = self.ai_system.store.next_id('tasks')
+            self.ai_system.store.append('tasks', {
+                'id': ids[description], 'agent_type': 'medical_agent', 'description': description,
+                'status': 'running', 'submitted_at': '2024-01-01T09:00:00', 'started_at': '2024-01-01T09:00:01',
+                'owner': owner, 'heartbeat': heartbeat.isoformat()
+            })
+        
+        reloaded = AIAgentSystem()
+        assert reloaded.resume_tasks() == 2
+        for description in ('stopped', 'lapsed'):
+            assert reloaded.wait_for_task(ids[description], timeout=5)['status'] == 'completed'
+        reloaded.close()
+        assert reloaded.get_task(ids['live'])['status'] == 'running'
+        assert reloaded.get_task(ids['remote'])['status'] == 'running'
+    
+    def test_close_lets_queued_tasks_finish(self, monkeypatch):
+        """Test that closing a replaced instance does not drop the tasks queued behind a running one"""
+        monkeypatch.setitem(ai_agent_module.AI_AGENT_CONCURRENCY, 'tax_agent', 1)
+        release = threading.Event()
+        
+        def handler(agent_type, description):
+            release.wait(5)
+            return description
+        
+        task_ids = [self.ai_system.submit_task('tax_agent', f'task {i}', handler) for i in range(3)]
+        self.ai_system.close()
+        release.set()
+        
+        tasks = [self.ai_system.wait_for_task(task_id, timeout=5) for task_id in task_ids]
+        assert [task['status'] for task in tasks] == ['completed'] * 3
+    
+    def test_reload_keeps_tasks_in_flight(self, monkeypatch):
+        """Test that reloading picks up other writers' tasks and keeps running this instance's"""
+        monkeypatch.setitem(ai_agent_module.AI_AGENT_CONCURRENCY, 'tax_agent', 1)
+        release = threading.Event()
+        
+        def handler(agent_type, description):
+            release.wait(5)
+            return description
+        
+        task_ids = [self.ai_system.submit_task('tax_agent', f'task {i}', handler) for i in range(2)]
+        other = AIAgentSystem()
+        other_id = other.submit_task('travel_agent', 'Book hotel', lambda agent, description: 'booked')
+        other.wait_for_task(other_id, timeout=5)
+        other.close()
+        
+        assert self.ai_system.store.is_stale()
+        self.ai_system.reload()
+        release.set()
+        tasks = [self.ai_system.wait_for_task(task_id, timeout=5) for task_id in task_ids]
+        
+        assert all(self.ai_system.get_task(task['id']) is task for task in tasks)
+        assert [task['status'] for task in tasks] == ['completed'] * 2
+        assert self.ai_system.get_task(other_id)['result'] == 'booked'
+        assert self.ai_system.get_task_metrics()['tax_agent']['completed'] == 2
+    
+    def test_resume_job_picks_up_lapsed_tasks(self, monkeypatch):
+        """Test that the periodic job resumes a task once its owner's lease has lapsed"""
+        monkeypatch.setattr(ai_agent_module, 'AI_TASK_SIMULATED_SECONDS', 0)
+        task_id = self.ai_system.store.next_id('tasks')
+        heartbeat = datetime.now() - timedelta(seconds=ai_agent_module.AI_TASK_LEASE_SECONDS + 1)
+        self.ai_system.store.append('tasks', {
+            'id': task_id, 'agent_type': 'medical_agent', 'description': 'Refill', 'status': 'queued',
+            'submitted_at': '2024-01-01T09:00:00', 'owner': ai_agent_module.task_owner(),
+            'heartbeat': heartbeat.isoformat()
+        })
+        reloaded = AIAgentSystem()
+        
+        assert TaskResumeJob(lambda name: reloaded).run_once() == 1
+        assert reloaded.wait_for_task(task_id, timeout=5)['status'] == 'completed'
+        reloaded.close()
+    
+    def test_submitted_tasks_record_their_owner(self):
+        """Test that new tasks carry this process's owner id and a fresh lease"""
+        task_id = self.ai_system.submit_task('medical_agent', 'Refill', handler=lambda agent, description: 'done')
+        task = self.ai_system.wait_for_task(task_id, timeout=5)
+        self.ai_system.close()
+        
+        assert task['owner'] == ai_agent_module.task_owner()
+        assert not ai_agent_module.owner_gone(task)
 
 
 if __name__ == '__main__':
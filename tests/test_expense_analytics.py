@@ -0,0 +1,81 @@
+"""
+Unit tests for the columnar ExpenseAnalytics engine
+"""
+import pytest
+import os
+import sys
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.analytics.expenses import ExpenseAnalytics
+from src.managers.expense import ExpenseManager
+
+
+class TestExpenseAnalytics:
+    """Test cases for ExpenseAnalytics"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.expense_manager = ExpenseManager()
+        self.expense_manager.add_budget('food', 300.00)
+        self.expense_manager.add_expense('food', 100.00, 'Groceries', '2024-01-05')
+        self.expense_manager.add_expense('food', 50.00, 'Dinner', '2024-03-10')
+        self.expense_manager.add_expense('transportation', 30.00, 'Gas', '2024-03-12')
+        removed = self.expense_manager.add_expense('food', 999.00, 'Refunded', '2024-03-15')
+        self.expense_manager.update_expense_status(removed['id'], 'deleted')
+        self.analytics = self.expense_manager.get_analytics()
+
+    def test_matches_running_summary(self):
+        """Test that vectorised totals agree with ExpenseManager's running aggregates"""
+        summary = self.expense_manager.get_expense_summary()
+
+        assert self.analytics.total() == pytest.approx(summary['total_expenses'])
+        assert self.analytics.by_category() == pytest.approx(summary['categories'])
+
+    def test_category_codes(self):
+        """Test that categories are stored as integer codes"""
+        assert self.analytics.categories == ['food', 'transportation']
+        assert list(self.analytics.category_codes) == [0, 0, 1]
+        assert str(self.analytics.to_frame()['category'].dtype) == 'category'
+
+    def test_by_month_fills_gaps(self):
+        """Test monthly totals include months without spend"""
+        assert self.analytics.by_month() == {'2024-01': 100.00, '2024-02': 0.0, '2024-03': 80.00}
+
+    def test_rolling_average(self):
+        """Test the rolling mean over monthly totals"""
+        rolling = self.analytics.rolling_average(window=2)
+
+        assert rolling == pytest.approx({'2024-01': 100.00, '2024-02': 50.00, '2024-03': 40.00})
+
+    def test_budget_vs_actual(self):
+        """Test budget comparison overall and for a single month"""
+        overall = self.analytics.budget_vs_actual()
+        march = self.analytics.budget_vs_actual('2024-03')
+
+        assert overall['food'] == {'budget': 300.00, 'actual': 150.00, 'remaining': 150.00}
+        assert overall['transportation']['remaining'] == -30.00
+        assert march['food']['actual'] == 50.00
+
+    def test_empty(self):
+        """Test analytics over no expenses"""
+        analytics = ExpenseAnalytics([])
+
+        assert analytics.total() == 0.0
+        assert analytics.by_category() == {}
+        assert analytics.by_month() == {}
+        assert analytics.budget_vs_actual() == {}
+
+    def test_unparseable_dates_are_skipped_by_month(self):
+        """Test that bad dates still count towards totals but not months"""
+        analytics = ExpenseAnalytics([
+            {'category': 'food', 'amount': 5.0, 'date': 'not-a-date', 'status': 'active'},
+            {'category': 'food', 'amount': 7.0, 'date': '2024-05-01', 'status': 'active'}
+        ])
+
+        assert analytics.total() == 12.0
+        assert analytics.by_month() == {'2024-05': 7.0}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -82,6 +82,52 @@ class TestExpenseManager:
         assert summary['categories']['food'] >= 225.00  # 150 + 75
         assert summary['categories']['transportation'] >= 50.00
     
+    def test_summary_tracks_status_changes(self):
+        """Test that running totals follow expenses leaving and re-entering active status"""
+        food = self.expense_manager.add_expense('food', 40.00, 'Groceries', '2024-01-01')
+        self.expense_manager.add_expense('transportation', 10.00, 'Bus', '2024-02-01')
+        
+        self.expense_manager.update_expense_status(food['id'], 'deleted')
+        summary = self.expense_manager.get_expense_summary()
+        assert summary['total_expenses'] == 10.00
+        assert 'food' not in summary['categories']
+        assert self.expense_manager.month_totals['2024-01'] == 0
+        
+        self.expense_manager.update_expense_status(food['id'], 'active')
+        summary = self.expense_manager.get_expense_summary()
+        assert summary['total_expenses'] == 50.00
+        assert summary['categories']['food'] == 40.00
+    
+    def test_update_expense_status_invalid(self):
+        """Test updating the status of an unknown expense"""
+        assert self.expense_manager.update_expense_status(999, 'deleted') is None
+    
+    def test_ids_do_not_collide_after_removal(self):
+        """Test that ids keep increasing when records have been removed from the list"""
+        first = self.expense_manager.add_expense('food', 10.00, 'Lunch', '2024-03-01')
+        second = self.expense_manager.add_expense('food', 12.00, 'Dinner', '2024-03-01')
+        self.expense_manager.expenses.remove(first)
+        
+        third = self.expense_manager.add_expense('food', 8.00, 'Snack', '2024-03-02')
+        
+        assert third['id'] == second['id'] + 1
+        assert self.expense_manager.get_expense(third['id']) is third
+        assert ExpenseManager().get_expense(second['id'])['description'] == 'Dinner'
+    
+    def test_aggregates_rebuilt_on_load(self):
+        """Test that a fresh manager rebuilds totals from persisted data"""
+        self.expense_manager.add_budget('food', 500.00)
+        self.expense_manager.add_expense('food', 120.00, 'Groceries', '2024-03-04')
+        expense = self.expense_manager.add_expense('food', 30.00, 'Coffee', '2024-03-05')
+        self.expense_manager.update_expense_status(expense['id'], 'deleted')
+        
+        summary = ExpenseManager().get_expense_summary()
+        
+        assert summary['total_expenses'] == 120.00
+        assert summary['total_budgets'] == 500.00
+        assert summary['remaining_budget'] == 380.00
+        assert summary['categories'] == {'food': 120.00}
+    
     def test_get_monthly_trend(self):
         """Test getting monthly trend"""
         trend = self.expense_manager.get_monthly_trend()
@@ -92,6 +138,135 @@ class TestExpenseManager:
         assert 'change_percent' in trend
         assert 'projected_monthly' in trend
     
+    def test_get_monthly_trend_values(self):
+        """Test that the trend is computed from real expense dates"""
+        from datetime import date
+        self.expense_manager.add_expense('food', 200.00, 'Groceries', '2024-02-20')
+        self.expense_manager.add_expense('food', 100.00, 'Groceries', '2024-03-02')
+        self.expense_manager.add_expense('travel', 50.00, 'Taxi', '2024-03-09')
+        self.expense_manager.add_expense('travel', 75.00, 'Train', '2023-03-09')
+        
+        trend = self.expense_manager.get_monthly_trend(today=date(2024, 3, 10))
+        
+        assert trend['current_month'] == 150.00
+        assert trend['last_month'] == 200.00
+        assert trend['change_percent'] == -25.0
+        assert trend['projected_monthly'] == 465.00  # 150 over 10 of 31 days
+    
+    def test_get_monthly_trend_across_year_boundary(self):
+        """Test that January compares against the previous December"""
+        from datetime import date
+        self.expense_manager.add_expense('food', 80.00, 'Dinner', '2023-12-31')
+        
+        trend = self.expense_manager.get_monthly_trend(today=date(2024, 1, 15))
+        
+        assert trend['current_month'] == 0
+        assert trend['last_month'] == 80.00
+        assert trend['change_percent'] == -100.0
+    
+    def test_bulk_add_expenses(self):
+        """Test validating, de-duplicating and persisting a batch"""
+        self.expense_manager.add_expense('food', 12.00, 'Cafe', '2024-01-01')
+        records = [
+            {'date': '2024-01-01', 'amount': 12.00, 'description': 'Cafe', 'category': 'food'},
+            {'date': '01/02/2024', 'amount': '$1,200.50', 'description': 'Rent', 'category': 'utilities'},
+            {'date': '2024-01-02', 'amount': 1200.50, 'description': 'rent'},
+            {'date': 'yesterday', 'amount': 5, 'description': 'Bad date'},
+            {'date': '2024-01-03', 'amount': 'n/a', 'description': 'Bad amount'},
+            {'date': '2024-01-04', 'amount': 8, 'description': 'Taxi'}
+        ]
+        
+        result = self.expense_manager.bulk_add_expenses(records, app_source='mint')
+        again = self.expense_manager.bulk_add_expenses(records, app_source='mint')
+        
+        # The stored Cafe is matched; both Rent rows are new, each is stored once
+        assert result['added'] == 3
+        assert result['duplicates'] == 1
+        assert result['invalid'] == 2
+        assert result['records_per_second'] > 0
+        assert again['added'] == 0
+        assert again['duplicates'] == 4
+        assert [e['id'] for e in self.expense_manager.expenses] == [1, 2, 3, 4]
+        assert self.expense_manager.expenses[1]['date'] == '2024-01-02'
+        assert self.expense_manager.expenses[3]['category'] == 'other'
+        assert self.expense_manager.get_expense_summary()['total_expenses'] == 2421.00
+        assert len(ExpenseManager().expenses) == 4
+    
+    def test_bulk_add_is_a_single_write(self):
+        """Test that a batch is journaled with one write call"""
+        from unittest.mock import patch
+        records = [{'date': '2024-01-01', 'amount': i + 1, 'description': f'Item {i}'} for i in range(100)]
+        
+        store = self.expense_manager.store
+        with patch.object(store, '_write', wraps=store._write) as mock_write:
+            self.expense_manager.bulk_add_expenses(records)
+        
+        assert mock_write.call_count == 1
+        with open(store.journal_path) as f:
+            assert len(f.readlines()) == 100
+    
+    def test_import_csv_file(self):
+        """Test streaming a YNAB-style CSV export in batches"""
+        with open('ynab.csv', 'w') as f:
+            f.write('Date,Payee,Category,Memo,Outflow,Inflow\n')
+            f.write('01/05/2024,Grocer,Food,,$45.10,$0.00\n')
+            f.write('01/06/2024,Employer,Income,,$0.00,$3000.00\n')
+            f.write('01/07/2024,Cinema,Entertainment,,$20.00,$0.00\n')
+            f.write('01/07/2024,Cinema,Entertainment,,$20.00,$0.00\n')
+        
+        result = self.expense_manager.import_file('ynab.csv', app_source='ynab', batch_size=2)
+        again = self.expense_manager.import_file('ynab.csv', app_source='ynab', batch_size=2)
+        
+        # Two tickets bought the same evening are two expenses; re-importing adds neither again
+        assert result['added'] == 3
+        assert result['duplicates'] == 0
+        assert again['added'] == 0
+        assert again['duplicates'] == 3
+        assert self.expense_manager.get_expense_summary()['categories'] == {'food': 45.10, 'entertainment': 40.00}
+    
+    def test_import_ofx_file(self):
+        """Test importing debits from an OFX statement"""
+        with open('bank.ofx', 'w') as f:
+            f.write('OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n')
+            f.write('<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240110120000\n<TRNAMT>-54.20\n<FITID>A1\n<NAME>Hardware Store\n</STMTTRN>\n')
+            f.write('<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240111<TRNAMT>100.00<FITID>A2<NAME>Refund</STMTTRN>\n')
+            f.write('</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n')
+        
+        first = self.expense_manager.import_file('bank.ofx')
+        second = self.expense_manager.import_file('bank.ofx')
+        
+        assert first['added'] == 1
+        assert second['duplicates'] == 1
+        expense = self.expense_manager.expenses[0]
+        assert expense['amount'] == 54.20
+        assert expense['date'] == '2024-01-10'
+        assert expense['external_id'] == 'A1'
+    
+    def test_import_jsonl_file(self):
+        """Test streaming a JSONL export, counting malformed lines as invalid"""
+        with open('export.jsonl', 'w') as f:
+            f.write('{"date": "2024-03-01", "amount": -12.5, "payee": "Pharmacy", "category": "Health", "id": "t1"}\n')
+            f.write('{"date": "2024-03-02", "amount": "oops"\n')
+            f.write('{"date": "2024-03-03", "amount": -8, "payee": "Bakery", "category": "Food", "id": "t2"}\n')
+        
+        result = self.expense_manager.import_file('export.jsonl', batch_size=2)
+        
+        assert result['added'] == 2
+        assert result['invalid'] == 1
+        assert [e['external_id'] for e in self.expense_manager.expenses] == ['t1', 't2']
+    
+    def test_sync_with_app_import_file(self):
+        """Test that sync_with_app imports a provided export file"""
+        with open('mint.csv', 'w') as f:
+            f.write('Date,Description,Amount,Transaction Type,Category\n')
+            f.write('3/01/2024,Coffee,4.50,debit,Food\n')
+            f.write('3/02/2024,Paycheck,2000.00,credit,Income\n')
+        
+        result = self.expense_manager.sync_with_app('mint', 'import', path='mint.csv')
+        
+        assert result.startswith('Imported 1 expenses from Mint')
+        assert self.expense_manager.expenses[0]['app_source'] == 'mint'
+    
     def test_get_app_info(self):
         """Test getting expense app information"""
         app_info = self.expense_manager.get_app_info('ynab')
@@ -0,0 +1,91 @@
+"""
+Unit tests for the streaming export importers
+"""
+import pytest
+import inspect
+import sys
+import os
+from itertools import count
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.importers import (
+    batched, read_csv_rows, read_jsonl_rows, map_expense_rows, map_investment_rows, iter_expense_records
+)
+
+
+class TestImporters:
+    """Test cases for the importer pipeline"""
+
+    def test_read_csv_rows_normalises_headers(self):
+        """Test that CSV headers are lower-cased and values stripped"""
+        rows = list(read_csv_rows(['Date , Amount\n', '2024-01-01, 5.00 \n']))
+
+        assert rows == [{'date': '2024-01-01', 'amount': '5.00'}]
+
+    def test_read_jsonl_rows_skips_blank_and_flags_malformed(self):
+        """Test that blank lines are skipped and malformed lines become empty rows"""
+        rows = list(read_jsonl_rows(['{"Date": "2024-01-01", "Amount": 5}\n', '\n', '{"broken\n', '[1, 2]\n']))
+
+        assert rows == [{'date': '2024-01-01', 'amount': 5}, {}, {}]
+
+    def test_map_expense_rows_mint_export(self):
+        """Test mapping a Mint-style export, dropping credits"""
+        rows = read_csv_rows([
+            'Date,Description,Original Description,Amount,Transaction Type,Category,Account Name\n',
+            '1/02/2024,Coffee Shop,COFFEE 123,4.50,debit,Restaurants,Checking\n',
+            '1/03/2024,Paycheck,ACME PAYROLL,2000.00,credit,Income,Checking\n'
+        ])
+
+        records = list(map_expense_rows(rows))
+
+        assert records == [{
+            'date': '1/02/2024', 'description': 'Coffee Shop', 'amount': 4.5,
+            'category': 'restaurants', 'external_id': None
+        }]
+
+    def test_map_expense_rows_custom_columns(self):
+        """Test overriding the column used for a field"""
+        rows = [{'booked': '2024-02-01', 'text': 'Rent', 'value': '-950.00'}]
+
+        records = list(map_expense_rows(rows, columns={'date': 'Booked', 'description': 'text', 'amount': ['value']}))
+
+        assert records[0]['date'] == '2024-02-01'
+        assert records[0]['description'] == 'Rent'
+        assert records[0]['amount'] == 950.0
+
+    def test_map_expense_rows_signed_amounts(self):
+        """Test that a signed amount column keeps spending and skips deposits"""
+        rows = read_csv_rows(['Date,Description,Amount\n', '2024-03-01,Starbucks,-4.50\n', '2024-03-02,Paycheck,2500.00\n'])
+
+        assert [r['description'] for r in map_expense_rows(rows)] == ['Starbucks']
+        rows = [{'date': '2024-03-01', 'description': 'Card payment', 'amount': '-300'},
+                {'date': '2024-03-01', 'description': 'Airline', 'amount': '420'}]
+        assert [r['amount'] for r in map_expense_rows(rows, debit_sign='positive')] == [420.0]
+        with pytest.raises(ValueError):
+            list(map_expense_rows(rows, debit_sign='up'))
+
+    def test_map_investment_rows(self):
+        """Test mapping a brokerage positions export"""
+        rows = read_csv_rows(['Ticker,Security Name,Quantity,Last Price,Account Number\n', 'VTI,Vanguard Total,10,250.5,2\n'])
+
+        records = list(map_investment_rows(rows))
+
+        assert records[0]['symbol'] == 'VTI'
+        assert records[0]['name'] == 'Vanguard Total'
+        assert records[0]['shares'] == '10'
+        assert records[0]['price'] == '250.5'
+        assert records[0]['account_id'] == '2'
+
+    def test_pipeline_is_lazy(self):
+        """Test that batching only pulls as many rows as one batch needs"""
+        lines = ('{"date": "2024-01-01", "amount": -%d}\n' % i for i in count())
+        records = iter_expense_records('export.jsonl', lines)
+
+        assert inspect.isgenerator(records)
+        first = next(batched(records, 3))
+        assert [r['amount'] for r in first] == [0.0, 1.0, 2.0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -161,6 +161,34 @@ class TestInvestmentManager:
         assert 'sector_allocation' in performance
         assert 'top_performers' in performance
 
+    
+    def test_bulk_add_investments(self):
+        """Test that positions are validated and persisted in one batch"""
+        result = self.investment_manager.bulk_add_investments([
+            {'symbol': 'aapl', 'shares': '10', 'price': '$190.00', 'account_id': '1'},
+            {'symbol': '', 'shares': '1', 'price': '1'},
+            {'symbol': 'BND', 'shares': 'n/a', 'price': '72'}
+        ])
+        
+        assert result['added'] == 1
+        assert result['invalid'] == 2
+        investment = self.investment_manager.investments[-1]
+        assert investment['symbol'] == 'AAPL'
+        assert investment['current_value'] == 1900.0
+        assert investment['account_id'] == 1
+    
+    def test_import_positions_file(self):
+        """Test streaming a positions CSV into an account"""
+        with open('positions.csv', 'w') as f:
+            f.write('Symbol,Description,Quantity,Price,Security Type\n')
+            f.write('VTI,Vanguard Total Stock Market ETF,5,250.00,ETF\n')
+            f.write('BND,Vanguard Total Bond Market ETF,20,72.50,ETF\n')
+        
+        result = self.investment_manager.import_file('positions.csv', account_id=3, batch_size=1)
+        
+        assert result['added'] == 2
+        assert len(InvestmentManager().get_account_investments(3)) == 2
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,424 @@
+"""
+Unit tests for the JournalStore storage engine
+"""
+import pytest
+import json
+import os
+import sys
+import multiprocessing
+import threading
+from datetime import datetime
+from unittest.mock import patch
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.storage import binary_snapshot, journal
+from src.storage.binary_snapshot import LazyRecords
+from src.storage.files import write_atomic
+from src.storage.journal import JournalStore
+from src.storage.write_behind import WriteBehindStore
+from src.managers.expense import ExpenseManager
+from src.managers.investment import InvestmentManager
+from src.managers.messaging import MessagingSystem
+from src.managers.prescription import PrescriptionManager
+from src.storage.backends import list_users
+
+
+class TestJournalStore:
+    """Test cases for JournalStore"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.store = JournalStore('data.json')
+
+    def test_load_missing_files(self):
+        """Test loading when neither snapshot nor journal exists"""
+        assert self.store.load() == {}
+
+    def test_corrupt_snapshot_is_moved_aside(self):
+        """Test that an unreadable snapshot is set aside and the journal still loads"""
+        self.store.append('items', {'id': 1})
+        with open('data.json', 'w') as f:
+            f.write('{"items": [{"id": 0},')
+
+        store = JournalStore('data.json')
+        data = store.load()
+
+        assert data == {'items': [{'id': 1}]}
+        assert os.path.exists('data.json.corrupt')
+        assert not store.is_stale()
+        store.save(data)
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}]}
+
+    def test_append_does_not_rewrite_snapshot(self):
+        """Test that appends only touch the journal"""
+        self.store.save({'items': []})
+        snapshot_mtime = os.stat('data.json').st_mtime_ns
+
+        self.store.append('items', {'id': 1})
+        self.store.append('items', {'id': 2})
+
+        assert os.stat('data.json').st_mtime_ns == snapshot_mtime
+        with open(self.store.journal_path) as f:
+            assert len(f.readlines()) == 2
+
+    def test_replay_append_update_set(self):
+        """Test that journal entries are replayed on top of the snapshot"""
+        self.store.save({'items': [{'id': 1, 'status': 'active'}]})
+        self.store.append('items', {'id': 2, 'status': 'active'})
+        self.store.update('items', 1, {'status': 'archived'})
+        self.store.set('metrics', {'count': 3})
+
+        data = JournalStore('data.json').load()
+
+        assert data['items'] == [{'id': 1, 'status': 'archived'}, {'id': 2, 'status': 'active'}]
+        assert data['metrics'] == {'count': 3}
+
+    def test_save_discards_journal(self):
+        """Test that a snapshot supersedes the journal"""
+        self.store.append('items', {'id': 1})
+        self.store.save({'items': [{'id': 1}]})
+
+        assert not os.path.exists(self.store.journal_path)
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}]}
+
+    def test_entries_already_in_snapshot_are_skipped(self):
+        """Test that a journal left behind by an interrupted compaction is not applied twice"""
+        self.store.append('items', {'id': 1})
+        with open(self.store.journal_path) as f:
+            leftover = f.read()
+        self.store.save({'items': [{'id': 1}]})
+        with open(self.store.journal_path, 'w') as f:
+            f.write(leftover)
+
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}]}
+
+    def test_torn_write_is_dropped(self):
+        """Test that a partially written final line is ignored and truncated"""
+        self.store.append('items', {'id': 1})
+        with open(self.store.journal_path, 'a') as f:
+            f.write('{"op": "append", "key": "ite')
+
+        store = JournalStore('data.json')
+        assert store.load() == {'items': [{'id': 1}]}
+        store.append('items', {'id': 2})
+
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}, {'id': 2}]}
+
+    def test_compact_callback(self):
+        """Test that compaction is requested after compact_every entries"""
+        calls = []
+        store = JournalStore('data.json', compact=lambda: calls.append(True), compact_every=3)
+
+        for i in range(3):
+            store.append('items', {'id': i})
+
+        assert calls == [True]
+
+    def test_compaction_waits_for_journal_to_outgrow_snapshot(self):
+        """Test that a large snapshot is not rewritten every compact_every entries"""
+        calls = []
+        store = JournalStore('data.json', compact=lambda: calls.append(True), compact_every=3)
+        store.save({'items': [{'id': i, 'text': 'x' * 50} for i in range(20)]})
+
+        for i in range(3):
+            store.append('items', {'id': i})
+        assert calls == []
+
+        store.extend('items', [{'id': i, 'text': 'y' * 50} for i in range(30)])
+        assert calls == [True]
+
+    def test_extend_replays_in_order(self):
+        """Test that a batch written by extend loads back in order"""
+        self.store.extend('items', [{'id': 1}, {'id': 2}, {'id': 3}])
+
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}, {'id': 2}, {'id': 3}]}
+
+    def test_datetime_values_are_encoded(self):
+        """Test that datetime values are serialised as ISO strings"""
+        self.store.append('items', {'id': 1, 'timestamp': datetime(2024, 1, 1, 12, 0)})
+        self.store.save({'items': [{'id': 1, 'timestamp': datetime(2024, 1, 1, 12, 0)}]})
+
+        with open('data.json') as f:
+            assert json.load(f)['items'][0]['timestamp'] == '2024-01-01T12:00:00'
+
+    def test_next_id_seeded_from_existing_records(self):
+        """Test that ids continue after the highest id already stored"""
+        self.store.save({'items': [{'id': 1}, {'id': 7}, {'id': 'legacy-uuid'}]})
+        self.store.load()
+
+        assert self.store.next_id('items') == 8
+        assert self.store.next_id('items', count=3) == 9
+        assert JournalStore('data.json').next_id('items') == 12
+
+    def test_next_id_unique_across_writers(self):
+        """Test that separate store instances sharing files never reuse an id"""
+        stores = [JournalStore('data.json') for _ in range(4)]
+        allocated = []
+
+        def allocate(store):
+            for _ in range(50):
+                allocated.append(store.next_id('items'))
+
+        threads = [threading.Thread(target=allocate, args=(store,)) for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(allocated) == list(range(1, 201))
+
+
+def append_from_process(directory, worker):
+    """Append records the way a manager does from a separate process, compacting every few entries"""
+    os.chdir(directory)
+    store = JournalStore('data.json', compact_every=7)
+    store.compact = lambda: store.save(store.data)
+    store.load()
+    for i in range(40):
+        record = {'id': store.next_id('items'), 'worker': worker}
+        store.data.setdefault('items', []).append(record)
+        store.append('items', record)
+
+
+class TestSharedJournal:
+    """Test cases for several processes sharing one store"""
+
+    def test_foreign_entries_are_merged_into_snapshot(self):
+        """Test that a snapshot keeps entries another writer journaled after we loaded"""
+        first, second = JournalStore('data.json'), JournalStore('data.json')
+        first.load()
+        second.load()
+
+        first.append('items', {'id': 1, 'status': 'active'})
+        second.append('items', {'id': 2, 'status': 'active'})
+        first.update('items', 1, {'status': 'archived'})
+        second.save({'items': [{'id': 2, 'status': 'active'}]})
+
+        assert second.is_stale()
+        assert JournalStore('data.json').load() == {
+            'items': [{'id': 2, 'status': 'active'}, {'id': 1, 'status': 'archived'}]
+        }
+
+    def test_foreign_snapshot_is_not_overwritten(self):
+        """Test that a store whose copy is out of date compacts from disk instead of overwriting"""
+        first, second = JournalStore('data.json'), JournalStore('data.json')
+        first.load()
+        second.load()
+
+        second.append('items', {'id': 1})
+        second.save({'items': [{'id': 1}]})
+        first.append('items', {'id': 2})
+        first.save({'items': [{'id': 2}]})
+
+        assert first.is_stale()
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}, {'id': 2}]}
+
+    @pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+    def test_concurrent_processes_lose_nothing(self, tmp_path):
+        """Test that processes appending and compacting the same files keep every record"""
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=append_from_process, args=(str(tmp_path), n)) for n in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        items = JournalStore('data.json').load()['items']
+        assert sorted(item['id'] for item in items) == list(range(1, 161))
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    def test_atomic_writes_never_share_a_temp_file(self):
+        """Test that concurrent writers of one file always leave a complete file"""
+        def write(n):
+            for _ in range(50):
+                write_atomic('data.json', json.dumps({'writer': n, 'payload': 'x' * 2000}), fsync=False)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open('data.json') as f:
+            assert json.load(f)['writer'] in range(4)
+        assert os.listdir('.') == ['data.json']
+
+
+class TestBinarySnapshot:
+    """Test cases for memory-mapped binary snapshots"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.items = [{'id': i, 'status': 'active'} for i in range(1000)]
+        self.store = JournalStore('data.json', snapshot_format='binary')
+        self.store.save({'items': self.items, 'settings': {'when': datetime(2024, 1, 2)}})
+
+    def test_records_decode_on_first_access(self):
+        """Test that loading maps the file and only decodes the chunks that are read"""
+        data = JournalStore('data.json', snapshot_format='binary').load()
+        items = data['items']
+
+        assert sorted(os.listdir('.')) == ['data.json.lock', 'data.snap']
+        assert isinstance(items, LazyRecords)
+        assert len(items) == 1000 and items.unread == 4
+        assert items[700] == {'id': 700, 'status': 'active'}
+        assert items[-1]['id'] == 999 and items.unread == 2
+        assert items == self.items
+        assert data['settings'] == {'when': '2024-01-02T00:00:00'}
+
+    def test_formats_convert_on_load(self):
+        """Test that a snapshot in the other format is read, replayed and rewritten"""
+        self.store.load()
+        self.store.append('items', {'id': 1000, 'status': 'active'})
+
+        data = JournalStore('data.json').load()
+
+        assert len(data['items']) == 1001
+        assert os.path.exists('data.json') and not os.path.exists('data.snap')
+        assert JournalStore('data.json', snapshot_format='binary').load()['items'][-1]['id'] == 1000
+        assert os.path.exists('data.snap') and not os.path.exists('data.json')
+
+    def test_compaction_copies_untouched_chunks(self):
+        """Test that saving re-encodes only the chunks that were read or extended"""
+        data = self.store.load()
+        data['items'][3]['status'] = 'archived'
+        data['items'].append({'id': 1000, 'status': 'active'})
+
+        with patch.object(binary_snapshot.marshal, 'dumps', wraps=binary_snapshot.marshal.dumps) as dumps:
+            self.store.save(data)
+
+        assert dumps.call_count == 2
+        items = JournalStore('data.json', snapshot_format='binary').load()['items']
+        assert items[3]['status'] == 'archived'
+        assert [item['id'] for item in items] == list(range(1001))
+
+    def test_mutations_match_list(self):
+        """Test that structural edits behave exactly as they would on a list"""
+        items = self.store.load()['items']
+        expected = [dict(item) for item in self.items]
+        for records in (items, expected):
+            records[500] = {'id': -1}
+            del records[10:20]
+            records.insert(0, {'id': -2})
+            records.remove({'id': 999, 'status': 'active'})
+            records[:] = [r for r in records if r['id'] % 3]
+
+        assert items == expected
+        assert json.loads(json.dumps(items, default=journal.encode_value)) == expected
+
+    def test_manager_on_binary_snapshots(self, monkeypatch):
+        """Test that a manager persists and reloads through binary snapshots"""
+        monkeypatch.setattr(journal, 'SNAPSHOT_FORMAT', 'binary')
+        investments = InvestmentManager()
+        account = investments.add_investment_account('vanguard', 'IRA', 'retirement')
+        investments.add_investment('VTI', 'Total Market', 10, 200.0, account['id'])
+        investments.save_investments()
+
+        reloaded = InvestmentManager()
+
+        assert os.path.exists('investments.snap') and not os.path.exists('investments.json')
+        assert reloaded.get_portfolio_summary()['total_investments'] == 1
+        assert len(reloaded.get_account_investments(account['id'])) == 1
+
+    def test_users_with_only_a_binary_snapshot_are_listed(self, monkeypatch):
+        """Test that a user partition compacted to a .snap file is still found"""
+        monkeypatch.setattr(journal, 'SNAPSHOT_FORMAT', 'binary')
+        prescriptions = PrescriptionManager('alice')
+        prescriptions.add_prescription('Lisinopril', '10mg', 'Daily', 30, '2024-03-03', 'cvs', 'Dr. Smith')
+        prescriptions.save_prescriptions()
+
+        assert os.path.exists(os.path.join('user_data', 'alice', 'prescriptions.snap'))
+        assert not os.path.exists(os.path.join('user_data', 'alice', 'prescriptions.journal.jsonl'))
+        assert list_users('prescriptions') == ['alice']
+
+
+class TestWriteBehindStore:
+    """Test cases for the write-behind queue"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.inner = JournalStore('data.json')
+        self.store = WriteBehindStore(self.inner, interval=0.05, maxsize=100)
+
+    def test_burst_is_written_at_once(self):
+        """Test that a burst is written with one journal write per run of appends or updates"""
+        with patch.object(self.inner, '_write', wraps=self.inner._write) as write:
+            for i in range(20):
+                self.store.append('items', {'id': i, 'read': False})
+            self.store.update('items', 3, {'read': True})
+            self.store.update_many('items', {3: {'starred': True}, 4: {'read': True}})
+            self.store.flush()
+
+        assert write.call_count == 2
+        items = JournalStore('data.json').load()['items']
+        assert len(items) == 20
+        assert items[3] == {'id': 3, 'read': True, 'starred': True}
+        assert items[4]['read'] is True
+
+    def test_save_flushes_queued_writes(self):
+        """Test that a snapshot is only written after queued entries are applied"""
+        self.store.append('items', {'id': 1})
+        self.store.save({'items': [{'id': 1}]})
+
+        assert not os.path.exists(self.inner.journal_path)
+        assert JournalStore('data.json').load() == {'items': [{'id': 1}]}
+
+    def test_compaction_runs_on_the_writer(self):
+        """Test that compaction requested by the wrapped store runs on the next queued write"""
+        calls = []
+        inner = JournalStore('data.json', compact=lambda: calls.append(True), compact_every=3)
+        store = WriteBehindStore(inner, interval=0, maxsize=10)
+
+        for i in range(3):
+            store.append('items', {'id': i})
+            store.flush()
+        assert calls == []
+
+        store.append('items', {'id': 3})
+        assert calls == [True]
+
+    def test_reads_pass_through(self):
+        """Test that non-write attributes come from the wrapped store"""
+        assert self.store.next_id('items') == 1
+        assert self.store.journal_path == self.inner.journal_path
+
+
+class TestManagerJournaling:
+    """Test cases for managers persisting through the journal"""
+
+    def test_expense_survives_reload(self):
+        """Test that an added expense is visible to a fresh manager"""
+        ExpenseManager().add_expense('food', 12.5, 'Lunch', '2024-01-01')
+
+        reloaded = ExpenseManager()
+
+        assert len(reloaded.expenses) == 1
+        assert reloaded.expenses[0]['description'] == 'Lunch'
+
+    def test_legacy_snapshot_loads(self):
+        """Test that data files written before the journal existed still load"""
+        with open('expenses.json', 'w') as f:
+            json.dump({'expenses': [{'id': 1, 'category': 'food', 'amount': 5.0, 'status': 'active'}], 'budgets': []}, f)
+
+        manager = ExpenseManager()
+        manager.add_expense('food', 10.0, 'Snack', '2024-01-02')
+
+        assert [e['amount'] for e in ExpenseManager().expenses] == [5.0, 10.0]
+
+    def test_messages_survive_reload(self):
+        """Test that journaled messages rebuild their conversation threads"""
+        messaging = MessagingSystem()
+        messaging.add_message('user', 'concierge', 'Hello', channel='concierge')
+        messaging.add_message('user', 'support', 'Help', channel='support')
+        messaging.flush()
+
+        reloaded = MessagingSystem()
+
+        assert len(reloaded.messages) == 2
+        assert isinstance(reloaded.messages[0]['timestamp'], datetime)
+        assert reloaded.get_messages('support')[0]['message'] == 'Help'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
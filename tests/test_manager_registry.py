@@ -0,0 +1,151 @@
+"""
+Unit tests for the process-wide manager registry
+"""
+import pytest
+import os
+import sys
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.managers import registry
+from src.managers.registry import (
+    get_manager, clear_managers, claim_shared_data, start_background_jobs, stop_background_jobs, MANAGER_CLASSES
+)
+from src.managers import messaging as messaging_module
+from src.managers.expense import ExpenseManager
+from src.managers.messaging import MessagingSystem
+from src.storage.backends import user_partition, partition_user, list_users
+
+
+class TestManagerRegistry:
+    """Test cases for get_manager"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        clear_managers()
+
+    def teardown_method(self):
+        """Drop cached managers so other tests start clean"""
+        clear_managers()
+
+    def test_every_manager_is_registered(self):
+        """Test that all eleven managers can be obtained"""
+        assert len(MANAGER_CLASSES) == 11
+        for name, manager_class in MANAGER_CLASSES.items():
+            assert isinstance(get_manager(name), manager_class)
+
+    def test_instance_is_shared(self):
+        """Test that repeated lookups return the same instance"""
+        assert get_manager('expense') is get_manager('expense')
+
+    def test_own_writes_do_not_trigger_reload(self):
+        """Test that a manager's own writes keep the cached instance"""
+        manager = get_manager('expense')
+        manager.add_expense('food', 10.0, 'Lunch', '2024-01-01')
+
+        assert get_manager('expense') is manager
+
+    def test_external_change_triggers_reload(self):
+        """Test that another writer's changes are picked up"""
+        manager = get_manager('expense')
+        ExpenseManager().add_expense('food', 10.0, 'Lunch', '2024-01-01')
+
+        reloaded = get_manager('expense')
+
+        assert reloaded is not manager
+        assert len(reloaded.expenses) == 1
+
+    def test_stale_ai_agent_is_reloaded_in_place(self):
+        """Test that the AI agent system keeps its instance, and its queued tasks, across reloads"""
+        manager = get_manager('ai_agent')
+        other = MANAGER_CLASSES['ai_agent']()
+        other.wait_for_task(other.submit_task('travel_agent', 'Book hotel', lambda agent, description: 'booked'), timeout=5)
+
+        assert get_manager('ai_agent') is manager
+        assert [task['result'] for task in manager.get_tasks()] == ['booked']
+
+    def test_unknown_manager(self):
+        """Test that unknown names raise KeyError"""
+        with pytest.raises(KeyError):
+            get_manager('unknown')
+
+    def test_user_scoped_managers_are_partitioned(self):
+        """Test that per-user managers only see their own user's data"""
+        alice = get_manager('expense', 'alice')
+        alice.add_expense('food', 10.0, 'Lunch', '2024-01-01')
+
+        assert get_manager('expense', 'alice') is alice
+        assert get_manager('expense', 'bob').expenses == []
+        assert get_manager('expense').expenses == []
+        assert os.path.exists(os.path.join('user_data', 'alice', 'expenses.journal.jsonl'))
+        assert list_users('expenses') == ['alice']
+        assert get_manager('admin', 'alice') is get_manager('admin')
+
+    def test_least_recently_used_user_managers_are_dropped(self, monkeypatch):
+        """Test that only the most recently used per-user managers stay cached"""
+        monkeypatch.setattr(registry, 'USER_MANAGER_CACHE_SIZE', 2)
+        alice = get_manager('tax', 'alice')
+        bob = get_manager('tax', 'bob')
+
+        assert get_manager('tax', 'alice') is alice
+        get_manager('tax', 'carol')
+
+        assert get_manager('tax', 'alice') is alice
+        assert get_manager('tax', 'bob') is not bob
+        assert len(registry._user_instances) == 2
+
+    def test_shared_data_is_claimed_once(self, monkeypatch):
+        """Test that data saved before per-user partitions moves to the first user to log in"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 1)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 2)
+        ExpenseManager().add_expense('food', 10.0, 'Lunch', '2024-01-01')
+        messaging = MessagingSystem()
+        for text in ('First', 'Second', 'Third'):
+            messaging.add_message('user', 'concierge', text)
+        messaging.save_messages()
+        shared = get_manager('expense')
+
+        assert claim_shared_data('alice') == ['expenses', 'chat_history']
+        assert claim_shared_data('bob') == []
+        alice = get_manager('expense', 'alice')
+        alice.add_expense('food', 12.0, 'Dinner', '2024-01-02')
+        assert [e['id'] for e in alice.expenses] == [1, 2]
+        assert [m['message'] for m in get_manager('messaging', 'alice').get_messages()] == ['First', 'Second', 'Third']
+        assert get_manager('expense', 'bob').expenses == []
+        assert get_manager('expense') is not shared
+        assert get_manager('expense').expenses == []
+
+    def test_shared_data_owner(self, monkeypatch):
+        """Test that only the configured owner can claim the shared data"""
+        monkeypatch.setattr(registry, 'SHARED_DATA_OWNER', 'alice')
+        ExpenseManager().add_expense('food', 10.0, 'Lunch', '2024-01-01')
+
+        assert claim_shared_data('bob') == []
+        assert claim_shared_data('alice') == ['expenses']
+
+    def test_user_partition_names(self):
+        """Test that partition keys are path and table safe, distinct and reversible"""
+        user_ids = ['alice', 'a.b', 'a_b', 'a-b', '../etc', 'José', 'A B']
+        partitions = [user_partition(user_id) for user_id in user_ids]
+
+        assert len(set(partitions)) == len(user_ids)
+        assert all(partition.replace('-', '').isalnum() and partition.isascii() for partition in partitions)
+        assert [partition_user(partition) for partition in partitions] == user_ids
+        with pytest.raises(ValueError):
+            user_partition('')
+
+    def test_background_jobs_start_once(self):
+        """Test that repeated starts (one per Streamlit rerun) share a single job"""
+        start_background_jobs()
+        job = registry._jobs['refill_reminders']
+        start_background_jobs()
+
+        assert registry._jobs['refill_reminders'] is job
+        assert set(registry._jobs) == {'refill_reminders', 'ai_task_resume'}
+        stop_background_jobs()
+        assert registry._jobs == {}
+        assert job.thread is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
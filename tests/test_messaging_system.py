@@ -2,11 +2,14 @@
 Unit tests for MessagingSystem class
 """
 import pytest
+import json
 import sys
 import os
+from datetime import datetime
 sys.path.append('.')
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from src.managers import messaging as messaging_module
 from src.managers.messaging import MessagingSystem
 
 
@@ -117,5 +120,292 @@ class TestMessagingSystem:
         assert support_messages[0]['message'] == 'Support message'
 
 
+    
+    def test_messages_are_stored_once(self):
+        """Test that the saved file lists each message once and threads by id"""
+        first = self.messaging.add_message('user', 'concierge', 'Hello', channel='concierge')
+        second = self.messaging.add_message('user', 'support', 'Help', channel='support')
+        
+        self.messaging.save_messages()
+        with open('chat_history.json') as f:
+            data = json.load(f)
+        
+        assert data['version'] == 2
+        assert 'conversations' not in data
+        assert [m['id'] for m in data['messages']] == [first, second]
+        assert data['channels'] == {'concierge': [first], 'support': [second]}
+    
+    def test_users_only_see_their_own_messages(self):
+        """Test that each user's history, unread counts and live feed are kept apart"""
+        alice, bob = MessagingSystem('alice'), MessagingSystem('bob')
+        subscription = alice.subscribe(['concierge'])
+        bob.add_message('concierge', 'bob', 'Refill reminder: Lisinopril (10mg)')
+        bob.flush()
+        
+        assert MessagingSystem('alice').get_messages('concierge') == []
+        assert alice.get_unread_counts() == {}
+        assert subscription.drain() == []
+        assert MessagingSystem('bob').get_unread_count('concierge') == 1
+        assert self.messaging.get_messages('concierge') == []
+        subscription.close()
+    
+    def test_version_one_file_is_migrated(self):
+        """Test that a file with duplicated conversation threads is rewritten in the new layout"""
+        message = {'id': 'a', 'seq': 1, 'message': 'Hi', 'channel': 'support', 'timestamp': '2024-01-01T10:00:00', 'read': False}
+        with open('chat_history.json', 'w') as f:
+            json.dump({'messages': [message], 'conversations': {'support': [message]}}, f)
+        
+        messaging = MessagingSystem()
+        with open('chat_history.json') as f:
+            data = json.load(f)
+        
+        assert messaging.get_messages('support')[0]['message'] == 'Hi'
+        assert messaging.conversations['support'][0] is messaging.messages[0]
+        assert data['version'] == 2
+        assert data['channels'] == {'support': ['a']}
+        assert 'conversations' not in data
+
+
+class TestUnreadCounters:
+    """Test cases for incremental unread counters and mark_read"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.messaging = MessagingSystem()
+    
+    def test_counts_per_channel_and_recipient(self):
+        """Test that add_message updates channel and recipient counters"""
+        self.messaging.add_message('concierge', 'user', 'Hello', channel='concierge')
+        self.messaging.add_message('user', 'concierge', 'Hi', channel='concierge')
+        self.messaging.add_message('support', 'user', 'Ticket opened', channel='support')
+        
+        assert self.messaging.get_unread_count('concierge') == 2
+        assert self.messaging.get_unread_count('concierge', recipient='user') == 1
+        assert self.messaging.get_unread_counts() == {'concierge': 2, 'support': 1}
+    
+    def test_mark_read_by_id_and_whole_channel(self):
+        """Test marking selected messages, then the rest of the channel"""
+        ids = [self.messaging.add_message('concierge', 'user', f'Message {i}') for i in range(3)]
+        
+        assert self.messaging.mark_read('concierge', [ids[0], ids[0], 'unknown']) == 1
+        assert self.messaging.get_unread_count('concierge') == 2
+        assert self.messaging.mark_read('concierge') == 2
+        assert self.messaging.mark_read('concierge') == 0
+        assert all(m['read'] for m in self.messaging.messages)
+        assert self.messaging.get_unread_counts() == {}
+    
+    def test_counters_survive_reload(self):
+        """Test that counters persist through the journal and through a snapshot"""
+        ids = [self.messaging.add_message('concierge', 'user', f'Message {i}') for i in range(3)]
+        self.messaging.mark_read('concierge', ids[:1])
+        self.messaging.add_message('support', 'user', 'Ticket opened', channel='support')
+        self.messaging.flush()
+        
+        assert MessagingSystem().get_unread_counts() == {'concierge': 2, 'support': 1}
+        self.messaging.save_messages()
+        self.messaging.add_message('support', 'user', 'Ticket updated', channel='support')
+        self.messaging.flush()
+        assert MessagingSystem().get_unread_counts() == {'concierge': 2, 'support': 2}
+    
+    def test_mark_read_covers_archived_history(self, monkeypatch):
+        """Test that clearing a channel also clears messages sealed into segments"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 2)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 3)
+        for i in range(8):
+            self.messaging.add_message('concierge', 'user', f'Message {i}')
+        self.messaging.save_messages()
+        
+        messaging = MessagingSystem()
+        assert messaging.get_unread_count('concierge') == 8
+        assert messaging.mark_read('concierge') == 8
+        messaging.flush()
+        
+        reloaded = MessagingSystem()
+        assert reloaded.get_unread_count('concierge') == 0
+        assert all(m['read'] for m in reloaded.get_messages('concierge', limit=8))
+
+class TestMessagePagination:
+    """Test cases for cursor pagination over the recent window and sealed segments"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.messaging = MessagingSystem()
+    
+    def fill(self, count, channel='concierge'):
+        return [self.messaging.add_message('user', channel, f'Message {i}', channel=channel) for i in range(count)]
+    
+    def texts(self, messages):
+        return [m['message'] for m in messages]
+    
+    def test_before_and_after_cursors(self):
+        """Test paging around a message id within the recent window"""
+        ids = self.fill(6)
+        
+        assert self.texts(self.messaging.get_messages(limit=2, before=ids[3])) == ['Message 1', 'Message 2']
+        assert self.texts(self.messaging.get_messages(limit=2, after=ids[3])) == ['Message 4', 'Message 5']
+        assert self.messaging.get_messages(before='missing-id') == []
+    
+    def test_timestamp_cursor(self):
+        """Test paging from a point in time"""
+        self.fill(3)
+        for i, message in enumerate(self.messaging.messages):
+            message['timestamp'] = datetime(2024, 1, 1, 12, i)
+        
+        page = self.messaging.get_messages(after=datetime(2024, 1, 1, 12, 0))
+        
+        assert self.texts(page) == ['Message 1', 'Message 2']
+    
+    def test_old_history_is_sealed_and_paged_from_segments(self, monkeypatch):
+        """Test that compaction moves old messages to segments that pagination still reaches"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 3)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 4)
+        ids = self.fill(15)
+        self.fill(2, channel='support')
+        
+        self.messaging.save_messages()
+        reloaded = MessagingSystem()
+        
+        assert len(reloaded.conversations['concierge']) == 3
+        assert len(reloaded.conversations['support']) == 2
+        assert self.texts(reloaded.get_messages(limit=5)) == [f'Message {i}' for i in range(10, 15)]
+        assert isinstance(reloaded.get_messages(limit=5)[0]['timestamp'], datetime)
+        
+        history, cursor = [], None
+        while True:
+            page = reloaded.get_messages(limit=4, before=cursor)
+            if not page:
+                break
+            history = page + history
+            cursor = page[0]['id']
+        assert self.texts(history) == [f'Message {i}' for i in range(15)]
+        
+        assert self.texts(reloaded.get_messages(limit=3, after=ids[9])) == ['Message 10', 'Message 11', 'Message 12']
+        assert reloaded.get_unread_count('concierge') == 15
+        assert reloaded.get_message(ids[0])['message'] == 'Message 0'
+        
+        # Paging by seq never scans segments for the cursor message
+        monkeypatch.setattr(reloaded.archive, 'find', None)
+        history, cursor = [], None
+        while True:
+            page = reloaded.get_messages(limit=4, before=cursor)
+            if not page:
+                break
+            history = page + history
+            cursor = page[0]['seq']
+        assert self.texts(history) == [f'Message {i}' for i in range(15)]
+    
+    def test_interrupted_compaction_does_not_duplicate(self, monkeypatch):
+        """Test that messages already sealed are skipped if the snapshot was not rewritten"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 1)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 2)
+        self.fill(3)
+        
+        self.messaging.seal_segments()  # segment written, snapshot never saved
+        self.messaging.flush()
+        reloaded = MessagingSystem()
+        
+        assert self.texts(reloaded.get_messages()) == ['Message 0', 'Message 1', 'Message 2']
+        assert len(reloaded.messages) == 1
+    
+    def test_shared_history_keeps_seq_order(self, monkeypatch):
+        """Test that two writers on one history interleave in seq order and nothing is lost to sealing"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 2)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 3)
+        other = MessagingSystem()
+        for i in range(6):
+            self.messaging.add_message('user', 'concierge', f'hello alpha{i}')
+            other.add_message('user', 'concierge', f'hello beta{i}')
+        self.messaging.flush()
+
+        other.save_messages()
+        self.messaging.save_messages()
+        reloaded = MessagingSystem()
+
+        seqs = [m['seq'] for m in reloaded.conversations['concierge']]
+        assert seqs == sorted(seqs)
+        assert len(reloaded.get_messages(limit=20)) == 12
+        assert len(reloaded.search('hello')) == 12
+        ranges = [(s['first_seq'], s['last_seq']) for s in reloaded.archive.segments('concierge')]
+        assert all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+
+    def test_seq_moves_past_other_writers(self):
+        """Test that seqs come from reserved blocks and skip past seqs another writer journaled"""
+        from unittest.mock import patch
+        other = MessagingSystem()
+        journal = self.messaging.store.store
+        with patch.object(journal, 'next_id', wraps=journal.next_id) as mock_next_id:
+            self.fill(20)
+        assert mock_next_id.call_count == 1
+        self.messaging.flush()
+        
+        theirs = other.get_message(other.add_message('user', 'concierge', 'Theirs'))['seq']
+        other.flush()
+        self.messaging.add_message('user', 'concierge', 'Ours')
+        self.messaging.flush()  # the writer reads the other history under the journal lock
+        ours = self.messaging.get_message(self.messaging.add_message('user', 'concierge', 'Later'))['seq']
+        
+        assert ours > theirs
+    
+    def test_legacy_history_is_numbered(self):
+        """Test that messages saved before pagination get sequence numbers in order"""
+        with open('chat_history.json', 'w') as f:
+            json.dump({'messages': [
+                {'id': 'a', 'message': 'First', 'channel': 'concierge', 'timestamp': '2024-01-01T10:00:00'},
+                {'id': 'b', 'message': 'Second', 'channel': 'concierge', 'timestamp': '2024-01-01T11:00:00'}
+            ]}, f)
+        
+        messaging = MessagingSystem()
+        messaging.add_message('user', 'concierge', 'Third')
+        
+        assert [m['seq'] for m in messaging.messages] == [1, 2, 3]
+        assert self.texts(MessagingSystem().get_messages(before='b')) == ['First']
+
+
+
+class TestMessageSearch:
+    """Test cases for full-text search over recent and sealed messages"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.messaging = MessagingSystem()
+    
+    def texts(self, messages):
+        return [m['message'] for m in messages]
+    
+    def test_ranking_and_filters(self):
+        """Test that every word must match and results rank by frequency, then recency"""
+        self.messaging.add_message('user', 'concierge', 'Book a table for dinner')
+        self.messaging.add_message('user', 'concierge', 'Dinner, dinner and more dinner')
+        self.messaging.add_message('user', 'support', 'Cancel the dinner table booking', channel='support')
+        self.messaging.add_message('user', 'concierge', 'Table for two at dinner')
+        
+        assert self.texts(self.messaging.search('dinner')) == [
+            'Dinner, dinner and more dinner', 'Table for two at dinner',
+            'Cancel the dinner table booking', 'Book a table for dinner'
+        ]
+        assert self.texts(self.messaging.search('TABLE dinner', channel='concierge')) == [
+            'Table for two at dinner', 'Book a table for dinner'
+        ]
+        assert self.texts(self.messaging.search('dinner', limit=1)) == ['Dinner, dinner and more dinner']
+        assert self.messaging.search('the and') == []
+        assert self.messaging.search('lunch') == []
+    
+    def test_sealed_history_is_searchable(self, monkeypatch):
+        """Test that messages sealed into segments are found through their sidecar index"""
+        monkeypatch.setattr(messaging_module, 'MESSAGE_RECENT_WINDOW', 2)
+        monkeypatch.setattr(messaging_module, 'MESSAGE_SEGMENT_SIZE', 3)
+        for i in range(8):
+            self.messaging.add_message('user', 'concierge', f'Refill request {i} for pharmacy')
+        self.messaging.save_messages()
+        
+        reloaded = MessagingSystem()
+        results = reloaded.search('refill pharmacy', limit=10)
+        
+        assert self.texts(results) == [f'Refill request {i} for pharmacy' for i in reversed(range(8))]
+        assert isinstance(results[-1]['timestamp'], datetime)
+        assert self.texts(reloaded.search('request 1')) == ['Refill request 1 for pharmacy']
+        assert os.path.exists(os.path.join('chat_archive', 'concierge', '000000000001.index.json'))
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Unit tests for the shared MetricsStore counters
+"""
+import pytest
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.storage.metrics import MetricsStore
+from src.managers import ai_agent as ai_agent_module
+from src.managers.ai_agent import AIAgentSystem
+from src.managers.admin import AdminSystem
+
+
+class TestMetricsStore:
+    """Test cases for MetricsStore"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.metrics = MetricsStore('metrics.json', interval=60)
+
+    def test_increments_are_batched(self):
+        """Test that increments are visible at once but written in a single flush"""
+        with patch.object(self.metrics, '_write', wraps=self.metrics._write) as write:
+            for _ in range(100):
+                self.metrics.increment('messages_sent')
+            self.metrics.increment('ai_tasks_completed', 3)
+
+            assert self.metrics.get('messages_sent') == 100
+            assert not os.path.exists('metrics.json')
+
+            self.metrics.flush()
+            self.metrics.flush()
+
+        assert write.call_count == 1
+        with open('metrics.json') as f:
+            assert json.load(f) == {'messages_sent': 100, 'ai_tasks_completed': 3}
+
+    def test_writers_add_to_shared_totals(self):
+        """Test that separate stores on one file (as in separate processes) never lose increments"""
+        stores = [MetricsStore('metrics.json', interval=60) for _ in range(4)]
+
+        def work(store):
+            for _ in range(250):
+                store.increment('total_users')
+            store.flush()
+
+        threads = [threading.Thread(target=work, args=(store,)) for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert MetricsStore('metrics.json').get('total_users') == 1000
+        assert stores[0].snapshot() == {'total_users': 1000}
+
+    def test_seed_only_fills_missing_counters(self):
+        """Test that seeding keeps counters another writer already created"""
+        self.metrics.increment('total_users', 2)
+        self.metrics.flush()
+
+        self.metrics.seed({'total_users': 50, 'messages_sent': 7, 'label': 'x'})
+
+        assert self.metrics.snapshot() == {'total_users': 2, 'messages_sent': 7}
+
+
+class TestAgentMetrics:
+    """Test cases for AI task counters read by the admin dashboard"""
+
+    def test_admin_reads_ai_task_counters(self, monkeypatch):
+        """Test that completed AI tasks show up in admin analytics and survive a restart"""
+        monkeypatch.setattr(ai_agent_module, 'AI_TASK_SIMULATED_SECONDS', 0)
+        ai_system = AIAgentSystem()
+        ai_system.simulate_ai_task('tax_agent', 'File return')
+        ai_system.simulate_ai_task('tax_agent', 'Estimate')
+        ai_system.close()
+
+        assert AdminSystem().get_user_analytics()['ai_tasks_completed'] == 2
+        ai_system.metrics.flush()
+        assert MetricsStore('metrics.json').get('ai_tasks_completed.tax_agent') == 2
+        assert AIAgentSystem().get_agent_status()['tax_agent']['tasks_completed'] == 2
+
+    def test_legacy_admin_metrics_are_carried_over(self):
+        """Test that counters saved in admin_data.json seed the metrics store"""
+        with open('admin_data.json', 'w') as f:
+            json.dump({'user_sessions': [], 'system_metrics': {'total_users': 12, 'messages_sent': 3}}, f)
+
+        admin_system = AdminSystem()
+        admin_system.update_metrics('total_users', 1)
+
+        assert admin_system.system_metrics['total_users'] == 13
+        assert admin_system.system_metrics['ai_tasks_completed'] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
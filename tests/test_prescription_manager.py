@@ -119,6 +119,39 @@ class TestPrescriptionManager:
         
         assert result is None
     
+    def test_pharmacy_and_doctor_indexes(self):
+        """Test listing prescriptions by pharmacy and by doctor"""
+        first = self.prescription_manager.add_prescription('Med A', '5mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Smith')
+        second = self.prescription_manager.add_prescription('Med B', '5mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Jones')
+        
+        assert {p['id'] for p in self.prescription_manager.get_pharmacy_prescriptions('cvs')} == {first, second}
+        assert [p['id'] for p in self.prescription_manager.get_doctor_prescriptions('Dr. Jones')] == [second]
+        assert self.prescription_manager.get_doctor_prescriptions('Dr. Nobody') == []
+    
+    def test_transfer_prescription_moves_index(self):
+        """Test that a transfer is reflected in the pharmacy index after reload"""
+        prescription_id = self.prescription_manager.add_prescription(
+            'Test Medication', '10mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Smith'
+        )
+        
+        self.prescription_manager.transfer_prescription(prescription_id, 'walgreens')
+        reloaded = PrescriptionManager()
+        
+        assert reloaded.get_pharmacy_prescriptions('cvs') == []
+        assert [p['id'] for p in reloaded.get_pharmacy_prescriptions('walgreens')] == [prescription_id]
+        assert self.prescription_manager.transfer_prescription('invalid_id', 'cvs') is None
+    
+    def test_refill_requests_routed_by_pharmacy(self):
+        """Test that refill requests are listed under the pharmacy they were routed to"""
+        prescription_id = self.prescription_manager.add_prescription(
+            'Test Medication', '10mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Smith'
+        )
+        
+        refill = self.prescription_manager.request_refill(prescription_id, 'fullscript')
+        
+        assert self.prescription_manager.get_pharmacy_refill_requests('fullscript') == [refill]
+        assert self.prescription_manager.get_pharmacy_refill_requests('cvs') == []
+    
     def test_get_pharmacy_info(self):
         """Test getting pharmacy information"""
         pharmacy_info = self.prescription_manager.pharmacies.get('cvs', {})
@@ -0,0 +1,79 @@
+"""
+Unit tests for the pub/sub layer
+"""
+import pytest
+import gc
+import os
+import sys
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.pubsub import LocalBroker, Subscription, get_broker
+from src.managers.messaging import MessagingSystem
+
+
+class TestLocalBroker:
+    """Test cases for the in-process broker"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.broker = LocalBroker()
+
+    def test_publish_reaches_topic_subscribers(self):
+        """Test that only subscriptions to the topic receive a payload"""
+        support = self.broker.subscribe('support')
+        both = self.broker.subscribe('support', 'concierge')
+
+        assert self.broker.publish('support', {'n': 1}) == 2
+        assert self.broker.publish('concierge', {'n': 2}) == 1
+
+        assert support.drain() == [('support', {'n': 1})]
+        assert both.drain() == [('support', {'n': 1}), ('concierge', {'n': 2})]
+        assert both.get(timeout=0.01) is None
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Test that a full inbox keeps the newest payloads without blocking publishers"""
+        subscription = Subscription(self.broker, ['topic'], maxsize=2)
+        self.broker.subscribers['topic'] = {subscription}
+
+        for n in range(5):
+            self.broker.publish('topic', n)
+
+        assert subscription.drain() == [('topic', 3), ('topic', 4)]
+
+    def test_closed_and_dropped_subscriptions_stop_receiving(self):
+        """Test unsubscribing explicitly and by releasing the subscription"""
+        closed = self.broker.subscribe('topic')
+        closed.close()
+        self.broker.subscribe('topic')
+        gc.collect()
+
+        assert self.broker.publish('topic', 'hello') == 0
+        assert closed.drain() == []
+
+    def test_unknown_backend(self, monkeypatch):
+        """Test that an unknown backend name is rejected"""
+        monkeypatch.setattr('src.utils.pubsub._broker', None)
+
+        with pytest.raises(ValueError):
+            get_broker('carrier-pigeon')
+
+
+class TestMessagePublishing:
+    """Test cases for MessagingSystem publishing new messages"""
+
+    def test_add_message_is_pushed_to_subscribers(self):
+        """Test that a subscriber sees new messages on its channels without reading the store"""
+        messaging = MessagingSystem()
+        subscription = messaging.subscribe(['support'])
+
+        messaging.add_message('user', 'concierge', 'Not for support')
+        message_id = messaging.add_message('user', 'support', 'Need help', channel='support')
+
+        pushed = subscription.drain()
+        assert [payload['id'] for _, payload in pushed] == [message_id]
+        assert pushed[0][1]['message'] == 'Need help'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
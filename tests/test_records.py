@@ -0,0 +1,127 @@
+"""
+Unit tests for the slotted manager record types
+"""
+import pytest
+import json
+import os
+import sys
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.managers.records import Expense, Investment, Message, Prescription, Record, record_type
+from src.managers.expense import ExpenseManager
+from src.managers.investment import InvestmentManager
+from src.managers.messaging import MessagingSystem
+from src.managers.prescription import PrescriptionManager
+from src.storage.binary_snapshot import encode_snapshot, read_snapshot
+from src.storage.files import encode_value
+
+
+class TestRecords:
+    """Test cases for Record types"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.data = {
+            'id': 1, 'category': 'Food', 'amount': 12.5, 'description': 'Lunch',
+            'date': '2024-01-02', 'status': 'active', 'imported_from': 'bank.csv'
+        }
+
+    def test_records_have_no_instance_dict(self):
+        """Test that known fields live in slots"""
+        expense = Expense(self.data)
+        assert not hasattr(expense, '__dict__')
+        assert expense.amount == 12.5
+
+    def test_json_round_trip_is_lossless(self):
+        """Test that unset fields stay missing and unknown keys are kept"""
+        expense = Expense(self.data)
+        encoded = json.loads(json.dumps(expense, default=encode_value))
+        assert encoded == self.data
+        assert 'app_source' not in encoded
+        assert Expense(encoded) == expense
+
+    def test_mapping_access(self):
+        """Test that records behave like the dicts they replace"""
+        expense = Expense(self.data)
+        assert expense['category'] == 'Food'
+        assert expense.get('app_source') is None
+        assert expense.get('app_source', 'manual') == 'manual'
+        assert 'imported_from' in expense and 'external_id' not in expense
+        assert len(expense) == len(self.data)
+        expense['status'] = 'deleted'
+        expense.update({'external_id': 'abc'})
+        del expense['imported_from']
+        expected = {**self.data, 'status': 'deleted', 'external_id': 'abc'}
+        del expected['imported_from']
+        assert dict(expense) == expected
+        with pytest.raises(KeyError):
+            expense['app_source']
+        with pytest.raises(KeyError):
+            del expense['imported_from']
+
+    def test_copy_is_independent(self):
+        """Test that copies do not share state with the original"""
+        expense = Expense(self.data)
+        copy = expense.copy()
+        copy['amount'] = 99
+        copy['note'] = 'x'
+        assert expense['amount'] == 12.5
+        assert 'note' not in expense
+
+    def test_repeated_strings_are_interned(self):
+        """Test that interned fields share one string object across records"""
+        first = Prescription({'pharmacy': ''.join(['c', 'v', 's'])})
+        second = Prescription({'pharmacy': ''.join(['c', 'v', 's'])})
+        assert first['pharmacy'] is second['pharmacy']
+
+    def test_fields_cannot_shadow_record_methods(self):
+        """Test that a field named like a mapping method is rejected"""
+        with pytest.raises(TypeError):
+            @record_type
+            class Broken(Record):
+                get: str
+
+    def test_load_converts_store_lists(self):
+        """Test that load replaces the list in the store data"""
+        data = {'expenses': [self.data]}
+        expenses = Expense.load(data, 'expenses')
+        assert data['expenses'] is expenses
+        assert isinstance(expenses[0], Expense)
+        assert Expense.load({}, 'expenses') == []
+
+    def test_load_converts_snapshot_chunks_as_decoded(self, tmp_path):
+        """Test that records mapped from a binary snapshot are built per chunk, extra keys included"""
+        rows = [dict(self.data, id=i) for i in range(10)] + [{'id': 10, 'category': 'Rent'}]
+        path = tmp_path / 'expenses.snap'
+        path.write_bytes(encode_snapshot({'expenses': rows}, chunk_size=4))
+        data = read_snapshot(str(path))
+        assert data['expenses'][0]['id'] == 0
+        expenses = Expense.load(data, 'expenses')
+        assert data['expenses'] is expenses and expenses.unread == 2
+        assert isinstance(expenses[0], Expense) and expenses.unread == 2
+        assert all(isinstance(expense, Expense) for expense in expenses)
+        assert [dict(expense) for expense in expenses] == rows
+        assert expenses[1]['category'] is expenses[9]['category']
+
+    def test_managers_keep_records_across_reload(self):
+        """Test that managers hold records before and after a reload"""
+        ExpenseManager().add_expense('Food', 10, 'Lunch', '2024-01-02')
+        InvestmentManager().add_investment('VTI', 'Total Market', 2, 250.0, 1)
+        PrescriptionManager().add_prescription('Lisinopril', '10mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Smith')
+        messaging = MessagingSystem()
+        messaging.add_message('user', 'concierge', 'Hello')
+        messaging.flush()
+
+        expense = ExpenseManager().expenses[0]
+        investment = InvestmentManager().investments[0]
+        prescription = PrescriptionManager().prescriptions[0]
+        message = MessagingSystem().messages[0]
+        assert isinstance(expense, Expense) and expense['amount'] == 10
+        assert isinstance(investment, Investment) and investment['current_value'] == 500.0
+        assert isinstance(prescription, Prescription) and prescription['pharmacy'] == 'cvs'
+        assert isinstance(message, Message) and message['message'] == 'Hello'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,158 @@
+"""
+Unit tests for the refill scheduler and reminder job
+"""
+import pytest
+import os
+import sys
+import threading
+from datetime import date
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.managers.refill_scheduler import RefillScheduler, RefillReminderJob
+from src.managers.prescription import PrescriptionManager
+from src.managers.messaging import MessagingSystem
+from src.managers import registry
+from src.managers.registry import MANAGER_CLASSES
+from src.storage.write_behind import flush_all
+
+
+class TestRefillScheduler:
+    """Test cases for RefillScheduler"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.scheduler = RefillScheduler()
+        self.today = date(2024, 3, 1)
+
+    def test_due_within_is_ordered_and_bounded(self):
+        """Test that only prescriptions inside the window are returned, soonest first"""
+        self.scheduler.schedule({'id': 'a', 'status': 'active', 'next_refill_due': '2024-03-05'})
+        self.scheduler.schedule({'id': 'b', 'status': 'active', 'next_refill_due': '2024-02-27'})
+        self.scheduler.schedule({'id': 'c', 'status': 'active', 'next_refill_due': '2024-04-01'})
+
+        assert self.scheduler.due_within(7, self.today) == [('b', date(2024, 2, 27)), ('a', date(2024, 3, 5))]
+        # Asking again returns the same answer; due items stay scheduled
+        assert [pid for pid, _ in self.scheduler.due_within(7, self.today)] == ['b', 'a']
+
+    def test_reschedule_and_cancel(self):
+        """Test that stale heap entries are ignored after a reschedule or cancel"""
+        self.scheduler.schedule({'id': 'a', 'status': 'active', 'next_refill_due': '2024-03-02'})
+        self.scheduler.schedule({'id': 'b', 'status': 'active', 'next_refill_due': '2024-03-03'})
+        self.scheduler.schedule({'id': 'a', 'status': 'active', 'next_refill_due': '2024-05-01'})
+        self.scheduler.schedule({'id': 'b', 'status': 'inactive', 'next_refill_due': '2024-03-03'})
+
+        assert self.scheduler.due_within(7, self.today) == []
+        assert len(self.scheduler) == 1
+
+    def test_unparseable_dates_are_skipped(self):
+        """Test that a prescription without a valid due date is not scheduled"""
+        self.scheduler.schedule({'id': 'a', 'status': 'active', 'next_refill_due': 'soon'})
+
+        assert len(self.scheduler) == 0
+
+    def test_concurrent_due_within(self):
+        """Test that callers on other threads always see every due prescription exactly once"""
+        for i in range(200):
+            self.scheduler.schedule({'id': str(i), 'status': 'active', 'next_refill_due': '2024-03-02'})
+        results = []
+
+        def sweep():
+            for _ in range(50):
+                results.append(len(self.scheduler.due_within(7, self.today)))
+
+        threads = [threading.Thread(target=sweep) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert set(results) == {200}
+        assert len(self.scheduler.heap) == 200
+
+
+class TestRefillReminders:
+    """Test cases for refill reminders sent through MessagingSystem"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.prescription_manager = PrescriptionManager()
+        self.messaging = MessagingSystem()
+        self.today = date(2024, 3, 1)
+        self.prescription_id = self.prescription_manager.add_prescription(
+            'Lisinopril', '10mg', 'Daily', 30, '2024-03-03', 'cvs', 'Dr. Smith'
+        )
+        self.prescription_manager.add_prescription('Statin', '20mg', 'Daily', 30, '2024-06-01', 'cvs', 'Dr. Smith')
+
+    def test_get_refill_reminders_window(self):
+        """Test reminder fields for a prescription due in two days"""
+        reminders = self.prescription_manager.get_refill_reminders(today=self.today)
+
+        assert len(reminders) == 1
+        assert reminders[0]['prescription']['id'] == self.prescription_id
+        assert reminders[0]['days_until'] == 2
+        assert reminders[0]['urgent'] is True
+
+    def test_send_refill_reminders_once_per_due_date(self):
+        """Test that each due refill is messaged once, even after a reload"""
+        assert self.prescription_manager.send_refill_reminders(self.messaging, today=self.today) == 1
+        assert self.prescription_manager.send_refill_reminders(self.messaging, today=self.today) == 0
+        assert PrescriptionManager().send_refill_reminders(self.messaging, today=self.today) == 0
+
+        message = self.messaging.get_messages('concierge')[-1]
+        assert message['sender'] == 'concierge'
+        assert 'Lisinopril' in message['message']
+        assert 'CVS Pharmacy' in message['message']
+
+    def test_reminder_job_run_once(self):
+        """Test that the background job sends reminders through the managers it is given"""
+        managers = {'prescription': self.prescription_manager, 'messaging': self.messaging}
+        job = RefillReminderJob(managers.get)
+
+        assert job.run_once(today=self.today) == 1
+        assert len(self.messaging.get_messages('concierge')) == 1
+
+    def test_reminder_job_visits_user_partitions(self):
+        """Test that a sweep covers every user's prescriptions and messages only that user"""
+        PrescriptionManager('alice').add_prescription('Metformin', '500mg', 'Daily', 30, '2024-03-02', 'cvs', 'Dr. Lee')
+        PrescriptionManager('bob').add_prescription('Statin', '20mg', 'Daily', 30, '2024-06-01', 'cvs', 'Dr. Lee')
+        managers = {('prescription', None): self.prescription_manager, ('messaging', None): self.messaging}
+
+        def get_manager(name, user_id=None):
+            return managers.get((name, user_id)) or MANAGER_CLASSES[name](user_id)
+
+        assert RefillReminderJob(get_manager).run_once(today=self.today) == 2
+        flush_all()
+        assert [m['recipient'] for m in self.messaging.get_messages('concierge')] == ['user']
+        alice_messages = MessagingSystem('alice').get_messages('concierge')
+        assert [m['recipient'] for m in alice_messages] == ['alice']
+        assert 'Metformin' in alice_messages[0]['message']
+        assert MessagingSystem('bob').get_messages('concierge') == []
+        assert not os.path.exists(os.path.join('user_data', 'bob', 'chat_history.journal.jsonl'))
+
+    def test_reminder_sweep_leaves_user_cache_alone(self, monkeypatch):
+        """Test that sweeping every user's partition does not evict active users' managers"""
+        monkeypatch.setattr(registry, 'USER_MANAGER_CACHE_SIZE', 2)
+        active = registry.get_manager('prescription', 'alice')
+        for user_id in ('bob', 'carol', 'dave'):
+            PrescriptionManager(user_id).add_prescription('Statin', '20mg', 'Daily', 30, '2024-03-02', 'cvs', 'Dr. Lee')
+
+        assert RefillReminderJob(registry.open_manager).run_once(today=self.today) == 4
+        assert registry.get_manager('prescription', 'alice') is active
+        assert list(registry._user_instances) == [('prescription', 'alice')]
+        registry.clear_managers()
+
+    def test_reminder_job_start_stop(self):
+        """Test that the job thread runs a sweep and stops cleanly"""
+        managers = {'prescription': self.prescription_manager, 'messaging': self.messaging}
+        job = RefillReminderJob(managers.get, interval=60, days=365)
+
+        job.start()
+        job.stop()
+
+        assert job.thread is None
+        assert len(self.messaging.get_messages('concierge')) == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
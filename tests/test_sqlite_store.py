@@ -0,0 +1,169 @@
+"""
+Unit tests for the SQLite storage backend
+"""
+import pytest
+import os
+import sys
+from datetime import datetime
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.storage import backends
+from src.storage.journal import JournalStore
+from src.storage.sqlite_store import SQLiteStore
+from src.managers.expense import ExpenseManager
+from src.managers.investment import InvestmentManager
+from src.managers.messaging import MessagingSystem
+from src.managers.prescription import PrescriptionManager
+
+
+class TestSQLiteStore:
+    """Test cases for SQLiteStore"""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.store = SQLiteStore('test.db', 'expenses')
+
+    def test_load_empty(self):
+        """Test loading a store with no tables yet"""
+        assert self.store.load() == {}
+
+    def test_append_and_load(self):
+        """Test that appended records load back in insertion order"""
+        self.store.append('expenses', {'id': 2, 'category': 'food'})
+        self.store.append('expenses', {'id': 1, 'category': 'travel'})
+        self.store.set('settings', {'currency': 'USD'})
+
+        data = SQLiteStore('test.db', 'expenses').load()
+
+        assert [e['id'] for e in data['expenses']] == [2, 1]
+        assert data['settings'] == {'currency': 'USD'}
+
+    def test_query_filters(self):
+        """Test filtering on indexed and non-indexed fields"""
+        self.store.append('expenses', {'id': 1, 'category': 'food', 'status': 'active', 'app_source': 'ynab'})
+        self.store.append('expenses', {'id': 2, 'category': 'food', 'status': 'deleted', 'app_source': 'ynab'})
+        self.store.append('expenses', {'id': 3, 'category': 'travel', 'status': 'active', 'app_source': 'mint'})
+
+        assert [e['id'] for e in self.store.query('expenses', category='food', status='active')] == [1]
+        assert [e['id'] for e in self.store.query('expenses', app_source='ynab')] == [1, 2]
+        assert self.store.count('expenses', status='active') == 2
+
+    def test_query_uses_index(self):
+        """Test that filtered queries are answered from an index"""
+        self.store.append('expenses', {'id': 1, 'status': 'active'})
+
+        plan = self.store.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT data FROM "expenses__expenses" WHERE "status" IS ?', ('active',)
+        ).fetchall()
+
+        assert any('USING INDEX' in row[-1] for row in plan)
+
+    def test_update(self):
+        """Test updating a record by id keeps indexed columns in sync"""
+        self.store.append('expenses', {'id': 1, 'status': 'active'})
+        self.store.update('expenses', 1, {'status': 'deleted'})
+
+        assert self.store.query('expenses', status='active') == []
+        assert self.store.query('expenses', status='deleted') == [{'id': 1, 'status': 'deleted'}]
+
+    def test_update_many(self):
+        """Test updating several records in one call, skipping unknown ids"""
+        self.store.extend('messages', [{'id': 'a', 'read': False}, {'id': 'b', 'read': False}])
+        self.store.update_many('messages', {'a': {'read': True}, 'b': {'read': True}, 'c': {'read': True}})
+
+        assert self.store.query('messages', read=True) == [{'id': 'a', 'read': True}, {'id': 'b', 'read': True}]
+
+    def test_save_replaces_contents(self):
+        """Test that save rewrites collections and values"""
+        self.store.append('expenses', {'id': 1})
+        self.store.save({'expenses': [{'id': 5}], 'budgets': [], 'totals': {'food': 1}})
+
+        data = self.store.load()
+
+        assert data['expenses'] == [{'id': 5}]
+        assert data['budgets'] == []
+        assert data['totals'] == {'food': 1}
+
+    def test_datetime_values_are_encoded(self):
+        """Test that datetime values are stored as ISO strings"""
+        self.store.append('messages', {'id': 'a', 'timestamp': datetime(2024, 1, 1)})
+
+        assert self.store.query('messages')[0]['timestamp'] == '2024-01-01T00:00:00'
+
+    def test_next_id(self):
+        """Test that ids are seeded from stored records and never reused"""
+        self.store.extend('expenses', [{'id': 4}, {'id': 'a'}])
+
+        assert self.store.next_id('expenses') == 5
+        assert self.store.next_id('expenses', count=2) == 6
+        assert SQLiteStore('test.db', 'expenses').next_id('expenses') == 8
+        assert 'sequences' not in SQLiteStore('test.db', 'expenses').load()
+
+
+class TestBackendSelection:
+    """Test cases for open_store and managers running on SQLite"""
+
+    def test_default_backend(self):
+        """Test that the journal backend is the default"""
+        assert isinstance(backends.open_store('expenses'), JournalStore)
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
+        with pytest.raises(ValueError):
+            backends.open_store('expenses', backend='carrier_pigeon')
+
+    def test_managers_on_sqlite(self, monkeypatch):
+        """Test that managers persist and query through SQLite when configured"""
+        monkeypatch.setattr(backends, 'STORAGE_BACKEND', 'sqlite')
+
+        ExpenseManager().add_expense('food', 20.0, 'Dinner', '2024-01-05')
+        PrescriptionManager().add_prescription('Med', '5mg', 'Daily', 30, '2024-02-01', 'cvs', 'Dr. Who')
+        investments = InvestmentManager()
+        account = investments.add_investment_account('vanguard', 'IRA', 'retirement')
+        investments.add_investment('VTI', 'Total Market', 10, 200.0, account['id'])
+        messaging = MessagingSystem()
+        messaging.add_message('user', 'concierge', 'Hi')
+        messaging.flush()
+
+        assert isinstance(ExpenseManager().store, SQLiteStore)
+        assert ExpenseManager().get_expenses(category='food')[0]['description'] == 'Dinner'
+        assert PrescriptionManager().get_prescriptions()[0]['name'] == 'Med'
+        assert InvestmentManager().get_portfolio_summary()['total_investments'] == 1
+        assert len(InvestmentManager().get_account_investments(account['id'])) == 1
+        assert MessagingSystem().get_messages('concierge')[0]['message'] == 'Hi'
+        assert not os.path.exists('expenses.json')
+
+    def test_user_partitions_on_sqlite(self, monkeypatch):
+        """Test that each user's data lives in its own tables, apart from the shared store"""
+        monkeypatch.setattr(backends, 'STORAGE_BACKEND', 'sqlite')
+
+        ExpenseManager('alice').add_expense('food', 20.0, 'Dinner', '2024-01-05')
+        ExpenseManager('bob_2').add_expense('travel', 90.0, 'Train', '2024-01-06')
+
+        assert [e['description'] for e in ExpenseManager('alice').expenses] == ['Dinner']
+        assert [e['description'] for e in ExpenseManager('bob_2').expenses] == ['Train']
+        assert ExpenseManager().expenses == []
+        assert backends.list_users('expenses') == ['alice', 'bob_2']
+        assert backends.list_users('tax') == []
+
+    def test_shared_store_moves_to_a_user_on_sqlite(self, monkeypatch):
+        """Test that a shared store's tables move to a user whose own tables are still empty"""
+        monkeypatch.setattr(backends, 'STORAGE_BACKEND', 'sqlite')
+        ExpenseManager().add_expense('food', 20.0, 'Dinner', '2024-01-05')
+        ExpenseManager('carol').add_expense('travel', 90.0, 'Train', '2024-01-06')
+        ExpenseManager('bob')  # opened but never written to
+
+        assert not backends.claim_shared_store('expenses', 'carol')
+        assert backends.claim_shared_store('expenses', 'bob')
+        assert not backends.claim_shared_store('expenses', 'dave')
+        bob = ExpenseManager('bob')
+        bob.add_expense('food', 8.0, 'Lunch', '2024-01-07')
+
+        assert [(e['id'], e['description']) for e in ExpenseManager('bob').expenses] == [(1, 'Dinner'), (2, 'Lunch')]
+        assert bob.get_expenses(category='food')[0]['description'] == 'Dinner'
+        assert ExpenseManager().expenses == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])